@@ -1,8 +1,228 @@
+"""
+One-time passwords: random OTP codes plus an RFC 4226 (HOTP) / RFC 6238 (TOTP) engine.
+
+The HMAC key schedule (inner and outer padded-key states) is computed once per
+secret in OTPKey; every code afterwards only copies those states and hashes the
+8-byte counter, so verifying a ±window of time steps never re-derives the key.
+
+Batch verification (verify_batch) shards attempts across processes by secret,
+so each worker keeps the key schedules of "its" users warm in a small cache.
+The worker processes are kept between calls (one per shard, so shard i always
+reaches the same cache); shutdown_workers() stops them.
+"""
+import hmac
+import time
+import base64
 import secrets
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_DIGITS = 6
+DEFAULT_PERIOD = 30
+DEFAULT_ALGORITHM = 'sha1'
+SUPPORTED_ALGORITHMS = ('sha1', 'sha256', 'sha512')
+
+# Key schedules kept per worker process in verify_batch
+KEY_CACHE_SIZE = 100_000
+
+_COUNTER = struct.Struct('>Q')
 
 
 def generate_otp(length=6):
-    return ''.join(str(secrets.randbelow(10))for _ in range(length))
+    """Random numeric code: one uniform draw below 10**length, zero-padded (independent uniform digits)."""
+    return f"{secrets.randbelow(10 ** length):0{length}d}"
+
+
+def generate_secret(num_bytes=20):
+    """Random shared secret, base32-encoded without padding (authenticator apps format)."""
+    return base64.b32encode(secrets.token_bytes(num_bytes)).decode('ascii').rstrip('=')
+
+
+def decode_secret(secret_b32):
+    """Decode a base32 secret, tolerating lowercase, spaces and missing padding."""
+    cleaned = secret_b32.replace(' ', '').upper()
+    return base64.b32decode(cleaned + '=' * (-len(cleaned) % 8))
+
+
+class OTPKey:
+    """
+    HOTP/TOTP generator and verifier for one shared secret.
+
+    The keyed HMAC object is built once; hmac.copy() duplicates its
+    precomputed inner/outer states for every counter value.
+    """
+
+    def __init__(self, secret, digits=DEFAULT_DIGITS, algorithm=DEFAULT_ALGORITHM,
+                 period=DEFAULT_PERIOD, t0=0):
+        """
+        Args:
+            secret (bytes): Raw shared secret
+            digits (int): Code length (6-10)
+            algorithm (str): 'sha1', 'sha256' or 'sha512'
+            period (int): TOTP time step in seconds
+            t0 (int): Unix time of step 0
+        """
+        if not isinstance(secret, (bytes, bytearray)) or not secret:
+            raise ValueError("Secret must be non-empty bytes")
+        if not 6 <= digits <= 10:
+            raise ValueError("Digits must be between 6 and 10")
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Algorithm must be one of {SUPPORTED_ALGORITHMS}")
+        if period <= 0:
+            raise ValueError("Period must be positive")
+
+        self.digits = digits
+        self.algorithm = algorithm
+        self.period = period
+        self.t0 = t0
+        self._modulus = 10 ** digits
+        self._mac = hmac.new(bytes(secret), digestmod=algorithm)
+
+    @classmethod
+    def from_base32(cls, secret_b32, **kwargs):
+        return cls(decode_secret(secret_b32), **kwargs)
+
+    def hotp(self, counter):
+        """RFC 4226 code for `counter`."""
+        mac = self._mac.copy()
+        mac.update(_COUNTER.pack(counter))
+        digest = mac.digest()
+        offset = digest[-1] & 0x0F
+        code = (int.from_bytes(digest[offset:offset + 4], 'big') & 0x7FFFFFFF) % self._modulus
+        return str(code).zfill(self.digits)
+
+    def time_step(self, for_time=None):
+        """TOTP counter (time step) for a Unix timestamp (now by default)."""
+        now = time.time() if for_time is None else for_time
+        return int((now - self.t0) // self.period)
+
+    def totp(self, for_time=None):
+        """RFC 6238 code for a Unix timestamp (now by default)."""
+        return self.hotp(self.time_step(for_time))
+
+    def verify_hotp(self, code, counter, look_ahead=0):
+        """
+        Check `code` against counters counter..counter+look_ahead.
+
+        Returns:
+            int | None: The matching counter (the caller must persist counter + 1), or None
+        """
+        return self._match(code, range(counter, counter + look_ahead + 1))
+
+    def verify_totp(self, code, for_time=None, window=1):
+        """
+        Check `code` against the time steps within ±window of `for_time`.
+
+        Returns:
+            int | None: The matching time step (use it for replay protection), or None
+        """
+        step = self.time_step(for_time)
+        return self._match(code, range(step - window, step + window + 1))
+
+    def _match(self, code, counters):
+        # Every candidate is computed and compared in constant time, so the
+        # response time does not reveal which step (if any) matched.
+        if not isinstance(code, str) or len(code) != self.digits:
+            return None
+        expected = code.encode('ascii', 'replace')
+        matched = None
+        for counter in counters:
+            if counter >= 0 and hmac.compare_digest(self.hotp(counter).encode('ascii'), expected):
+                matched = counter
+        return matched
+
+
+# --- Batch verification ---
+
+_key_cache: Dict[Tuple[bytes, int, str, int], OTPKey] = {}
+
+
+def _cached_key(secret, digits, algorithm, period):
+    cache_key = (secret, digits, algorithm, period)
+    key = _key_cache.get(cache_key)
+    if key is None:
+        if len(_key_cache) >= KEY_CACHE_SIZE:
+            _key_cache.clear()
+        key = OTPKey(secret, digits=digits, algorithm=algorithm, period=period)
+        _key_cache[cache_key] = key
+    return key
+
+
+# One single-process executor per shard index, reused across verify_batch calls
+_shard_executors: List[ProcessPoolExecutor] = []
+_shard_executors_lock = threading.Lock()
+
+
+def _executors(processes):
+    with _shard_executors_lock:
+        while len(_shard_executors) < processes:
+            _shard_executors.append(ProcessPoolExecutor(1))
+        return _shard_executors[:processes]
+
+
+def shutdown_workers():
+    """Stop the worker processes kept by verify_batch (they restart on the next call)."""
+    with _shard_executors_lock:
+        executors = list(_shard_executors)
+        _shard_executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+def _verify_shard(attempts, for_time, window, digits, algorithm, period):
+    """Verify (index, secret, code) tuples in one process; returns (index, step) pairs."""
+    results = []
+    for index, secret, code in attempts:
+        key = _cached_key(secret, digits, algorithm, period)
+        results.append((index, key.verify_totp(code, for_time, window)))
+    return results
+
+
+def verify_batch(attempts: Iterable[Tuple[bytes, str]], for_time: Optional[float] = None,
+                 window: int = 1, digits: int = DEFAULT_DIGITS,
+                 algorithm: str = DEFAULT_ALGORITHM, period: int = DEFAULT_PERIOD,
+                 processes: int = 1) -> List[Optional[int]]:
+    """
+    Verify many (secret, code) TOTP attempts at the same instant.
+
+    Attempts are sharded by secret, so all attempts of a user land in the
+    same worker and reuse its cached key schedule, also across calls.
+
+    Returns:
+        list: Matching time step (or None) per attempt, in input order
+    """
+    for_time = time.time() if for_time is None else for_time
+    indexed = [(i, bytes(secret), code) for i, (secret, code) in enumerate(attempts)]
+    results: List[Optional[int]] = [None] * len(indexed)
+
+    if processes <= 1 or len(indexed) < 2:
+        shards: Sequence = [indexed]
+    else:
+        shards = [[] for _ in range(processes)]
+        for attempt in indexed:
+            shards[hash(attempt[1]) % processes].append(attempt)
+
+    if len(shards) == 1:
+        pairs = [_verify_shard(shards[0], for_time, window, digits, algorithm, period)]
+    else:
+        futures = [executor.submit(_verify_shard, shard, for_time, window,
+                                   digits, algorithm, period)
+                   for executor, shard in zip(_executors(processes), shards) if shard]
+        pairs = [future.result() for future in futures]
+
+    for shard_results in pairs:
+        for index, step in shard_results:
+            results[index] = step
+    return results
+
 
+if __name__ == "__main__":
+    print("Generated OTP:", generate_otp(4))
 
-print("Generated OTP:", generate_otp(4))
+    demo_secret = generate_secret()
+    demo_key = OTPKey.from_base32(demo_secret)
+    demo_code = demo_key.totp()
+    print("TOTP secret:", demo_secret)
+    print("Current TOTP:", demo_code, "| verified step:", demo_key.verify_totp(demo_code))
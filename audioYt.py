@@ -1,8 +1,28 @@
-from pytube import YouTube
+"""
+Descarga solo el audio de un video (o de todos los de una lista)
+Archivo: audioYt.py
 
-url = input('Enter a Video to Download Audio: ')
-yt = YouTube(url)
+Usa el modo audio de YouTubeDownloader (yt_videos.py, yt-dlp): el formato
+de solo audio con más calidad por byte, sin bajar video ni fusionar.
 
-# Filter audio streams and download the first one
-audio_stream = yt.streams.filter(only_audio=True).first()
-audio_stream.download()
+Uso:
+    python3 audioYt.py          # formato original
+    python3 audioYt.py mp3      # convertido a mp3, m4a u opus (requiere ffmpeg)
+"""
+
+import sys
+
+from yt_postprocess import AUDIO_FORMATS, PostProcessPool
+from yt_videos import YouTubeDownloader
+
+audio_format = sys.argv[1].lower() if len(sys.argv) > 1 else None
+if audio_format is not None and audio_format not in AUDIO_FORMATS:
+    sys.exit(f"Formato no soportado: {sys.argv[1]}\n"
+             f"Uso: python3 audioYt.py [{'|'.join(sorted(AUDIO_FORMATS))}]")
+url = input('Enter a Video to Download Audio: ').strip()
+
+with PostProcessPool() as pool:
+    downloader = YouTubeDownloader(audio_only=True, audio_format=audio_format, postprocess=pool)
+    # Un video da una sola entrada; una lista, una por video (sin resolverlos antes)
+    for entry in downloader.iter_playlist(url):
+        downloader.download_video(entry['url'])
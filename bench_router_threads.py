@@ -0,0 +1,184 @@
+"""
+bench_router_threads.py - Escalado de SecurePasswordRouter con 1..N hilos
+
+Un único router compartido por todos los hilos. Cada hilo genera el mismo
+número de credenciales (escalado débil), así que con escalado perfecto el
+throughput total crece linealmente con el número de hilos.
+
+También mide generate_batch con un hilo ('batch' en el JSON): el registro de
+generadores (GeneratorRegistry.load_costs) usa ambas medidas como perfil de coste.
+
+Con --seed cada router usa una DeterministicRandomSource (SHAKE-256) y la
+medida de lote se hace con un router propio recién creado: su salida se
+reproduce byte a byte y el JSON guarda su SHA-256 ('batch'[escenario]['sha256'])
+para comparar ejecuciones. Las filas con varios hilos reparten el flujo según
+el planificador, así que solo su tiempo es comparable.
+
+En CPython estándar el GIL limita el escalado a ~1x (es lo único medido
+hasta ahora). En el build free-threaded (python3.13t, PYTHON_GIL=0) el
+camino caliente no toma locks compartidos, pero el escalado ahí está sin
+medir: ejecutar este script con 3.13t antes de suponer que es lineal.
+
+MODO DE USO:
+============
+python3 bench_router_threads.py --max-threads 8 --per-thread 2000
+python3.13t bench_router_threads.py --max-threads 8 --json bench_threads.json
+python3 bench_router_threads.py --seed 42 --json a.json   # reproducible
+
+# Costes medidos para DecisionMatrix
+from secure_router import DEFAULT_REGISTRY
+DEFAULT_REGISTRY.load_costs("bench_threads.json")
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from typing import Any, Dict, List, Optional
+
+from secure_router import SecurePasswordRouter
+from random_source import DETERMINISTIC_MODES, RANDOM_SOURCE_MODE_ENV, DeterministicRandomSource
+
+# Escenarios de generación medidos
+SCENARIOS = {
+    'standard': {'only_numbers': False, 'length': 16},
+    'pin': {'only_numbers': True, 'length': 6, 'strict_security': True},
+    'token': {'token': True, 'token_encoding': 'base64url', 'token_bytes': 32},
+}
+
+
+def gil_enabled() -> bool:
+    """True si el intérprete actual ejecuta con GIL."""
+    check = getattr(sys, '_is_gil_enabled', None)
+    return True if check is None else check()
+
+
+def run_threads(router: SecurePasswordRouter, options: Dict[str, Any],
+                threads: int, per_thread: int) -> float:
+    """
+    Ejecuta `threads` hilos que generan `per_thread` credenciales cada uno.
+
+    Returns:
+        float: Segundos de pared desde que todos los hilos arrancan
+    """
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            router.generate(options)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start
+
+
+def benchmark(max_threads: int, per_thread: int,
+              scenarios: Optional[List[str]] = None,
+              seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Mide throughput y escalado para cada escenario y número de hilos.
+
+    Args:
+        seed: Semilla de la fuente determinista (None = CSPRNG del sistema)
+
+    Returns:
+        {'python': str, 'gil': bool, 'cpus': int, 'results': {escenario: [...]}}
+    """
+    results: Dict[str, List[Dict[str, float]]] = {}
+    batch: Dict[str, Dict[str, float]] = {}
+
+    def new_router() -> SecurePasswordRouter:
+        rng = None if seed is None else DeterministicRandomSource(f"{seed}:{name}")
+        return SecurePasswordRouter(debug=False, track_history=True, rng=rng)
+
+    for name in scenarios or list(SCENARIOS):
+        options = SCENARIOS[name]
+        router = new_router()
+        run_threads(router, options, 1, min(per_thread, 200))  # calentamiento
+        rows = []
+        base = None
+        for threads in range(1, max_threads + 1):
+            seconds = run_threads(router, options, threads, per_thread)
+            throughput = threads * per_thread / seconds
+            base = base or throughput
+            rows.append({
+                'threads': threads,
+                'seconds': round(seconds, 4),
+                'items_per_sec': round(throughput, 1),
+                'us_per_item': round(1e6 / throughput, 3),
+                'speedup': round(throughput / base, 2),
+            })
+        results[name] = rows
+
+        if seed is not None:
+            router = new_router()
+        start = time.perf_counter()
+        passwords = router.generate_batch(options, per_thread)['passwords']
+        seconds = time.perf_counter() - start
+        batch[name] = {'us_per_item': round(1e6 * seconds / per_thread, 3)}
+        if seed is not None:
+            batch[name]['sha256'] = hashlib.sha256("\n".join(passwords).encode()).hexdigest()
+
+    return {
+        'python': sys.version.split()[0],
+        'gil': gil_enabled(),
+        'cpus': os.cpu_count() or 1,
+        'per_thread': per_thread,
+        'seed': seed,
+        'results': results,
+        'batch': batch,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("\n" + "=" * 60)
+    print(f"🧵 Escalado por hilos - Python {report['python']} "
+          f"({'GIL' if report['gil'] else 'free-threaded'}, {report['cpus']} CPUs)")
+    print("=" * 60)
+    for name, rows in report['results'].items():
+        print(f"\n{name}:")
+        print(f"  {'hilos':>5} {'items/s':>12} {'µs/item':>10} {'speedup':>8} {'eficiencia':>10}")
+        for row in rows:
+            efficiency = row['speedup'] / row['threads']
+            print(f"  {row['threads']:>5} {row['items_per_sec']:>12,.0f} "
+                  f"{row['us_per_item']:>10.2f} {row['speedup']:>7.2f}x {efficiency:>9.0%}")
+        if name in report.get('batch', {}):
+            print(f"  lote (1 hilo): {report['batch'][name]['us_per_item']:.2f} µs/item")
+            if 'sha256' in report['batch'][name]:
+                print(f"  sha256 del lote (seed={report['seed']}): {report['batch'][name]['sha256'][:16]}…")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de escalado por hilos del router")
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--per-thread", type=int, default=2000)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--json", default=None, help="Guardar resultados en JSON")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Fuente determinista (modo benchmark): lotes reproducibles byte a byte")
+    args = parser.parse_args(argv)
+
+    if args.seed is not None and os.environ.get(RANDOM_SOURCE_MODE_ENV) not in DETERMINISTIC_MODES:
+        os.environ[RANDOM_SOURCE_MODE_ENV] = "benchmark"
+
+    report = benchmark(args.max_threads, args.per_thread, args.scenario, args.seed)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Generador de Passphrases tipo Diceware con lista de palabras memory-mapped.
+
+Combina:
+1. Listas EFF (7.776 palabras) o mayores (cientos de miles de palabras)
+2. Índice prebuilt con offsets: selección de palabra O(1), sin cargar la lista
+3. mmap: el arranque y el RSS no crecen con el tamaño de la lista
+4. CSPRNG (os.urandom, o el RandomSource inyectado) con muestreo por rechazo
+   (sin sesgo de módulo)
+5. Entropía exacta: num_palabras * log2(tamaño_lista)
+
+FORMATO DEL ÍNDICE (.idx, little-endian):
+    cabecera  : b"DWIX" | versión (uint32) | N palabras (uint32)
+    offsets   : N + 1 uint32 (inicio de cada palabra dentro de datos)
+    datos     : palabras UTF-8 concatenadas
+"""
+
+import os
+import sys
+import mmap
+import math
+import struct
+import logging
+from array import array
+from typing import List, Optional
+
+from random_source import RandomSource, resolve
+
+logger = logging.getLogger("GeneradorPassphrase")
+
+
+INDEX_MAGIC = b"DWIX"
+INDEX_VERSION = 1
+_CABECERA = struct.Struct("<4sII")
+_PAR_OFFSETS = struct.Struct("<II")
+
+# Lista por defecto: variable de entorno o wordlist.idx junto al módulo
+DEFAULT_WORDLIST_ENV = "DICEWARE_WORDLIST"
+DEFAULT_WORDLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordlist.idx")
+
+PASSPHRASE_MIN_WORDS = 4
+PASSPHRASE_MAX_WORDS = 16
+CAPITALIZATIONS = ("lower", "upper", "title", "none")
+
+_UINT32_LIMITE = 1 << 32
+
+
+def construir_indice(origen: str, destino: str) -> int:
+    """
+    Construye el índice con offsets a partir de una lista de palabras de texto.
+
+    Acepta el formato EFF ("11111<TAB>abacus") o una palabra por línea; se toma
+    la última columna. Las palabras duplicadas se descartan, porque repetirlas
+    haría que la entropía reportada sobreestimara el espacio real. La
+    comparación ignora mayúsculas: con capitalización 'lower', 'upper' o
+    'title', "Casa" y "casa" producirían la misma salida.
+
+    Returns:
+        int: Número de palabras indexadas
+    """
+    offsets = array("I", [0])
+    vistas = set()
+    datos = bytearray()
+
+    with open(origen, "r", encoding="utf-8") as f:
+        for linea in f:
+            campos = linea.split()
+            if not campos:
+                continue
+            palabra = campos[-1]
+            clave = palabra.casefold()
+            if clave in vistas:
+                continue
+            vistas.add(clave)
+            datos += palabra.encode("utf-8")
+            offsets.append(len(datos))
+
+    total = len(offsets) - 1
+    if total < 2:
+        raise ValueError(f"La lista debe tener al menos 2 palabras, encontradas: {total}")
+    if len(datos) >= _UINT32_LIMITE:
+        raise ValueError("La lista excede 4 GiB de datos")
+
+    if sys.byteorder == "big":
+        offsets.byteswap()
+
+    temporal = destino + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(_CABECERA.pack(INDEX_MAGIC, INDEX_VERSION, total))
+        f.write(offsets.tobytes())
+        f.write(datos)
+    os.replace(temporal, destino)
+
+    logger.info("Índice Diceware construido: %d palabras -> %s", total, destino)
+    return total
+
+
+class ListaPalabras:
+    """
+    Lista de palabras memory-mapped sobre un índice construido con construir_indice.
+    Solo se lee la cabecera al abrir; cada palabra se resuelve con dos lecturas de offset.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < _CABECERA.size:
+            raise ValueError(f"Índice Diceware truncado: {ruta}")
+        magic, version, total = _CABECERA.unpack_from(self._mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"Índice Diceware inválido (magic={magic!r}, versión={version}): {ruta}")
+
+        self._total = total
+        self._base_offsets = _CABECERA.size
+        self._base_datos = _CABECERA.size + 4 * (total + 1)
+        if len(self._mm) < self._base_datos:
+            raise ValueError(f"Índice Diceware truncado: {ruta}")
+
+    def __len__(self) -> int:
+        return self._total
+
+    def palabra(self, indice: int) -> str:
+        """Palabra en la posición `indice` (O(1))."""
+        if not (0 <= indice < self._total):
+            raise IndexError(f"Índice fuera de rango: {indice}")
+        inicio, fin = _PAR_OFFSETS.unpack_from(self._mm, self._base_offsets + 4 * indice)
+        base = self._base_datos
+        return self._mm[base + inicio:base + fin].decode("utf-8")
+
+    def cerrar(self) -> None:
+        self._mm.close()
+
+
+def _capitalizar(palabra: str) -> str:
+    return palabra[:1].upper() + palabra[1:].lower()
+
+
+class GeneradorPassphrase:
+    """
+    Generador de passphrases Diceware sobre una ListaPalabras.
+    """
+
+    def __init__(self, lista: ListaPalabras, num_palabras: int = 6,
+                 separador: str = "-", capitalizacion: str = "lower",
+                 rng: Optional[RandomSource] = None):
+        """
+        Args:
+            lista: Lista de palabras memory-mapped
+            num_palabras: Palabras por passphrase (4-16)
+            separador: Texto entre palabras (puede ser vacío)
+            capitalizacion: 'lower', 'upper', 'title' o 'none' (tal cual la lista)
+            rng: Fuente de aleatoriedad (None = CSPRNG del sistema)
+        """
+        if not isinstance(num_palabras, int) or not (PASSPHRASE_MIN_WORDS <= num_palabras <= PASSPHRASE_MAX_WORDS):
+            raise ValueError(f"num_palabras debe ser entre {PASSPHRASE_MIN_WORDS} y {PASSPHRASE_MAX_WORDS}.")
+        if not isinstance(separador, str):
+            raise ValueError(f"separador debe ser str, recibido: {type(separador)}")
+        if capitalizacion not in CAPITALIZATIONS:
+            raise ValueError(f"capitalizacion debe ser una de {CAPITALIZATIONS}, recibido: {capitalizacion}")
+
+        self.lista = lista
+        self.num_palabras = num_palabras
+        self.separador = separador
+        self.capitalizacion = capitalizacion
+        self._rng = resolve(rng)
+
+        # Transformación de capitalización (elegida una vez, no por palabra)
+        self._formatear = {
+            "lower": str.lower,
+            "upper": str.upper,
+            "title": _capitalizar,
+            "none": None,
+        }[capitalizacion]
+
+        total = len(lista)
+        # Mayor múltiplo de `total` representable en 32 bits (muestreo sin sesgo)
+        self._limite = _UINT32_LIMITE - (_UINT32_LIMITE % total)
+        # Palabras ya capitalizadas, para es_valida (se construye al primer uso)
+        self._vocabulario: Optional[frozenset] = None
+        self._max_largo = 0
+
+    def _indices(self, cantidad: int) -> List[int]:
+        """
+        `cantidad` índices uniformes en [0, len(lista)).
+        Se piden en bloque a la fuente y se descartan los valores >= límite.
+        """
+        total = len(self.lista)
+        limite = self._limite
+        # Probabilidad de aceptación >= 1/2; se sobredimensiona el primer bloque
+        aceptacion = limite / _UINT32_LIMITE
+        indices: List[int] = []
+        while len(indices) < cantidad:
+            faltan = cantidad - len(indices)
+            pedir = int(faltan / aceptacion) + 8
+            valores = array("I")
+            valores.frombytes(self._rng.token_bytes(pedir * valores.itemsize))
+            indices.extend(v % total for v in valores if v < limite)
+        del indices[cantidad:]
+        return indices
+
+    def calcular_entropia_bits(self) -> float:
+        """
+        Entropía exacta: num_palabras * log2(tamaño_lista).
+        Con separador vacío es una cota superior (concatenaciones ambiguas).
+        """
+        return round(self.num_palabras * math.log2(len(self.lista)), 2)
+
+    def es_valida(self, passphrase: str) -> bool:
+        """
+        True si `passphrase` son exactamente num_palabras palabras de la lista
+        (con la capitalización del generador) unidas por el separador.
+
+        Se segmenta en lugar de hacer split(): con separador vacío, o si alguna
+        palabra lo contiene ("t-shirt" con '-'), el split no dice cuántas hay.
+        """
+        if self._vocabulario is None:
+            formatear = self._formatear or str
+            palabras = frozenset(formatear(self.lista.palabra(i)) for i in range(len(self.lista)))
+            self._max_largo = max(map(len, palabras))
+            self._vocabulario = palabras
+        vocabulario, max_largo = self._vocabulario, self._max_largo
+        separador, fin = self.separador, len(passphrase)
+
+        # Posiciones donde puede empezar la siguiente palabra
+        inicios = {0}
+        for n in range(self.num_palabras, 0, -1):
+            siguientes = set()
+            for inicio in inicios:
+                for corte in range(inicio + 1, min(inicio + max_largo, fin) + 1):
+                    if passphrase[inicio:corte] not in vocabulario:
+                        continue
+                    if n == 1:
+                        if corte == fin:
+                            return True
+                    elif passphrase.startswith(separador, corte):
+                        siguientes.add(corte + len(separador))
+            if not siguientes:
+                return False
+            inicios = siguientes
+        return False
+
+    def generar(self) -> str:
+        """Genera una passphrase."""
+        return self.generar_lote(1)[0]
+
+    def generar_lote(self, cantidad: int) -> List[str]:
+        """
+        Modo masivo: todos los índices del lote salen del mismo bloque aleatorio.
+        """
+        if not isinstance(cantidad, int) or cantidad < 1:
+            raise ValueError(f"cantidad debe ser int >= 1, recibido: {cantidad}")
+
+        k = self.num_palabras
+        indices = self._indices(cantidad * k)
+
+        # Resolución directa sobre el mmap (los índices ya están en rango)
+        lista = self.lista
+        mm, base_offsets, base = lista._mm, lista._base_offsets, lista._base_datos  # pylint: disable=protected-access
+        unpack = _PAR_OFFSETS.unpack_from
+        palabras = []
+        for i in indices:
+            inicio, fin = unpack(mm, base_offsets + 4 * i)
+            palabras.append(mm[base + inicio:base + fin].decode("utf-8"))
+        if self._formatear is not None:
+            palabras = list(map(self._formatear, palabras))
+
+        unir = self.separador.join
+        return [unir(palabras[j:j + k]) for j in range(0, cantidad * k, k)]
+
+
+_LISTAS_ABIERTAS = {}
+
+
+def abrir_lista(ruta: Optional[str] = None) -> ListaPalabras:
+    """
+    Abre (una vez por proceso) la lista en `ruta`, en $DICEWARE_WORDLIST o la
+    lista por defecto junto al módulo.
+    """
+    ruta = ruta or os.environ.get(DEFAULT_WORDLIST_ENV) or DEFAULT_WORDLIST_PATH
+    lista = _LISTAS_ABIERTAS.get(ruta)
+    if lista is None:
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(
+                f"No existe el índice Diceware '{ruta}'. Constrúyalo con: "
+                f"python3 generador_passphrase.py build <lista.txt> {ruta}"
+            )
+        lista = ListaPalabras(ruta)
+        _LISTAS_ABIERTAS[ruta] = lista
+    return lista
+
+
+# --- INTERFAZ DE USUARIO ---
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Passphrases Diceware (lista memory-mapped)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    build = sub.add_parser("build", help="Construir índice a partir de una lista de texto")
+    build.add_argument("origen")
+    build.add_argument("destino", nargs="?", default=DEFAULT_WORDLIST_PATH)
+
+    gen = sub.add_parser("gen", help="Generar passphrases")
+    gen.add_argument("--wordlist", default=None)
+    gen.add_argument("--words", type=int, default=6)
+    gen.add_argument("--separator", default="-")
+    gen.add_argument("--capitalization", choices=CAPITALIZATIONS, default="lower")
+    gen.add_argument("-n", "--count", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    if args.comando == "build":
+        total = construir_indice(args.origen, args.destino)
+        print(f"✅ {total} palabras indexadas en {args.destino}")
+        return
+
+    generador = GeneradorPassphrase(abrir_lista(args.wordlist), args.words,
+                                    args.separator, args.capitalization)
+    for frase in generador.generar_lote(args.count):
+        print(frase)
+    print(f"# Entropía: {generador.calcular_entropia_bits():.2f} bits por passphrase")
+
+
+if __name__ == "__main__":
+    main()
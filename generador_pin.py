@@ -2,20 +2,29 @@
 Generador de PIN Criptográficamente Seguro y Blindado.
 
 Combina:
-1. CSPRNG (secrets)
+1. CSPRNG (secrets, o cualquier RandomSource inyectado; ver random_source.py)
 2. Reglas Matemáticas (No consecutivos)
 3. Reglas Topológicas (No adyacentes físicos en teclado)
 4. Reglas Semánticas (Blacklist de años y patrones)
 5. Validación de tiempo constante (Anti-Timing Attacks).
+
+Las reglas se precalculan una vez por proceso en tablas inmutables
+(blacklist frozenset, adyacencias y transiciones como bitmasks) que
+comparten todas las instancias.
 """
 
-import secrets
 import string
 import logging
 import math
 import sys
 import hmac
-from typing import List, Set, Optional, Dict
+import threading
+from collections.abc import Set as AbstractSet
+from types import MappingProxyType
+from itertools import islice
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from random_source import RandomSource, resolve
 
 # Configuración de Logging
 logging.basicConfig(
@@ -25,73 +34,185 @@ logging.basicConfig(
 logger = logging.getLogger("GeneradorBlindado")
 
 
+# --- Tablas de reglas compartidas ---
+# Se construyen una sola vez por proceso (al primer uso) y son inmutables,
+# así que todas las instancias las comparten sin copias ni locks al leer.
+
+# Define vecinos físicos (vertical/horizontal) en teclado numérico.
+# 1 2 3
+# 4 5 6
+# 7 8 9
+#   0
+_VECINOS_TECLADO = {
+    '0': '8',
+    '1': '24',
+    '2': '135',
+    '3': '26',
+    '4': '157',
+    '5': '2468',  # El 5 es crítico
+    '6': '359',
+    '7': '48',
+    '8': '5790',
+    '9': '68',
+}
+
+
+class _TablasReglas(NamedTuple):
+    blacklist: FrozenSet[str]
+    adyacencia: Tuple[int, ...]               # bitmask de vecinos físicos por dígito
+    transiciones: Tuple[int, ...]             # bitmask de siguientes válidos por dígito previo
+    candidatos: Tuple[Tuple[str, ...], ...]   # siguientes válidos por dígito previo (orden 0-9)
+    adyacencias_fisicas: Mapping[str, Tuple[str, ...]]
+    byte_a_siguiente: Mapping[str, Tuple[str, ...]]   # dígito previo -> byte aleatorio -> siguiente ('' = rechazo)
+
+
+_tablas: Optional[_TablasReglas] = None
+_tablas_lock = threading.Lock()
+
+
+def _construir_tablas() -> _TablasReglas:
+    # --- CAPA 1: Semántica (Blacklist) ---
+    blacklist = {
+        "1010", "1212", "6969", "1313",
+        "1379", "2580",  # Patrones cruzados muy obvios
+        "0000", "1111", "2222", "3333", "4444",
+        "5555", "6666", "7777", "8888", "9999"
+    }
+    # Agregar años comunes (1950-2030)
+    blacklist.update(str(year) for year in range(1950, 2031))
+
+    # --- CAPA 2: Topológica (Mapa del Teclado) ---
+    adyacencia = tuple(
+        sum(1 << int(v) for v in _VECINOS_TECLADO[str(d)]) for d in range(10)
+    )
+
+    transiciones = []
+    for previo in range(10):
+        mascara = 0
+        for actual in range(10):
+            if (actual != previo                          # 1. No repetir
+                    and abs(actual - previo) != 1         # 2. No consecutivos lineales
+                    and {actual, previo} != {0, 9}        # 3. No salto circular 0-9
+                    and not adyacencia[previo] >> actual & 1):  # 4. No vecinos físicos
+                mascara |= 1 << actual
+        transiciones.append(mascara)
+
+    candidatos = tuple(
+        tuple(d for d in string.digits if transiciones[previo] >> int(d) & 1)
+        for previo in range(10)
+    )
+
+    return _TablasReglas(
+        blacklist=frozenset(blacklist),
+        adyacencia=adyacencia,
+        transiciones=tuple(transiciones),
+        candidatos=candidatos,
+        adyacencias_fisicas=MappingProxyType({d: tuple(v) for d, v in _VECINOS_TECLADO.items()}),
+        byte_a_siguiente=MappingProxyType({
+            str(previo): _tabla_bytes(candidatos[previo]) for previo in range(10)
+        }),
+    )
+
+
+def _tabla_bytes(opciones: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Byte aleatorio -> opción uniforme. Los bytes >= 256 - 256 % n se mapean
+    a '' (rechazo), así que cada opción conserva exactamente la misma probabilidad.
+    """
+    limite = 256 - 256 % len(opciones)
+    return tuple(opciones[b % len(opciones)] if b < limite else '' for b in range(256))
+
+
+# Bytes aleatorios por llamada a token_bytes en los iteradores
+TAMANO_BLOQUE_ALEATORIO = 4096
+# bytes.translate: byte -> dígito uniforme (los bytes 250-255 se descartan)
+_TRADUCCION_DIGITOS = (bytes(string.digits.encode()[b % 10] for b in range(256)), bytes(range(250, 256)))
+
+
+def _flujo_bytes(rng: RandomSource, tamano_bloque: int = TAMANO_BLOQUE_ALEATORIO) -> Iterator[int]:
+    """Bytes aleatorios uno a uno, rellenando el búfer por bloques de rng.token_bytes."""
+    while True:
+        yield from rng.token_bytes(tamano_bloque)
+
+
+def _obtener_tablas() -> _TablasReglas:
+    """Tablas compartidas, construidas la primera vez que se necesitan."""
+    global _tablas
+    tablas = _tablas
+    if tablas is None:
+        with _tablas_lock:
+            if _tablas is None:
+                _tablas = _construir_tablas()
+            tablas = _tablas
+    return tablas
+
+
+class _BlacklistCompuesta(AbstractSet):
+    """Vista de solo lectura: blacklist compartida + extras de la instancia."""
+
+    __slots__ = ("_base", "_extra")
+
+    def __init__(self, base: FrozenSet[str], extra: FrozenSet[str]):
+        self._base = base
+        self._extra = extra
+
+    def __contains__(self, pin) -> bool:
+        return pin in self._base or pin in self._extra
+
+    def __iter__(self):
+        yield from self._base
+        yield from (p for p in self._extra if p not in self._base)
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._extra - self._base)
+
+
 class GeneradorPinBlindado:
     """
     Generador de PINs de alta seguridad.
     Integra validaciones matemáticas, espaciales y de listas negras.
+
+    Las reglas (blacklist, adyacencias, transiciones válidas) viven en tablas
+    inmutables compartidas por todas las instancias; cada instancia solo
+    guarda su blacklist_extra y su fuente de aleatoriedad, así que
+    construirla es O(1).
     """
 
-    def __init__(self, blacklist_extra: Optional[List[str]] = None):
-        """
-        Inicializa reglas semánticas (blacklist) y físicas (mapa de teclado).
-        """
-        # --- CAPA 1: Semántica (Blacklist) ---
-        self.blacklist: Set[str] = {
-            "1010", "1212", "6969", "1313",
-            "1379", "2580",  # Patrones cruzados muy obvios
-            "0000", "1111", "2222", "3333", "4444",
-            "5555", "6666", "7777", "8888", "9999"
-        }
-        # Agregar años comunes (1950-2030)
-        for year in range(1950, 2031):
-            self.blacklist.add(str(year))
-
-        if blacklist_extra:
-            self.blacklist.update(blacklist_extra)
-
-        # --- CAPA 2: Topológica (Mapa del Teclado) ---
-        # Define vecinos físicos (vertical/horizontal) en teclado numérico.
-        # 1 2 3
-        # 4 5 6
-        # 7 8 9
-        #   0
-        self.adyacencias_fisicas: Dict[str, List[str]] = {
-            '0': ['8'],
-            '1': ['2', '4'],
-            '2': ['1', '3', '5'],
-            '3': ['2', '6'],
-            '4': ['1', '5', '7'],
-            '5': ['2', '4', '6', '8'],  # El 5 es crítico
-            '6': ['3', '5', '9'],
-            '7': ['4', '8'],
-            '8': ['5', '7', '9', '0'],
-            '9': ['6', '8']
-        }
+    __slots__ = ("_extra", "_rng")
 
-    def _es_transicion_valida(self, actual: str, previo: str) -> bool:
+    def __init__(self, blacklist_extra: Optional[Iterable[str]] = None,
+                 rng: Optional[RandomSource] = None):
         """
-        Valida reglas matemáticas Y físicas entre dos dígitos.
+        Args:
+            blacklist_extra: PINs prohibidos adicionales, solo para esta instancia
+            rng: Fuente de aleatoriedad (None = CSPRNG del sistema)
         """
-        i_actual = int(actual)
-        i_previo = int(previo)
+        self._extra: FrozenSet[str] = frozenset(blacklist_extra) if blacklist_extra else frozenset()
+        self._rng = resolve(rng)
 
-        # 1. Regla: No repetir
-        if actual == previo:
-            return False
+    @property
+    def blacklist(self) -> AbstractSet:
+        """Blacklist efectiva (compartida + extras), de solo lectura."""
+        base = _obtener_tablas().blacklist
+        return _BlacklistCompuesta(base, self._extra) if self._extra else base
 
-        # 2. Regla Matemática: No consecutivos lineales (1-2, 2-1)
-        if abs(i_actual - i_previo) == 1:
-            return False
+    @property
+    def adyacencias_fisicas(self) -> Mapping[str, Tuple[str, ...]]:
+        """Vecinos físicos por dígito en el teclado numérico (solo lectura)."""
+        return _obtener_tablas().adyacencias_fisicas
 
-        # 3. Regla Matemática: No salto circular estricto (0-9)
-        if {i_actual, i_previo} == {0, 9}:
-            return False
-
-        # 4. Regla Topológica: No vecinos físicos
-        if actual in self.adyacencias_fisicas[previo]:
-            return False
+    def agregar_blacklist(self, *pins: str) -> None:
+        """
+        Añade PINs prohibidos a esta instancia (copy-on-write: las tablas
+        compartidas y las demás instancias no se modifican).
+        """
+        self._extra = self._extra.union(pins)
 
-        return True
+    def _es_transicion_valida(self, actual: str, previo: str) -> bool:
+        """
+        Valida reglas matemáticas Y físicas entre dos dígitos.
+        """
+        return bool(_obtener_tablas().transiciones[int(previo)] >> int(actual) & 1)
 
     def _calcular_entropia_bits(self, longitud: int, strict_security: bool = True) -> float:
         """
@@ -128,62 +249,120 @@ class GeneradorPinBlindado:
         Returns:
             PIN generado
         """
-        if not (4 <= longitud <= 32):
-            raise ValueError("Longitud debe ser entre 4 y 32.")
+        self._validar_longitud(longitud)
         
         if longitud < 6:
             logger.warning("Generando PIN de longitud %s. Se recomienda mínimo 6.", longitud)
 
         # Si NO requiere seguridad estricta, generar sin restricciones
         if not strict_security:
-            pin_final = "".join(secrets.choice(string.digits) for _ in range(longitud))
+            choice = self._rng.choice
+            pin_final = "".join(choice(string.digits) for _ in range(longitud))
             entropia = self._calcular_entropia_bits(longitud, strict_security=False)
-            logger.info("PIN generado (sin seguridad). Longitud: %d. Entropía Real: %s bits.", longitud, entropia)
+            logger.debug("PIN generado (sin seguridad). Longitud: %d. Entropía Real: %s bits.", longitud, entropia)
             return pin_final
 
         # Si SÍ requiere seguridad estricta, aplicar todas las capas
         max_intentos = 10000
+        tablas = _obtener_tablas()
+        candidatos_por_digito = tablas.candidatos
+        blacklist, extra = tablas.blacklist, self._extra
+        choice = self._rng.choice
 
         for _ in range(max_intentos):
             pin_lista: List[str] = []
             
             # 1. Primer dígito
-            primer_digito = secrets.choice(string.digits)
+            primer_digito = choice(string.digits)
             pin_lista.append(primer_digito)
 
-            # 2. Construcción paso a paso
-            valido_constructivamente = True
+            # 2. Construcción paso a paso (candidatos precalculados por dígito previo)
             for _ in range(longitud - 1):
-                ultimo_char = pin_lista[-1]
-
-                candidatos = [
-                    d for d in string.digits
-                    if self._es_transicion_valida(d, ultimo_char)
-                ]
-
-                if not candidatos:
-                    valido_constructivamente = False
-                    break
-
-                siguiente = secrets.choice(candidatos)
+                siguiente = choice(candidatos_por_digito[int(pin_lista[-1])])
                 pin_lista.append(siguiente)
 
-            if not valido_constructivamente:
-                continue
-
             pin_final = "".join(pin_lista)
 
             # 3. Capa Semántica (Blacklist)
-            if pin_final in self.blacklist:
+            if pin_final in blacklist or pin_final in extra:
                 continue
 
             # Éxito
             entropia = self._calcular_entropia_bits(longitud, strict_security=True)
-            logger.info("PIN generado (CON seguridad). Longitud: %d. Entropía Real: %s bits.", longitud, entropia)
+            logger.debug("PIN generado (CON seguridad). Longitud: %d. Entropía Real: %s bits.", longitud, entropia)
             return pin_final
 
         raise RuntimeError("No se pudo generar PIN válido (demasiadas restricciones).")
 
+    @staticmethod
+    def _validar_longitud(longitud: int) -> None:
+        if not (4 <= longitud <= 32):
+            raise ValueError("Longitud debe ser entre 4 y 32.")
+
+    def iter_pins(self, longitud: int, strict_security: bool = True) -> Iterator[str]:
+        """
+        Iterador infinito de PINs (usar itertools.islice para tomar N).
+        
+        Misma distribución que generar(): primer dígito uniforme, cada
+        siguiente uniforme entre las transiciones válidas y reintento si el
+        PIN está en la blacklist. La aleatoriedad se toma por bloques de
+        la fuente (os.urandom por defecto) y se mapea con tablas byte -> dígito
+        precalculadas, sin una llamada a secrets ni un log por PIN.
+        
+        Raises:
+            ValueError: Si la longitud es inválida
+        """
+        self._validar_longitud(longitud)
+        if not strict_security:
+            return self._flujo_pins_libres(longitud, self._rng)
+        return self._flujo_pins_estrictos(longitud)
+
+    @staticmethod
+    def _flujo_pins_libres(longitud: int, rng: RandomSource) -> Iterator[str]:
+        tabla, borrar = _TRADUCCION_DIGITOS
+        tamano_bloque = max(TAMANO_BLOQUE_ALEATORIO, 4 * longitud)
+        buffer = ''
+        pos = 0
+        while True:
+            if len(buffer) - pos < longitud:
+                buffer = buffer[pos:] + rng.token_bytes(tamano_bloque).translate(tabla, borrar).decode('ascii')
+                pos = 0
+                continue
+            yield buffer[pos:pos + longitud]
+            pos += longitud
+
+    def _flujo_pins_estrictos(self, longitud: int) -> Iterator[str]:
+        tablas = _obtener_tablas()
+        primero = _tabla_bytes(tuple(string.digits))
+        siguiente: Dict[str, Tuple[str, ...]] = dict(tablas.byte_a_siguiente)
+        blacklist = tablas.blacklist
+        aleatorio = _flujo_bytes(self._rng)
+
+        while True:
+            digito = primero[next(aleatorio)]
+            if not digito:
+                continue
+            pin_lista = [digito]
+            while len(pin_lista) < longitud:
+                candidato = siguiente[digito][next(aleatorio)]
+                if candidato:
+                    digito = candidato
+                    pin_lista.append(digito)
+            pin_final = "".join(pin_lista)
+            if pin_final in blacklist or pin_final in self._extra:
+                continue
+            yield pin_final
+
+    def iter_pins_lotes(self, longitud: int, tamano_lote: int,
+                        strict_security: bool = True) -> Iterator[List[str]]:
+        """
+        Iterador infinito de listas de `tamano_lote` PINs (ver iter_pins).
+        """
+        if tamano_lote < 1:
+            raise ValueError("tamano_lote debe ser >= 1.")
+        pins = self.iter_pins(longitud, strict_security)
+        return iter(lambda: list(islice(pins, tamano_lote)), None)
+
     def validar_pin_seguro(self, pin_ingresado: str, pin_real: str) -> bool:
         """
         Compara dos PINs usando tiempo constante (HMAC) para evitar Timing Attacks.
@@ -0,0 +1,282 @@
+"""
+Generador de Tokens y Material de Clave (API keys, tokens de sesión, claves simétricas).
+
+Combina:
+1. CSPRNG del sistema operativo (os.urandom) - una sola llamada por lote
+   (o el RandomSource inyectado; ver random_source.py)
+2. Codificación en bloque con binascii/base64 (sin trabajo por carácter)
+3. Codificaciones: hex, base32, base64url, Crockford base32
+4. Prefijos (ej. "sk_live_") y dígitos de verificación (CRC32 / mod-37 Crockford)
+5. Entropía exacta: 8 bits por byte aleatorio (la codificación es biyectiva)
+"""
+
+import base64
+import binascii
+import logging
+from typing import List, Optional
+
+from random_source import RandomSource, resolve
+
+logger = logging.getLogger("GeneradorToken")
+
+
+# Codificaciones soportadas
+TOKEN_ENCODINGS = ("hex", "base32", "base64url", "crockford")
+
+# Rango de material de clave aleatorio (bytes)
+TOKEN_MIN_BYTES = 16   # 128 bits
+TOKEN_MAX_BYTES = 64   # 512 bits
+
+# Tokens por llamada a os.urandom en modo masivo (acota la memoria del lote)
+TOKEN_BATCH_CHUNK = 65536
+
+# Alfabetos base32: RFC 4648 -> Crockford (sin I, L, O, U)
+_RFC4648_B32 = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+_CROCKFORD_B32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_CROCKFORD_CHECK = _CROCKFORD_B32 + "*~$=U"
+_A_CROCKFORD = str.maketrans(_RFC4648_B32, _CROCKFORD_B32)
+_DESDE_CROCKFORD = str.maketrans(_CROCKFORD_B32, _RFC4648_B32)
+_INDICE_A_B32 = bytes.maketrans(bytes(range(32)), _RFC4648_B32.encode("ascii"))
+
+# Longitud (caracteres) del sufijo de verificación por codificación
+_LONGITUD_CHECKSUM = {"hex": 8, "base32": 7, "base64url": 6, "crockford": 1}
+
+
+def _b32encode_bloque(datos) -> bytes:
+    """
+    Base32 (RFC 4648) de un buffer cuya longitud es múltiplo de 5.
+
+    base64.b32encode recorre los grupos de 5 bytes en Python; aquí cada grupo
+    se expande a 8 bytes con asignación por rebanadas y los 8 símbolos de
+    5 bits se extraen con desplazamientos y máscaras sobre un único entero
+    grande, de modo que el coste no depende del número de grupos en Python.
+    """
+    grupos = len(datos) // 5
+    expandido = bytearray(grupos * 8)
+    for i in range(5):
+        expandido[3 + i::8] = datos[i::5]
+
+    valor = int.from_bytes(expandido, "big")
+    mascara = int.from_bytes(b"\x00\x00\x00\x00\x00\x00\x00\x1f" * grupos, "big")
+    simbolos = 0
+    for j in range(8):
+        desplazamiento = 7 - j
+        simbolos |= ((valor >> (5 * desplazamiento)) & mascara) << (8 * desplazamiento)
+    return simbolos.to_bytes(grupos * 8, "big").translate(_INDICE_A_B32)
+
+
+class GeneradorToken:
+    """
+    Generador de tokens aleatorios codificados.
+    Todo el material de clave de un lote sale de una única llamada a os.urandom.
+    """
+
+    def __init__(self, encoding: str = "base64url", num_bytes: int = 32,
+                 prefix: str = "", checksum: bool = False,
+                 rng: Optional[RandomSource] = None):
+        """
+        Configura codificación, tamaño de la clave, prefijo y verificación.
+
+        Args:
+            encoding: Una de TOKEN_ENCODINGS
+            num_bytes: Bytes aleatorios por token (16-64)
+            prefix: Prefijo literal (no aporta entropía)
+            checksum: Si True, añade sufijo de verificación
+            rng: Fuente de aleatoriedad (None = CSPRNG del sistema)
+        """
+        if encoding not in TOKEN_ENCODINGS:
+            raise ValueError(f"Codificación debe ser una de {TOKEN_ENCODINGS}, recibido: {encoding}")
+        if not isinstance(num_bytes, int) or not (TOKEN_MIN_BYTES <= num_bytes <= TOKEN_MAX_BYTES):
+            raise ValueError(f"num_bytes debe ser entre {TOKEN_MIN_BYTES} y {TOKEN_MAX_BYTES}.")
+        if not isinstance(prefix, str):
+            raise ValueError(f"prefix debe ser str, recibido: {type(prefix)}")
+
+        self.encoding = encoding
+        self.num_bytes = num_bytes
+        self.prefix = prefix
+        self.checksum = checksum
+        self._rng = resolve(rng)
+
+        # Ancho (caracteres) de cada token en la codificación sin relleno
+        self._ancho = len(self._codificar_uno(bytes(num_bytes)))
+        # ¿Se puede codificar el lote completo y cortar por posiciones fijas?
+        if encoding == "hex":
+            self._alineado = True
+        elif encoding == "base64url":
+            self._alineado = num_bytes % 3 == 0
+        else:
+            self._alineado = num_bytes % 5 == 0
+
+    # --- Codificación ---
+
+    def _codificar_uno(self, material: bytes) -> str:
+        """Codifica el material de un solo token (sin relleno '=')."""
+        if self.encoding == "hex":
+            return binascii.hexlify(material).decode("ascii")
+        if self.encoding == "base64url":
+            return base64.urlsafe_b64encode(material).rstrip(b"=").decode("ascii")
+        texto = base64.b32encode(material).rstrip(b"=").decode("ascii")
+        if self.encoding == "crockford":
+            return texto.translate(_A_CROCKFORD)
+        return texto
+
+    def _codificar_lote(self, material: bytes, cantidad: int) -> List[str]:
+        """
+        Codifica el material de todo el lote con una sola llamada al codificador.
+
+        Si num_bytes no es múltiplo del grupo de la codificación (3 en base64,
+        5 en base32), cada token se rellena con ceros hasta el grupo mediante
+        asignación por rebanadas; el prefijo de la codificación rellena coincide
+        con la codificación sin relleno, así que basta cortar a ancho fijo.
+        """
+        n = self.num_bytes
+        if self.encoding == "hex":
+            texto = binascii.hexlify(material).decode("ascii")
+            paso = 2 * n
+        else:
+            grupo = 3 if self.encoding == "base64url" else 5
+            if not self._alineado:
+                n_relleno = -(-n // grupo) * grupo
+                relleno = bytearray(cantidad * n_relleno)
+                for i in range(n):
+                    relleno[i::n_relleno] = material[i::n]
+                material, n = relleno, n_relleno
+            if self.encoding == "base64url":
+                texto = base64.urlsafe_b64encode(material).decode("ascii")
+                paso = n // 3 * 4
+            else:
+                texto = _b32encode_bloque(material).decode("ascii")
+                paso = n // 5 * 8
+                if self.encoding == "crockford":
+                    texto = texto.translate(_A_CROCKFORD)
+
+        ancho = self._ancho
+        return [texto[i:i + ancho] for i in range(0, cantidad * paso, paso)]
+
+    def _sufijo_checksum(self, material: bytes) -> str:
+        """
+        Calcula el sufijo de verificación del material de un token.
+        - crockford: símbolo mod-37 de Crockford sobre el entero del material
+        - resto: CRC32 (4 bytes) en la misma codificación
+        """
+        if self.encoding == "crockford":
+            return _CROCKFORD_CHECK[int.from_bytes(material, "big") % 37]
+        crc = binascii.crc32(material).to_bytes(4, "big")
+        if self.encoding == "hex":
+            return binascii.hexlify(crc).decode("ascii")
+        if self.encoding == "base64url":
+            return base64.urlsafe_b64encode(crc).rstrip(b"=").decode("ascii")
+        return base64.b32encode(crc).rstrip(b"=").decode("ascii")
+
+    def _decodificar_cuerpo(self, cuerpo: str) -> bytes:
+        """Inversa de _codificar_uno (lanza ValueError si no es decodificable)."""
+        try:
+            if self.encoding == "hex":
+                return binascii.unhexlify(cuerpo)
+            relleno = "=" * (-len(cuerpo) % (4 if self.encoding == "base64url" else 8))
+            if self.encoding == "base64url":
+                return base64.urlsafe_b64decode(cuerpo + relleno)
+            if self.encoding == "crockford":
+                cuerpo = cuerpo.upper().translate(_DESDE_CROCKFORD)
+            return base64.b32decode(cuerpo + relleno)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Token no decodificable: {e}")
+
+    # --- API pública ---
+
+    def calcular_entropia_bits(self) -> float:
+        """
+        Entropía exacta del token: 8 bits por byte aleatorio.
+        Prefijo y checksum son deterministas y no suman entropía.
+        """
+        return float(8 * self.num_bytes)
+
+    def longitud_token(self) -> int:
+        """Longitud total del token (prefijo + cuerpo + checksum)."""
+        extra = _LONGITUD_CHECKSUM[self.encoding] if self.checksum else 0
+        return len(self.prefix) + self._ancho + extra
+
+    def generar(self) -> str:
+        """Genera un único token."""
+        return self.generar_lote(1)[0]
+
+    def generar_lote(self, cantidad: int) -> List[str]:
+        """
+        Modo masivo: genera `cantidad` tokens.
+
+        Todo el material de clave de cada bloque (hasta TOKEN_BATCH_CHUNK tokens)
+        proviene de una sola llamada a os.urandom y se codifica en bloque.
+
+        Returns:
+            Lista de tokens
+        """
+        if not isinstance(cantidad, int) or cantidad < 1:
+            raise ValueError(f"cantidad debe ser int >= 1, recibido: {cantidad}")
+
+        tokens: List[str] = []
+        n = self.num_bytes
+        restantes = cantidad
+        while restantes:
+            bloque = min(restantes, TOKEN_BATCH_CHUNK)
+            material = self._rng.token_bytes(bloque * n)
+            cuerpos = self._codificar_lote(material, bloque)
+
+            if self.checksum:
+                vista = memoryview(material)
+                sufijo = self._sufijo_checksum
+                prefijo = self.prefix
+                tokens.extend(
+                    prefijo + cuerpo + sufijo(vista[i * n:(i + 1) * n])
+                    for i, cuerpo in enumerate(cuerpos)
+                )
+            elif self.prefix:
+                prefijo = self.prefix
+                tokens.extend(prefijo + cuerpo for cuerpo in cuerpos)
+            else:
+                tokens.extend(cuerpos)
+            restantes -= bloque
+
+        logger.debug("Lote de %d tokens %s generado (%s bits c/u).",
+                     cantidad, self.encoding, self.calcular_entropia_bits())
+        return tokens
+
+    def verificar_checksum(self, token: str) -> bool:
+        """
+        Verifica prefijo, longitud y sufijo de verificación de un token.
+        Sin checksum configurado solo comprueba prefijo y longitud.
+        """
+        if not token.startswith(self.prefix) or len(token) != self.longitud_token():
+            return False
+        if not self.checksum:
+            return True
+
+        k = _LONGITUD_CHECKSUM[self.encoding]
+        cuerpo, sufijo = token[len(self.prefix):-k], token[-k:]
+        try:
+            material = self._decodificar_cuerpo(cuerpo)
+        except ValueError:
+            return False
+        return self._sufijo_checksum(material) == sufijo
+
+
+# --- INTERFAZ DE USUARIO ---
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generador de tokens / material de clave")
+    parser.add_argument("--encoding", choices=TOKEN_ENCODINGS, default="base64url")
+    parser.add_argument("--bytes", type=int, default=32, dest="num_bytes")
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--checksum", action="store_true")
+    parser.add_argument("-n", "--count", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    generador = GeneradorToken(args.encoding, args.num_bytes, args.prefix, args.checksum)
+    for token in generador.generar_lote(args.count):
+        print(token)
+    print(f"# Entropía: {generador.calcular_entropia_bits():.0f} bits por token")
+
+
+if __name__ == "__main__":
+    main()
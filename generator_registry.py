@@ -0,0 +1,218 @@
+"""
+generator_registry.py - Registro de generadores con coste para DecisionMatrix
+
+Cada generador se declara con un GeneratorSpec:
+• supports(options) -> bool      ¿Puede cumplir todas las restricciones?
+• entropy(options) -> float      Entropía exacta del resultado (None = no disponible)
+• cost: CostProfile               µs por elemento y eficiencia en modo lote
+• reason(options) -> str         Explicación legible de la decisión
+• generate(options)               Solo para generadores externos al router
+
+SELECCIÓN:
+==========
+    candidatos = specs que soportan la petición
+                 y alcanzan options['min_entropy'] (si se indica)
+    elegido    = el de menor coste estimado para `count` elementos
+
+Con los generadores integrados cada forma de petición "clásica" tiene un
+único candidato, así que las decisiones por defecto no cambian; el coste
+solo decide cuando hay varios (p. ej. una petición que solo indica
+min_entropy, o generadores añadidos con register()).
+
+COSTES:
+=======
+Los perfiles por defecto son estimaciones; se ajustan midiendo en el
+arranque (SecurePasswordRouter.calibrate) o cargando la salida JSON de
+bench_router_threads.py (load_costs).
+
+CACHÉ:
+======
+La decisión se cachea por forma de petición: las opciones que la afectan
+(todas salvo identificadores de cliente/tenant), si es un lote y las
+entropías sustituidas (las de la política del tenant). La caché se vacía
+al registrar generadores o cambiar costes.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("GeneratorRegistry")
+
+# Opciones que no cambian la decisión (no entran en la clave de caché)
+DECISION_INDEPENDENT_KEYS = frozenset({'client_id', 'tenant_id'})
+DECISION_CACHE_SIZE = 4096
+
+
+class CostProfile(NamedTuple):
+    """Coste medido de un generador."""
+    us_per_item: float
+    batch_efficiency: float = 1.0   # coste por elemento en lote / coste individual
+
+    def estimate(self, count: int = 1) -> float:
+        """Microsegundos estimados para generar `count` elementos."""
+        if count <= 1:
+            return self.us_per_item
+        return self.us_per_item * count * self.batch_efficiency
+
+
+class GeneratorSpec(NamedTuple):
+    """Declaración de un generador para el registro."""
+    name: str
+    supports: Callable[[Dict[str, Any]], bool]
+    entropy: Callable[[Dict[str, Any]], Optional[float]]
+    cost: CostProfile
+    reason: Callable[[Dict[str, Any]], str]
+    sample_options: Optional[Dict[str, Any]] = None
+    generate: Optional[Callable[[Dict[str, Any]], Tuple[str, float]]] = None
+
+
+class Decision(NamedTuple):
+    """Resultado (cacheable) de GeneratorRegistry.select."""
+    name: str
+    entropy: float
+    reason: str
+
+
+class GeneratorRegistry:
+    """
+    Generadores registrados, en orden de registro (desempata a igual coste).
+    """
+
+    def __init__(self, specs: Optional[List[GeneratorSpec]] = None,
+                 aliases: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            specs: Generadores iniciales
+            aliases: Nombre de escenario del benchmark -> nombre de generador
+        """
+        self.aliases = dict(aliases or {})
+        self._specs: Dict[str, GeneratorSpec] = {}
+        self._cache: Dict[Tuple, Decision] = {}
+        self._lock = threading.Lock()
+        for spec in specs or []:
+            self.register(spec)
+
+    def register(self, spec: GeneratorSpec) -> None:
+        """Registra (o sustituye) un generador."""
+        with self._lock:
+            specs = dict(self._specs)
+            specs[spec.name] = spec
+            self._specs = specs
+            self._cache = {}
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            specs = dict(self._specs)
+            del specs[name]
+            self._specs = specs
+            self._cache = {}
+
+    def get(self, name: str) -> GeneratorSpec:
+        return self._specs[name]
+
+    def specs(self) -> List[GeneratorSpec]:
+        return list(self._specs.values())
+
+    def set_cost(self, name: str, cost: CostProfile) -> None:
+        """Actualiza el perfil de coste de un generador."""
+        self.register(self._specs[name]._replace(cost=cost))
+
+    def load_costs(self, path: str) -> Dict[str, CostProfile]:
+        """
+        Carga costes desde el JSON de bench_router_threads.py.
+
+        Usa la fila de 1 hilo de cada escenario y, si existe, la medida de
+        lote del mismo escenario. Los escenarios se asocian por nombre
+        (sin distinguir mayúsculas) o por alias con los generadores registrados.
+
+        Returns:
+            Los perfiles aplicados, por nombre de generador
+        """
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+
+        by_name = {name.lower(): name for name in self._specs}
+        by_name.update((alias.lower(), name) for alias, name in self.aliases.items() if name in self._specs)
+        applied = {}
+        for scenario, rows in report.get('results', {}).items():
+            name = by_name.get(scenario.lower())
+            single = next((row for row in rows if row.get('threads') == 1), None)
+            if name is None or single is None:
+                continue
+            efficiency = 1.0
+            batch = report.get('batch', {}).get(scenario)
+            if batch:
+                efficiency = min(1.0, batch['us_per_item'] / single['us_per_item'])
+            applied[name] = CostProfile(single['us_per_item'], efficiency)
+
+        for name, cost in applied.items():
+            self.set_cost(name, cost)
+        logger.info(f"Costes cargados desde {path}: {sorted(applied)}")
+        return applied
+
+    def select(self, options: Dict[str, Any], count: int = 1,
+               entropies: Optional[Dict[str, Optional[float]]] = None) -> Decision:
+        """
+        Elige el generador más barato que soporta la petición y alcanza
+        options['min_entropy'].
+
+        Args:
+            entropies: Entropía por nombre de generador que sustituye a
+                spec.entropy(options), p. ej. la precompilada de un tenant
+                (None = no disponible)
+
+        Raises:
+            ValueError: Si ningún generador cumple las restricciones
+        """
+        try:
+            key = (tuple(sorted((k, v) for k, v in options.items()
+                                if k not in DECISION_INDEPENDENT_KEYS)), count > 1,
+                   tuple(sorted(entropies.items())) if entropies else None)
+            hash(key)
+        except TypeError:
+            key = None
+
+        cache = self._cache
+        if key is not None:
+            decision = cache.get(key)
+            if decision is not None:
+                return decision
+
+        decision = self._select(options, count, entropies)
+        if key is not None:
+            if len(cache) >= DECISION_CACHE_SIZE:
+                cache.clear()
+            cache[key] = decision
+        return decision
+
+    def _select(self, options: Dict[str, Any], count: int,
+                entropies: Optional[Dict[str, Optional[float]]]) -> Decision:
+        min_entropy = options.get('min_entropy')
+        candidates = []
+        best_entropy = None
+        for spec in self._specs.values():
+            if not spec.supports(options):
+                continue
+            if entropies and spec.name in entropies:
+                entropy = entropies[spec.name]
+            else:
+                entropy = spec.entropy(options)
+            if entropy is None:
+                continue
+            best_entropy = entropy if best_entropy is None else max(best_entropy, entropy)
+            if min_entropy is None or entropy >= min_entropy:
+                candidates.append((spec.cost.estimate(count), spec, entropy))
+
+        if not candidates:
+            if best_entropy is None:
+                raise ValueError("Ningún generador soporta las opciones solicitadas")
+            raise ValueError(f"Ningún generador alcanza min_entropy={min_entropy} bits "
+                             f"(máximo disponible: {best_entropy:.2f})")
+
+        cost, spec, entropy = min(candidates, key=lambda c: c[0])
+        reason = spec.reason(options)
+        if len(candidates) > 1 or min_entropy is not None:
+            reason += f" [{entropy:.2f} bits, ~{cost:.1f} µs, {len(candidates)} candidato(s)]"
+        return Decision(spec.name, entropy, reason)
@@ -0,0 +1,238 @@
+"""
+Replay protection for TOTP codes verified with OTPGenerate.
+
+A TOTP code stays valid for every request within ±window time steps, so
+without bookkeeping the same code can be replayed during the whole window.
+ReplayCache remembers which (user, time step) pairs were already accepted:
+
+- TTL buckets: each stripe keeps one set of users per time step; buckets older
+  than the active window are dropped, so memory is bounded by the users that
+  logged in during the last 2 * window + 1 steps.
+- Lock striping: users are spread over N independently locked stripes, so
+  concurrent verifications only contend when they hash to the same stripe.
+- Snapshot: save_snapshot() writes the live entries to a file that is read
+  back through mmap on restart, so a restart does not reopen the window.
+
+The cache counts time steps like the OTPKeys it verifies: verify() rejects a
+key whose period or t0 differ, since purge() and eviction would otherwise run
+on a different time base.
+"""
+import os
+import mmap
+import time
+import struct
+import threading
+from typing import Dict, Optional, Set
+
+from OTPGenerate import DEFAULT_PERIOD, OTPKey
+
+DEFAULT_WINDOW = 1
+DEFAULT_STRIPES = 64
+
+SNAPSHOT_MAGIC = b"OTPR"
+SNAPSHOT_VERSION = 2
+_HEADER = struct.Struct("<4sIqqI")    # magic, version, period, t0, entries
+_RECORD = struct.Struct("<qI")        # time step, user id length (followed by UTF-8 user id)
+
+
+class _Stripe:
+    """One lock plus the per-step buckets of the users hashed to it."""
+
+    __slots__ = ("lock", "buckets", "oldest")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets: Dict[int, Set[str]] = {}
+        self.oldest = None
+
+
+class ReplayCache:
+    """
+    Set of already-accepted (user, time step) pairs with window-bounded memory.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, period=DEFAULT_PERIOD,
+                 stripes=DEFAULT_STRIPES, snapshot_path=None, t0=0):
+        """
+        Args:
+            window (int): Steps accepted on each side of the current one (as in verify_totp)
+            period (int): TOTP time step in seconds
+            stripes (int): Number of lock stripes (rounded up to a power of two)
+            snapshot_path (str): Optional snapshot file, loaded now if it exists
+            t0 (int): Unix time of step 0 (as in OTPKey)
+        """
+        if window < 0:
+            raise ValueError("Window must be >= 0")
+        if period <= 0:
+            raise ValueError("Period must be positive")
+
+        size = 1
+        while size < max(1, stripes):
+            size <<= 1
+        self.window = window
+        self.period = period
+        self.t0 = t0
+        self.snapshot_path = snapshot_path
+        self._mask = size - 1
+        self._stripes = [_Stripe() for _ in range(size)]
+
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+
+    def current_step(self, for_time=None):
+        now = time.time() if for_time is None else for_time
+        return int((now - self.t0) // self.period)
+
+    def check_and_mark(self, user, step, now_step=None):
+        """
+        Record that `user` used the code of time step `step`.
+
+        Args:
+            user (str): User id
+
+        Returns:
+            bool: True the first time, False for a replay or a step that
+                  already left the active window
+        """
+        if not isinstance(user, str):
+            raise TypeError(f"User id must be str, got {type(user).__name__}")
+        if now_step is None:
+            now_step = self.current_step()
+        horizon = now_step - self.window
+        if step < horizon:
+            return False
+
+        stripe = self._stripes[hash(user) & self._mask]
+        with stripe.lock:
+            if stripe.oldest is not None and stripe.oldest < horizon:
+                self._evict(stripe, horizon)
+
+            bucket = stripe.buckets.get(step)
+            if bucket is None:
+                bucket = stripe.buckets[step] = set()
+                if stripe.oldest is None or step < stripe.oldest:
+                    stripe.oldest = step
+            elif user in bucket:
+                return False
+            bucket.add(user)
+            return True
+
+    @staticmethod
+    def _evict(stripe, horizon):
+        """Drop the buckets of steps older than `horizon` (caller holds the lock)."""
+        buckets = stripe.buckets
+        for step in [s for s in buckets if s < horizon]:
+            del buckets[step]
+        stripe.oldest = min(buckets) if buckets else None
+
+    def purge(self, now_step=None):
+        """
+        Evict expired buckets in every stripe. Stripes evict lazily when they
+        are touched, so this is only needed to reclaim memory of idle stripes.
+        """
+        if now_step is None:
+            now_step = self.current_step()
+        horizon = now_step - self.window
+        for stripe in self._stripes:
+            with stripe.lock:
+                if stripe.oldest is not None and stripe.oldest < horizon:
+                    self._evict(stripe, horizon)
+
+    def verify(self, key: OTPKey, user, code, for_time=None) -> Optional[int]:
+        """
+        verify_totp + replay check in one call.
+
+        Returns:
+            int | None: The accepted time step, or None if the code is wrong or replayed
+
+        Raises:
+            ValueError: If the key's period or t0 differ from the cache's
+        """
+        if key.period != self.period or key.t0 != self.t0:
+            raise ValueError(f"Key time base (period={key.period}, t0={key.t0}) does not match "
+                             f"cache (period={self.period}, t0={self.t0})")
+        step = key.verify_totp(code, for_time, self.window)
+        if step is None:
+            return None
+        if not self.check_and_mark(user, step, key.time_step(for_time)):
+            return None
+        return step
+
+    def __len__(self):
+        total = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                total += sum(len(bucket) for bucket in stripe.buckets.values())
+        return total
+
+    # --- Snapshot ---
+
+    def save_snapshot(self, path=None):
+        """
+        Write every live entry to `path` (atomically, through a temporary file).
+
+        Returns:
+            int: Number of entries written
+        """
+        path = path or self.snapshot_path
+        if not path:
+            raise ValueError("No snapshot path configured")
+
+        records = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                for step, users in stripe.buckets.items():
+                    for user in users:
+                        encoded = user.encode("utf-8")
+                        records.append(_RECORD.pack(step, len(encoded)) + encoded)
+
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.period, self.t0, len(records)))
+            f.writelines(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        return len(records)
+
+    def load_snapshot(self, path, now_step=None):
+        """
+        Restore entries from a snapshot through mmap, skipping expired steps.
+
+        Returns:
+            int: Number of entries restored
+        """
+        if now_step is None:
+            now_step = self.current_step()
+        horizon = now_step - self.window
+
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"Truncated replay snapshot: {path}")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, period, t0, entries = _HEADER.unpack_from(mm, 0)
+                if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                    raise ValueError(f"Invalid replay snapshot: {path}")
+                if period != self.period or t0 != self.t0:
+                    raise ValueError(f"Snapshot time base (period={period}s, t0={t0}) does not match "
+                                     f"cache (period={self.period}s, t0={self.t0})")
+
+                # Parse everything first: a truncated snapshot restores nothing
+                records = []
+                offset = _HEADER.size
+                for _ in range(entries):
+                    if offset + _RECORD.size > len(mm):
+                        raise ValueError(f"Truncated replay snapshot: {path}")
+                    step, length = _RECORD.unpack_from(mm, offset)
+                    offset += _RECORD.size
+                    if offset + length > len(mm):
+                        raise ValueError(f"Truncated replay snapshot: {path}")
+                    if step >= horizon:
+                        records.append((step, mm[offset:offset + length].decode("utf-8")))
+                    offset += length
+
+        restored = 0
+        for step, user in records:
+            if self.check_and_mark(user, step, now_step):
+                restored += 1
+        return restored
@@ -0,0 +1,201 @@
+"""
+random_source.py - Fuentes de aleatoriedad inyectables para los generadores
+
+Todos los generadores (security_pass, GeneradorPinBlindado, GeneradorToken,
+GeneradorPassphrase y SecurePasswordRouter) piden su aleatoriedad a un
+RandomSource en lugar de llamar directamente a secrets / os.urandom:
+
+    token_bytes(n)   n bytes aleatorios
+    randbelow(n)     entero uniforme en [0, n)
+    choice(seq)      elemento uniforme de una secuencia no vacía
+    shuffle(x)       Fisher-Yates en sitio
+
+FUENTES:
+========
+• SYSTEM_RANDOM (SystemRandomSource): CSPRNG del sistema operativo. Es la
+  fuente por defecto y la única apta para producción. Delega en secrets y
+  os.urandom en cada llamada (un patch de secrets.choice sigue funcionando).
+• DeterministicRandomSource(seed): flujo SHAKE-256 en modo contador.
+  Misma semilla -> mismos bytes, así que tests y benchmarks se reproducen
+  byte a byte. NO es secreta: cualquiera con la semilla conoce la salida.
+
+SALVAGUARDA:
+============
+DeterministicRandomSource solo se puede crear si la variable de entorno
+RANDOM_SOURCE_MODE vale 'test' o 'benchmark'; en otro caso lanza
+InsecureRandomSourceError. Las suites de pruebas y bench_router_threads.py
+la activan explícitamente.
+
+Uso:
+    os.environ["RANDOM_SOURCE_MODE"] = "test"
+    rng = DeterministicRandomSource(42)
+    password, _, _ = generate_password(16, rng=rng)
+    pin = GeneradorPinBlindado(rng=rng).generar(6)
+"""
+
+import os
+import abc
+import secrets
+import hashlib
+import logging
+import threading
+from typing import Any, List, MutableSequence, Sequence, Union
+
+logger = logging.getLogger("RandomSource")
+
+RANDOM_SOURCE_MODE_ENV = "RANDOM_SOURCE_MODE"
+DETERMINISTIC_MODES = ("test", "benchmark")
+# Bytes de salida SHAKE-256 por bloque del contador
+DETERMINISTIC_BLOCK_SIZE = 65536
+
+_DOMINIO = b"pythonCodingchallenges/random_source/v1"
+
+
+class InsecureRandomSourceError(RuntimeError):
+    """Se intentó usar una fuente determinista fuera de modo test/benchmark."""
+
+
+class RandomSource(abc.ABC):
+    """Interfaz de las fuentes de aleatoriedad (choice y shuffle se derivan de randbelow)."""
+
+    deterministic = False
+
+    @abc.abstractmethod
+    def token_bytes(self, n: int) -> bytes:
+        """n bytes aleatorios."""
+
+    @abc.abstractmethod
+    def randbelow(self, n: int) -> int:
+        """Entero uniforme en [0, n)."""
+
+    def choice(self, seq: Sequence[Any]) -> Any:
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[self.randbelow(len(seq))]
+
+    def shuffle(self, x: MutableSequence[Any]) -> None:
+        for i in reversed(range(1, len(x))):
+            j = self.randbelow(i + 1)
+            x[i], x[j] = x[j], x[i]
+
+
+class SystemRandomSource(RandomSource):
+    """CSPRNG del sistema operativo (secrets / os.urandom)."""
+
+    __slots__ = ()
+
+    def token_bytes(self, n: int) -> bytes:
+        return os.urandom(n)
+
+    def randbelow(self, n: int) -> int:
+        return secrets.randbelow(n)
+
+    def choice(self, seq: Sequence[Any]) -> Any:
+        return secrets.choice(seq)
+
+    def shuffle(self, x: MutableSequence[Any]) -> None:
+        _system_random.shuffle(x)
+
+    def __repr__(self) -> str:
+        return "SystemRandomSource()"
+
+
+_system_random = secrets.SystemRandom()
+SYSTEM_RANDOM = SystemRandomSource()
+
+
+def deterministic_mode_enabled() -> bool:
+    """True si el entorno permite fuentes deterministas."""
+    return os.environ.get(RANDOM_SOURCE_MODE_ENV, "").lower() in DETERMINISTIC_MODES
+
+
+class DeterministicRandomSource(RandomSource):
+    """
+    Flujo reproducible: bloque_i = SHAKE-256(dominio | semilla | i).
+
+    randbelow usa muestreo por rechazo sobre los bits justos (como
+    random.Random._randbelow), así que la salida es uniforme y depende
+    solo de la semilla y del orden de las llamadas. Thread-safe, pero con
+    varios hilos el reparto del flujo depende del planificador.
+    """
+
+    deterministic = True
+
+    def __init__(self, seed: Union[int, str, bytes]):
+        """
+        Args:
+            seed: Semilla (int >= 0, str o bytes)
+
+        Raises:
+            InsecureRandomSourceError: Si RANDOM_SOURCE_MODE no es 'test' ni 'benchmark'
+        """
+        if not deterministic_mode_enabled():
+            raise InsecureRandomSourceError(
+                f"DeterministicRandomSource solo se permite con {RANDOM_SOURCE_MODE_ENV} "
+                f"en {DETERMINISTIC_MODES}; en producción use SYSTEM_RANDOM")
+        if isinstance(seed, bool) or not isinstance(seed, (int, str, bytes)):
+            raise ValueError(f"seed debe ser int, str o bytes, recibido: {type(seed)}")
+        if isinstance(seed, int):
+            if seed < 0:
+                raise ValueError(f"seed debe ser >= 0, recibido: {seed}")
+            seed = seed.to_bytes(max(1, (seed.bit_length() + 7) // 8), "big")
+        elif isinstance(seed, str):
+            seed = seed.encode("utf-8")
+
+        self.seed = seed
+        self._prefijo = _DOMINIO + len(seed).to_bytes(4, "big") + seed
+        self._lock = threading.Lock()
+        self._bloque = 0
+        self._buffer = b""
+        self._pos = 0
+        logger.warning("Fuente de aleatoriedad DETERMINISTA activa (modo %s): no usar en producción",
+                       os.environ.get(RANDOM_SOURCE_MODE_ENV))
+
+    def _siguiente_bloque(self) -> bytes:
+        shake = hashlib.shake_256(self._prefijo + self._bloque.to_bytes(8, "big"))
+        self._bloque += 1
+        return shake.digest(DETERMINISTIC_BLOCK_SIZE)
+
+    def _leer(self, n: int) -> bytes:
+        """n bytes del flujo (con el lock tomado)."""
+        fin = self._pos + n
+        if fin <= len(self._buffer):
+            datos = self._buffer[self._pos:fin]
+            self._pos = fin
+            return datos
+        partes: List[bytes] = [self._buffer[self._pos:]]
+        faltan = n - len(partes[0])
+        while faltan > 0:
+            bloque = self._siguiente_bloque()
+            if faltan < len(bloque):
+                partes.append(bloque[:faltan])
+                self._buffer, self._pos = bloque, faltan
+                return b"".join(partes)
+            partes.append(bloque)
+            faltan -= len(bloque)
+        self._buffer, self._pos = b"", 0
+        return b"".join(partes)
+
+    def token_bytes(self, n: int) -> bytes:
+        with self._lock:
+            return self._leer(n)
+
+    def randbelow(self, n: int) -> int:
+        if n <= 0:
+            raise ValueError("Upper bound must be positive")
+        bits = (n - 1).bit_length()
+        num_bytes = (bits + 7) // 8
+        mascara = (1 << bits) - 1
+        with self._lock:
+            while True:
+                valor = int.from_bytes(self._leer(num_bytes), "big") & mascara
+                if valor < n:
+                    return valor
+
+    def __repr__(self) -> str:
+        return f"DeterministicRandomSource(seed={self.seed!r})"
+
+
+def resolve(rng: Union[RandomSource, None]) -> RandomSource:
+    """La fuente indicada o SYSTEM_RANDOM."""
+    return SYSTEM_RANDOM if rng is None else rng
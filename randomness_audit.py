@@ -0,0 +1,389 @@
+"""
+Auditoría Estadística de Aleatoriedad para los Generadores.
+Archivo: randomness_audit.py
+
+Genera millones de salidas de:
+1. security_pass.iter_passwords (misma distribución que generate_password)
+2. GeneradorPinBlindado.iter_pins (misma distribución que generar)
+3. OTPGenerate.generate_otp
+
+y las compara contra su distribución ESPERADA (no contra la uniforme):
+- PIN: cadena de Markov derivada de las reglas de transición
+  (y de la blacklist, que solo puede coincidir con PINs de 4 dígitos)
+- Password: uniforme entre las cadenas con al menos un carácter de cada clase
+- OTP: dígitos uniformes e independientes
+
+Pruebas:
+- Chi-cuadrado de frecuencias por posición
+- Chi-cuadrado de bigramas, una prueba por par de posiciones (j, j+1): cada
+  prueba cuenta un solo par por muestra, así que sus observaciones son
+  independientes (agregar los pares solapados de una misma salida no lo es)
+- Celdas estructuralmente imposibles (esperado = 0) deben tener 0 observaciones
+- Runs test (Wald-Wolfowitz) entre salidas consecutivas, por posición
+
+Los conteos se hacen con numpy.bincount sobre matrices uint8 (n, longitud),
+sin bucles por muestra. La generación usa las APIs por bloques (aleatoriedad
+en bloques de token_bytes mapeada con bytes.translate) y se reparte entre
+procesos: ~1.5-2 µs por password o PIN y ~1 µs por OTP en un núcleo, así que
+un millón de salidas se audita en unos segundos.
+
+Uso:
+    python3 randomness_audit.py pin --count 2000000 --length 6 --processes 8
+"""
+
+import sys
+import math
+import logging
+import argparse
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from security_pass import character_classes, exact_keyspace, iter_passwords
+from generador_pin import GeneradorPinBlindado
+from OTPGenerate import generate_otp
+
+logger = logging.getLogger("RandomnessAudit")
+
+FUENTES = ("password", "pin", "otp")
+ALPHA_POR_DEFECTO = 1e-6
+DIGITOS = "0123456789"
+
+
+# ==========================================
+# Funciones estadísticas
+# ==========================================
+
+def _gamma_q(a: float, x: float) -> float:
+    """Función gamma incompleta regularizada superior Q(a, x)."""
+    if x <= 0:
+        return 1.0
+    ln_pref = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # Serie para P(a, x)
+        termino = suma = 1.0 / a
+        ap = a
+        for _ in range(100000):
+            ap += 1
+            termino *= x / ap
+            suma += termino
+            if abs(termino) < abs(suma) * 1e-15:
+                break
+        return max(0.0, 1.0 - suma * math.exp(ln_pref))
+    # Fracción continua (Lentz) para Q(a, x)
+    diminuto = 1e-300
+    b = x + 1 - a
+    c = 1 / diminuto
+    d = 1 / b
+    h = d
+    for i in range(1, 100000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = diminuto if abs(d) < diminuto else d
+        c = b + an / c
+        c = diminuto if abs(c) < diminuto else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(ln_pref) * h
+
+
+def chi2_sf(estadistico: float, gl: int) -> float:
+    """P(X >= estadistico) para X ~ chi-cuadrado con `gl` grados de libertad."""
+    if gl <= 0:
+        return 1.0
+    return _gamma_q(gl / 2.0, estadistico / 2.0)
+
+
+def chi_cuadrado(observado: np.ndarray, esperado_prob: np.ndarray) -> Dict[str, Any]:
+    """
+    Chi-cuadrado de bondad de ajuste.
+
+    Las celdas con probabilidad esperada 0 no entran al estadístico; se
+    reportan como `imposibles` (observaciones donde no debería haber ninguna).
+    """
+    observado = np.asarray(observado, dtype=np.float64).ravel()
+    esperado_prob = np.asarray(esperado_prob, dtype=np.float64).ravel()
+    total = observado.sum()
+    posibles = esperado_prob > 0
+    esperado = esperado_prob[posibles] / esperado_prob[posibles].sum() * total
+    estadistico = float(((observado[posibles] - esperado) ** 2 / esperado).sum())
+    gl = int(posibles.sum()) - 1
+    return {
+        'chi2': round(estadistico, 3),
+        'gl': gl,
+        'p': chi2_sf(estadistico, gl),
+        'imposibles': int(observado[~posibles].sum()),
+        'esperado_min': float(esperado.min()) if esperado.size else 0.0,
+    }
+
+
+def runs_test(binaria: np.ndarray) -> Dict[str, Any]:
+    """Runs test de Wald-Wolfowitz (aproximación normal, bilateral)."""
+    n1 = int(np.count_nonzero(binaria))
+    n = int(binaria.size)
+    n2 = n - n1
+    if n1 == 0 or n2 == 0:
+        return {'runs': 1, 'z': 0.0, 'p': 1.0}
+    runs = 1 + int(np.count_nonzero(binaria[1:] != binaria[:-1]))
+    media = 2.0 * n1 * n2 / n + 1
+    varianza = 2.0 * n1 * n2 * (2.0 * n1 * n2 - n) / (n * n * (n - 1))
+    z = (runs - media) / math.sqrt(varianza)
+    return {'runs': runs, 'z': round(z, 3), 'p': math.erfc(abs(z) / math.sqrt(2))}
+
+
+# ==========================================
+# Distribuciones esperadas
+# ==========================================
+
+def _pool_password(opciones: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """Pool completo y clases seleccionadas (las mismas que usa generate_password)."""
+    clases, pool = character_classes(
+        include_uppercase=opciones.get('include_uppercase', True),
+        include_lowercase=opciones.get('include_lowercase', True),
+        include_numbers=opciones.get('include_numbers', True),
+        include_symbols=opciones.get('include_symbols', True),
+        safe_mode=opciones.get('safe_mode', False),
+    )
+    return pool, list(clases)
+
+
+def esperado_password(longitud: int, opciones: Dict[str, Any]) -> Tuple[str, np.ndarray, np.ndarray]:
+    """
+    Distribución exacta de una password uniforme en el keyspace restringido.
+
+    generate_password rechaza los candidatos a los que les falta una clase,
+    así que todas las cadenas con las k clases son equiprobables y la
+    distribución es la misma en cada posición. Fijar un carácter de la clase
+    i deja longitud-1 posiciones que deben cubrir las demás clases; fijar dos
+    (clases i, j) deja longitud-2 (exact_keyspace sobre el pool completo).
+
+    Returns:
+        (alfabeto, marginal por posición (L, K), bigrama por par (L-1, K, K))
+    """
+    pool, clases = _pool_password(opciones)
+    tamanos = [len(clase) for clase in clases]
+    clase_de = np.repeat(np.arange(len(clases)), tamanos)
+    total = exact_keyspace(longitud, tamanos)
+
+    def fraccion(restantes: int, cubiertas: set) -> float:
+        pendientes = [t for i, t in enumerate(tamanos) if i not in cubiertas]
+        return exact_keyspace(restantes, pendientes, pool=len(pool)) / total
+
+    por_clase = np.array([fraccion(longitud - 1, {i}) for i in range(len(clases))])
+    por_par = np.array([[fraccion(longitud - 2, {i, j}) for j in range(len(clases))]
+                        for i in range(len(clases))])
+    marginal = np.tile(por_clase[clase_de], (longitud, 1))
+    bigrama = np.tile(por_par[np.ix_(clase_de, clase_de)], (longitud - 1, 1, 1))
+    return pool, marginal, bigrama
+
+
+def _transiciones_pin() -> np.ndarray:
+    """Matriz de transición T[previo, actual] de GeneradorPinBlindado."""
+    generador = GeneradorPinBlindado()
+    t = np.zeros((10, 10))
+    for previo in range(10):
+        validos = [a for a in range(10)
+                   if generador._es_transicion_valida(str(a), str(previo))]  # pylint: disable=protected-access
+        t[previo, validos] = 1.0 / len(validos)
+    return t
+
+
+def esperado_pin(longitud: int) -> Tuple[str, np.ndarray, np.ndarray]:
+    """
+    Distribución exacta de GeneradorPinBlindado.generar(longitud).
+
+    Primer dígito uniforme y cada siguiente uniforme entre las transiciones
+    válidas desde el anterior. La blacklist solo contiene cadenas de 4
+    caracteres, así que solo condiciona a los PINs de longitud 4: en ese caso
+    se enumeran los 10^4 PINs, se anulan los de la blacklist y se renormaliza.
+
+    Returns:
+        (alfabeto, marginal por posición (L, 10), bigrama por par (L-1, 10, 10))
+    """
+    t = _transiciones_pin()
+
+    if longitud == 4:
+        blacklist = GeneradorPinBlindado().blacklist
+        pins = np.array(np.meshgrid(*[np.arange(10)] * 4, indexing='ij')).reshape(4, -1).T
+        prob = np.full(len(pins), 0.1)
+        for j in range(1, 4):
+            prob *= t[pins[:, j - 1], pins[:, j]]
+        texto = ["".join(map(str, p)) for p in pins]
+        prob[[i for i, s in enumerate(texto) if s in blacklist]] = 0.0
+        prob /= prob.sum()
+
+        marginal = np.stack([np.bincount(pins[:, j], weights=prob, minlength=10) for j in range(4)])
+        bigrama = np.stack([np.bincount(pins[:, j] * 10 + pins[:, j + 1], weights=prob, minlength=100)
+                            for j in range(3)])
+        return DIGITOS, marginal, bigrama.reshape(3, 10, 10)
+
+    marginal = np.empty((longitud, 10))
+    marginal[0] = 0.1
+    for j in range(1, longitud):
+        marginal[j] = marginal[j - 1] @ t
+    bigrama = marginal[:-1, :, None] * t
+    return DIGITOS, marginal, bigrama
+
+
+def esperado_otp(longitud: int) -> Tuple[str, np.ndarray, np.ndarray]:
+    """Dígitos uniformes e independientes."""
+    return DIGITOS, np.full((longitud, 10), 0.1), np.full((longitud - 1, 10, 10), 0.01)
+
+
+# ==========================================
+# Generación repartida entre procesos
+# ==========================================
+
+def _generar_shard(fuente: str, cantidad: int, longitud: int,
+                   opciones: Dict[str, Any], alfabeto: str) -> bytes:
+    """
+    Genera `cantidad` salidas y las devuelve como índices de símbolo (uint8)
+    concatenados, listos para np.frombuffer en el proceso padre.
+    """
+    if fuente == "password":
+        salidas = islice(iter_passwords(size=longitud, **opciones), cantidad)
+    elif fuente == "pin":
+        salidas = islice(GeneradorPinBlindado().iter_pins(longitud), cantidad)
+    else:
+        salidas = [generate_otp(longitud) for _ in range(cantidad)]
+
+    tabla = bytes.maketrans(alfabeto.encode('latin-1'), bytes(range(len(alfabeto))))
+    return "".join(salidas).encode('latin-1').translate(tabla)
+
+
+def generar_muestras(fuente: str, cantidad: int, longitud: int,
+                     opciones: Optional[Dict[str, Any]] = None, alfabeto: str = DIGITOS,
+                     procesos: int = 1, shard: int = 50_000) -> np.ndarray:
+    """
+    Matriz (cantidad, longitud) de índices de símbolo, generada en shards.
+    """
+    opciones = opciones or {}
+    tamanos = [min(shard, cantidad - i) for i in range(0, cantidad, shard)]
+    if procesos <= 1:
+        partes = [_generar_shard(fuente, n, longitud, opciones, alfabeto) for n in tamanos]
+    else:
+        with ProcessPoolExecutor(procesos) as executor:
+            futuros = [executor.submit(_generar_shard, fuente, n, longitud, opciones, alfabeto)
+                       for n in tamanos]
+            partes = [f.result() for f in futuros]
+    return np.frombuffer(b"".join(partes), dtype=np.uint8).reshape(cantidad, longitud)
+
+
+# ==========================================
+# Auditoría
+# ==========================================
+
+def auditar_muestras(muestras: np.ndarray, marginal: np.ndarray,
+                     bigrama: np.ndarray) -> Dict[str, Any]:
+    """
+    Aplica todas las pruebas a una matriz (n, L) de índices de símbolo.
+    """
+    n, longitud = muestras.shape
+    k = marginal.shape[1]
+
+    # Frecuencias por posición: un solo bincount sobre (posición * K + símbolo)
+    claves = (np.arange(longitud, dtype=np.int64) * k + muestras).ravel()
+    por_posicion = np.bincount(claves, minlength=longitud * k).reshape(longitud, k)
+    posiciones = [chi_cuadrado(por_posicion[j], marginal[j]) for j in range(longitud)]
+
+    # Bigramas por par (j, j+1): un solo bincount sobre (j * K² + a * K + b)
+    desplazamiento = np.arange(longitud - 1, dtype=np.int64) * k * k
+    pares = (desplazamiento + muestras[:, :-1].astype(np.int64) * k + muestras[:, 1:]).ravel()
+    por_par = np.bincount(pares, minlength=(longitud - 1) * k * k).reshape(longitud - 1, k * k)
+    bigramas = [chi_cuadrado(por_par[j], bigrama[j]) for j in range(longitud - 1)]
+
+    # Runs test entre salidas consecutivas: símbolo por encima de la mediana esperada
+    runs = []
+    for j in range(longitud):
+        acumulada = np.cumsum(marginal[j])
+        umbral = int(np.searchsorted(acumulada, 0.5))
+        runs.append(runs_test(muestras[:, j] > umbral))
+
+    return {'n': n, 'longitud': longitud, 'posiciones': posiciones,
+            'bigramas': bigramas, 'runs': runs}
+
+
+def ejecutar_auditoria(fuente: str, cantidad: int, longitud: int,
+                       opciones: Optional[Dict[str, Any]] = None,
+                       procesos: int = 1, alpha: float = ALPHA_POR_DEFECTO) -> Dict[str, Any]:
+    """
+    Genera `cantidad` salidas de `fuente` y devuelve el informe con veredicto.
+
+    El veredicto usa corrección de Bonferroni sobre todas las pruebas
+    y exige cero observaciones en celdas imposibles.
+    """
+    if fuente not in FUENTES:
+        raise ValueError(f"Fuente debe ser una de {FUENTES}, recibido: {fuente}")
+    opciones = opciones or {}
+
+    if fuente == "password":
+        alfabeto, marginal, bigrama = esperado_password(longitud, opciones)
+    elif fuente == "pin":
+        alfabeto, marginal, bigrama = esperado_pin(longitud)
+    else:
+        alfabeto, marginal, bigrama = esperado_otp(longitud)
+
+    muestras = generar_muestras(fuente, cantidad, longitud, opciones, alfabeto, procesos)
+    informe = auditar_muestras(muestras, marginal, bigrama)
+
+    pruebas = informe['posiciones'] + informe['bigramas'] + informe['runs']
+    umbral = alpha / len(pruebas)
+    imposibles = sum(p.get('imposibles', 0) for p in pruebas)
+    informe.update({
+        'fuente': fuente,
+        'alpha': alpha,
+        'p_min': min(p['p'] for p in pruebas),
+        'imposibles': imposibles,
+        'aprobado': imposibles == 0 and all(p['p'] >= umbral for p in pruebas),
+    })
+    return informe
+
+
+def imprimir_informe(informe: Dict[str, Any]) -> None:
+    print("\n" + "=" * 60)
+    print(f"🎲 AUDITORÍA DE ALEATORIEDAD: {informe['fuente']} "
+          f"({informe['n']:,} muestras x {informe['longitud']})")
+    print("=" * 60)
+    for j, prueba in enumerate(informe['posiciones']):
+        print(f"  Posición {j:>2}: chi2={prueba['chi2']:>10.2f} gl={prueba['gl']:>4} p={prueba['p']:.4f}")
+    for j, b in enumerate(informe['bigramas']):
+        print(f"  Par {j:>2}-{j + 1:<2} : chi2={b['chi2']:>10.2f} gl={b['gl']:>4} p={b['p']:.4f} "
+              f"(celdas imposibles observadas: {b['imposibles']})")
+    peor = min(informe['runs'], key=lambda r: r['p'])
+    print(f"  Runs test  : peor z={peor['z']:+.2f} p={peor['p']:.4f}")
+    print("-" * 60)
+    veredicto = "✅ APROBADO" if informe['aprobado'] else "❌ RECHAZADO"
+    print(f"  {veredicto} (alpha={informe['alpha']:g}, Bonferroni; p mínimo={informe['p_min']:.2e})")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Auditoría estadística de generadores")
+    parser.add_argument("fuente", choices=FUENTES)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--length", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--alpha", type=float, default=ALPHA_POR_DEFECTO)
+    parser.add_argument("--safe-mode", action="store_true")
+    parser.add_argument("--no-symbols", action="store_true")
+    args = parser.parse_args(argv)
+
+    longitud = args.length or {"password": 16, "pin": 6, "otp": 6}[args.fuente]
+    opciones = {}
+    if args.fuente == "password":
+        opciones = {'safe_mode': args.safe_mode, 'include_symbols': not args.no_symbols}
+
+    informe = ejecutar_auditoria(args.fuente, args.count, longitud, opciones,
+                                 args.processes, args.alpha)
+    imprimir_informe(informe)
+    return 0 if informe['aprobado'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+rate_limiter.py - Control de admisión para SecurePasswordRouter
+
+Combina:
+1. Token bucket por cliente (client_id) con recarga perezosa: los tokens se
+   recalculan solo cuando el cliente hace una petición, sin hilos de recarga
+2. Tope global de concurrencia (peticiones en curso en todo el router)
+3. Política por exceso: 'reject' (rechazo inmediato) o 'wait' (reserva los
+   tokens y espera, hasta max_wait segundos)
+4. Desalojo de buckets inactivos: un bucket sin uso durante idle_ttl ya
+   estaría lleno, así que borrarlo no cambia ninguna decisión futura
+
+El camino caliente es O(1): un hash, un lock de franja (lock striping) y
+unas pocas operaciones aritméticas sobre una lista [tokens, último_ts]
+que se crea una sola vez por cliente.
+"""
+
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+ADMISSION_MODES = ("reject", "wait")
+DEFAULT_CLIENT_ID = "anonymous"
+DEFAULT_STRIPES = 16
+DEFAULT_IDLE_TTL = 300.0
+
+
+class RateLimitExceeded(RuntimeError):
+    """Petición rechazada por el control de admisión."""
+
+    def __init__(self, message: str, client_id: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.client_id = client_id
+        self.retry_after = retry_after
+
+
+class _Stripe:
+    """Franja del mapa de buckets: lock, buckets y contadores propios."""
+
+    __slots__ = ("lock", "buckets", "last_sweep", "admitted", "rejected", "waited", "wait_seconds")
+
+    def __init__(self, now: float):
+        self.lock = threading.Lock()
+        self.buckets: Dict[str, List[float]] = {}
+        self.last_sweep = now
+        self.admitted = 0
+        self.rejected = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+
+
+class AdmissionControl:
+    """
+    Token bucket por cliente + tope global de concurrencia.
+
+    Uso:
+        waited = admission.admit(client_id, cost)   # lanza RateLimitExceeded
+        try:
+            ...
+        finally:
+            admission.release()
+    """
+
+    def __init__(self, rate: float, burst: float, max_concurrent: Optional[int] = None,
+                 mode: str = "reject", max_wait: float = 1.0,
+                 idle_ttl: float = DEFAULT_IDLE_TTL, stripes: int = DEFAULT_STRIPES,
+                 clock=time.monotonic):
+        """
+        Args:
+            rate: Tokens por segundo que recupera cada cliente
+            burst: Capacidad del bucket (ráfaga máxima)
+            max_concurrent: Peticiones simultáneas en todo el router (None = sin tope)
+            mode: 'reject' o 'wait'
+            max_wait: Espera máxima en modo 'wait' (segundos)
+            idle_ttl: Segundos sin uso tras los que se desaloja un bucket
+            stripes: Número de franjas del mapa de buckets
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"rate y burst deben ser > 0, recibido: rate={rate}, burst={burst}")
+        if mode not in ADMISSION_MODES:
+            raise ValueError(f"mode debe ser uno de {ADMISSION_MODES}, recibido: {mode}")
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError(f"max_concurrent debe ser >= 1, recibido: {max_concurrent}")
+
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.mode = mode
+        self.max_wait = max_wait
+        self.max_concurrent = max_concurrent
+        # Un bucket inactivo solo es "olvidable" cuando ya se habría llenado
+        self.idle_ttl = max(idle_ttl, self.burst / self.rate)
+        self._clock = clock
+        now = clock()
+        self._stripes = [_Stripe(now) for _ in range(stripes)]
+        self._semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._concurrency_rejected = 0
+        self._counter_lock = threading.Lock()
+
+    def _reserve(self, client_id: str, cost: float) -> float:
+        """
+        Descuenta `cost` tokens del bucket del cliente.
+
+        Returns:
+            float: Segundos que hay que esperar (0.0 si hay tokens suficientes)
+
+        Raises:
+            RateLimitExceeded: Si se excede en modo 'reject' o la espera supera max_wait
+        """
+        stripe = self._stripes[hash(client_id) % len(self._stripes)]
+        with stripe.lock:
+            now = self._clock()
+            bucket = stripe.buckets.get(client_id)
+            if bucket is None:
+                bucket = stripe.buckets[client_id] = [self.burst, now]
+                if now - stripe.last_sweep > self.idle_ttl:
+                    self._sweep(stripe, now)
+            else:
+                # Recarga perezosa
+                tokens = bucket[0] + (now - bucket[1]) * self.rate
+                bucket[0] = tokens if tokens < self.burst else self.burst
+                bucket[1] = now
+
+            remaining = bucket[0] - cost
+            if remaining >= 0:
+                bucket[0] = remaining
+                stripe.admitted += 1
+                return 0.0
+
+            wait = -remaining / self.rate
+            if self.mode == "reject" or wait > self.max_wait:
+                stripe.rejected += 1
+                raise RateLimitExceeded(
+                    f"Límite de peticiones excedido para '{client_id}' (reintentar en {wait:.3f}s)",
+                    client_id, wait)
+
+            # Modo 'wait': se reservan los tokens (el saldo queda negativo) para
+            # que las esperas concurrentes del mismo cliente se encolen en orden
+            bucket[0] = remaining
+            stripe.admitted += 1
+            stripe.waited += 1
+            stripe.wait_seconds += wait
+            return wait
+
+    def _refund(self, client_id: str, cost: float, wait: float) -> None:
+        """
+        Devuelve los tokens de una petición reservada que no llegó a admitirse
+        y deshace sus contadores (admitida y, si esperó, la espera).
+        """
+        stripe = self._stripes[hash(client_id) % len(self._stripes)]
+        with stripe.lock:
+            bucket = stripe.buckets.get(client_id)
+            if bucket is not None:
+                tokens = bucket[0] + cost
+                bucket[0] = tokens if tokens < self.burst else self.burst
+            stripe.admitted -= 1
+            if wait:
+                stripe.waited -= 1
+                stripe.wait_seconds -= wait
+
+    def _sweep(self, stripe: _Stripe, now: float) -> None:
+        """Desaloja los buckets inactivos de una franja (con su lock tomado)."""
+        limit = now - self.idle_ttl
+        for client_id in [c for c, b in stripe.buckets.items() if b[1] < limit]:
+            del stripe.buckets[client_id]
+        stripe.last_sweep = now
+
+    def admit(self, client_id: str = DEFAULT_CLIENT_ID, cost: float = 1.0) -> float:
+        """
+        Admite una petición (o lanza RateLimitExceeded). Si se admite, el
+        llamador debe invocar release() al terminar.
+
+        Si la rechaza el tope de concurrencia, se devuelven al cliente los
+        tokens reservados (la petición no cuenta para su límite de tasa).
+
+        Returns:
+            float: Segundos esperados por el límite de tasa
+
+        Raises:
+            ValueError: En modo 'reject', si `cost` supera la ráfaga (nunca se admitiría)
+            RateLimitExceeded: Si se excede el límite de tasa o el tope de concurrencia
+        """
+        if self.mode == "reject" and cost > self.burst:
+            raise ValueError(f"El coste {cost:g} supera la ráfaga del cliente ({self.burst:g}): "
+                             f"la petición nunca se admitiría")
+        wait = self._reserve(client_id, cost)
+        if wait:
+            time.sleep(wait)
+
+        if self._semaphore is not None:
+            if self.mode == "wait":
+                acquired = self._semaphore.acquire(timeout=self.max_wait)
+            else:
+                acquired = self._semaphore.acquire(blocking=False)
+            if not acquired:
+                self._refund(client_id, cost, wait)
+                with self._counter_lock:
+                    self._concurrency_rejected += 1
+                raise RateLimitExceeded(
+                    f"Tope de concurrencia alcanzado ({self.max_concurrent} peticiones en curso)",
+                    client_id)
+        return wait
+
+    def release(self) -> None:
+        """Libera el hueco de concurrencia de una petición admitida."""
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Contadores agregados de todas las franjas."""
+        totals = {'admitted': 0, 'rejected': 0, 'waited': 0, 'wait_seconds': 0.0, 'clients': 0}
+        for stripe in self._stripes:
+            with stripe.lock:
+                totals['admitted'] += stripe.admitted
+                totals['rejected'] += stripe.rejected
+                totals['waited'] += stripe.waited
+                totals['wait_seconds'] += stripe.wait_seconds
+                totals['clients'] += len(stripe.buckets)
+        totals['concurrency_rejected'] = self._concurrency_rejected
+        totals['wait_seconds'] = round(totals['wait_seconds'], 6)
+        return totals
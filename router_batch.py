@@ -0,0 +1,227 @@
+"""
+router_batch.py - Driver por lotes (JSONL) para SecurePasswordRouter
+
+FLUJO:
+======
+    entrada.jsonl ──► lectura en streaming ──► bloques de N líneas
+                                                    │
+                          ┌─────────────────────────┼────────────────────┐
+                          ▼                         ▼                    ▼
+                      worker 1                  worker 2     ...     worker K
+                 (router propio por proceso, sin historial)
+                          │                         │                    │
+                          └───────────► reensamblado EN ORDEN ◄──────────┘
+                                                    │
+                                 salida.jsonl (+ errores.jsonl opcional)
+
+FORMATO DE ENTRADA:
+===================
+Una línea = un dict de opciones del router (el mismo que recibe generate()).
+Si la línea incluye "count": N se usa generate_batch() y se generan N
+credenciales con esa configuración.
+
+    {"only_numbers": true, "length": 6, "strict_security": true}
+    {"token": true, "token_encoding": "hex", "count": 1000}
+
+FORMATO DE SALIDA:
+==================
+    {"line": 1, "ok": true, "result": {...}}
+    {"line": 2, "ok": false, "error": "Length mínima es 4, recibido: 2"}
+
+MEMORIA:
+========
+Constante respecto al tamaño del archivo: solo se mantienen en vuelo
+`workers * IN_FLIGHT_PER_WORKER` bloques; la entrada nunca se carga completa.
+
+MODO DE USO:
+============
+python3 router_batch.py entrada.jsonl -o salida.jsonl --errors errores.jsonl --workers 4
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from secure_router import SecurePasswordRouter
+
+logger = logging.getLogger("RouterBatch")
+
+DEFAULT_CHUNK_SIZE = 1000
+IN_FLIGHT_PER_WORKER = 2
+PROGRESS_EVERY = 100_000
+
+# Loggers que registran una línea por generación o por error. En lote se
+# silencian: los errores de cada línea ya quedan en el JSONL de salida.
+_VERBOSE_LOGGERS = ("SecureRouter", "GeneradorBlindado")
+
+# Router por proceso (creado en el inicializador del worker)
+_worker_router: Optional[SecurePasswordRouter] = None
+
+
+def _json_default(value: Any) -> Any:
+    """Serializa tipos no JSON del resultado del router."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value)}")
+
+
+def _init_worker() -> None:
+    """Inicializa el router del proceso (sin historial: memoria constante)."""
+    global _worker_router
+    for name in _VERBOSE_LOGGERS:
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+    _worker_router = SecurePasswordRouter(debug=False, track_history=False)
+
+
+def _process_line(router: SecurePasswordRouter, line_no: int, raw: str) -> Tuple[bool, str]:
+    """
+    Valida y enruta una línea.
+
+    Returns:
+        Tuple[ok, registro_json]
+    """
+    try:
+        options = json.loads(raw)
+        if not isinstance(options, dict):
+            raise ValueError(f"Cada línea debe ser un objeto JSON, recibido: {type(options).__name__}")
+
+        count = options.pop('count', None)
+        if count is None:
+            result = router.generate(options)
+        else:
+            result = router.generate_batch(options, count)
+        record = {'line': line_no, 'ok': True, 'result': result}
+        return True, json.dumps(record, ensure_ascii=False, default=_json_default)
+
+    except (ValueError, RuntimeError) as e:
+        record = {'line': line_no, 'ok': False, 'error': str(e)}
+        return False, json.dumps(record, ensure_ascii=False)
+
+
+def _process_chunk(chunk: List[Tuple[int, str]]) -> List[Tuple[bool, str]]:
+    """Procesa un bloque en el worker con su router propio."""
+    return [_process_line(_worker_router, line_no, raw) for line_no, raw in chunk]
+
+
+def iter_chunks(stream: TextIO, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Lee el JSONL en streaming y agrupa líneas no vacías en bloques.
+    Conserva el número de línea original para los registros de salida.
+    """
+    chunk: List[Tuple[int, str]] = []
+    for line_no, raw in enumerate(stream, 1):
+        if not raw.strip():
+            continue
+        chunk.append((line_no, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_results(chunks: Iterator[List[Tuple[int, str]]], workers: int) -> Iterator[List[Tuple[bool, str]]]:
+    """
+    Procesa bloques y los devuelve en el orden de entrada.
+
+    Con workers > 1 se usa un Pool con ventana acotada de bloques en vuelo
+    (Pool.imap consumiría la entrada completa de forma ansiosa).
+    """
+    if workers <= 1:
+        _init_worker()
+        for chunk in chunks:
+            yield _process_chunk(chunk)
+        return
+
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_process_chunk, (chunk,)))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def run_batch(input_stream: TextIO, output_stream: TextIO,
+              errors_stream: Optional[TextIO] = None, workers: int = 1,
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              progress_every: int = PROGRESS_EVERY) -> Dict[str, Any]:
+    """
+    Ejecuta el lote completo.
+
+    Args:
+        input_stream: JSONL de opciones
+        output_stream: Destino de resultados (y errores si no hay errors_stream)
+        errors_stream: Destino opcional de errores
+        workers: Procesos (1 = en el proceso actual)
+        chunk_size: Líneas por bloque enviado a cada worker
+        progress_every: Líneas entre reportes de progreso (stderr); 0 = sin reporte
+
+    Returns:
+        {'lines': int, 'ok': int, 'errors': int, 'seconds': float}
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size debe ser >= 1, recibido: {chunk_size}")
+
+    start = time.perf_counter()
+    lines = ok_count = error_count = 0
+    next_report = progress_every
+
+    for results in _iter_results(iter_chunks(input_stream, chunk_size), workers):
+        for ok, record in results:
+            if ok:
+                ok_count += 1
+                output_stream.write(record + "\n")
+            else:
+                error_count += 1
+                (errors_stream or output_stream).write(record + "\n")
+        lines += len(results)
+
+        if progress_every and lines >= next_report:
+            elapsed = time.perf_counter() - start
+            print(f"⏳ {lines:,} líneas | {error_count:,} errores | "
+                  f"{lines / elapsed:,.0f} líneas/s", file=sys.stderr)
+            next_report = lines + progress_every
+
+    elapsed = time.perf_counter() - start
+    return {'lines': lines, 'ok': ok_count, 'errors': error_count, 'seconds': elapsed}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Driver JSONL por lotes para SecurePasswordRouter")
+    parser.add_argument("input", help="Archivo JSONL de opciones ('-' = stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Archivo JSONL de resultados ('-' = stdout)")
+    parser.add_argument("--errors", default=None, help="Archivo JSONL de errores (por defecto, en --output)")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos (por defecto 1)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--progress-every", type=int, default=PROGRESS_EVERY)
+    args = parser.parse_args(argv)
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    errors_stream = open(args.errors, "w", encoding="utf-8") if args.errors else None
+
+    try:
+        summary = run_batch(input_stream, output_stream, errors_stream,
+                            workers=args.workers, chunk_size=args.chunk_size,
+                            progress_every=args.progress_every)
+    finally:
+        for stream in (input_stream, output_stream, errors_stream):
+            if stream not in (None, sys.stdin, sys.stdout):
+                stream.close()
+
+    print(f"✅ {summary['lines']:,} líneas ({summary['ok']:,} ok, {summary['errors']:,} errores) "
+          f"en {summary['seconds']:.2f}s", file=sys.stderr)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -106,9 +106,22 @@ GENERADORES INTEGRABLES:
    └─ generate_password(size, include_uppercase, ...)
       • Rango: 4-32 caracteres
       • Caracteres: mayús, minús, números, símbolos
-      • Entropía: log2(charset_size^length)
+      • Entropía exacta: log2(combinaciones con ≥1 carácter de cada clase)
       • Máxima flexibilidad
 
+3. TOKEN (de generador_token.py)
+   └─ GeneradorToken(encoding, num_bytes, prefix, checksum).generar_lote(n)
+      • Material de clave: 16-64 bytes de os.urandom (una llamada por lote)
+      • Codificación: hex, base32, base64url, crockford
+      • Prefijo y dígitos de verificación opcionales
+      • Entropía exacta: 8 * num_bytes bits
+
+4. PASSPHRASE (de generador_passphrase.py)
+   └─ GeneradorPassphrase(lista, num_palabras, separador, capitalizacion)
+      • Lista Diceware (EFF 7.776 o mayor) en índice memory-mapped
+      • Selección de palabra O(1), sin cargar la lista al arrancar
+      • Entropía exacta: num_palabras * log2(tamaño_lista)
+
 MATRIZ DE DECISIÓN:
 ===================
 ┌─────────────────────────┬──────────────┬──────────────────┐
@@ -123,8 +136,27 @@ MATRIZ DE DECISIÓN:
 ├─────────────────────────┼──────────────┼──────────────────┤
 │ only_numbers=False      │ STANDARD     │ Diversidad de    │
 │ (caracteres mixtos)     │              │ caracteres       │
+├─────────────────────────┼──────────────┼──────────────────┤
+│ token=True              │ TOKEN        │ API keys, claves │
+│ (tiene prioridad)       │              │ de sesión        │
+├─────────────────────────┼──────────────┼──────────────────┤
+│ passphrase=True         │ PASSPHRASE   │ Memorizable      │
+│ (tiene prioridad)       │              │ (Diceware)       │
 └─────────────────────────┴──────────────┴──────────────────┘
 
+REGISTRO DE GENERADORES:
+========================
+La matriz anterior se implementa con un GeneratorRegistry: cada generador
+declara qué peticiones soporta, su entropía exacta y su coste medido
+(µs/elemento y eficiencia en lote). DecisionMatrix.decide elige el más
+barato que cumple las restricciones y options['min_entropy'] (si se
+indica), y cachea la decisión por forma de petición.
+• Peticiones que solo piden entropía ({'min_entropy': 128}) compiten entre
+  TOKEN, PASSPHRASE y STANDARD por coste
+• Generadores nuevos: DEFAULT_REGISTRY.register(GeneratorSpec(..., generate=fn))
+• Costes: router.calibrate() en el arranque, o
+  DEFAULT_REGISTRY.load_costs("bench_threads.json") (bench_router_threads.py)
+
 MÉTRICAS DE ENTROPÍA (OWASP):
 =============================
 Tipo                          Bits    Fortaleza  Uso
@@ -132,10 +164,10 @@ Tipo                          Bits    Fortaleza  Uso
 PIN 4 dígitos (Blindado)     10.29   ⚠️ WEAK    Prototipos
 PIN 6 dígitos (Blindado)     14.93   ⚠️ WEAK    PIN estándar
 PIN 8 dígitos (Blindado)     19.58   ⚠️ WEAK    PIN máximo
-Números 8 (Standard)         49.98   ✅ GOOD    Casual
-Contraseña 12 (Standard)     74.98   🔐 STRONG  Producción
-Contraseña 16 (Standard)     99.97   🔐 STRONG  Muy fuerte
-Contraseña 24 (Standard)    149.95   🔐 STRONG  Máximo nivel
+Números 8 (Standard)         48.91   ✅ GOOD    Casual
+Contraseña 12 (Standard)     74.52   🔐 STRONG  Producción
+Contraseña 16 (Standard)     99.74   🔐 STRONG  Muy fuerte
+Contraseña 24 (Standard)    149.89   🔐 STRONG  Máximo nivel
 
 VALIDACIONES:
 =============
@@ -165,9 +197,63 @@ CARACTERÍSTICAS:
 
 DEPENDENCIAS:
 =============
-- security_pass.py: generate_password(), calculate_entropy(), get_entropy_strength()
+- security_pass.py: generate_password(), exact_entropy(), get_entropy_strength()
 - generador_pin.py: GeneradorPinBlindado
-- Python: secrets, logging, datetime, typing, enum, math
+- generador_token.py: GeneradorToken
+- generador_passphrase.py: GeneradorPassphrase, abrir_lista
+- rate_limiter.py: AdmissionControl (opcional)
+- tenant_policy.py: PolicyRegistry (opcional)
+- generator_registry.py: GeneratorRegistry, GeneratorSpec, CostProfile
+- random_source.py: RandomSource, SYSTEM_RANDOM (DeterministicRandomSource en tests)
+- Python: secrets, logging, datetime, typing, enum, math, threading, heapq
+
+CONCURRENCIA:
+=============
+Un mismo SecurePasswordRouter puede usarse desde muchos hilos a la vez:
+• Cada hilo tiene sus propias instancias de generadores (threading.local)
+• El historial se guarda en un shard por hilo; get_history() los fusiona
+  por timestamp al leer
+• El camino caliente (generate) no toma ningún lock global; solo se toma
+  un lock al registrar el shard de un hilo nuevo (y solo con
+  track_history=True). Los logs por petición son de nivel DEBUG: un log
+  INFO por generación serializaría los hilos en el lock del handler
+• `history` devuelve una copia fusionada; append()/extend()/clear() sobre
+  ella siguen funcionando con un DeprecationWarning (usar clear_history())
+• debug=True usa el logger "SecureRouter.debug" en vez de cambiar el nivel
+  del logger global del módulo
+• bench_router_threads.py mide el escalado 1..N hilos (GIL y 3.13t)
+
+CONTROL DE ADMISIÓN:
+====================
+Opcional: SecurePasswordRouter(admission=AdmissionControl(rate, burst, ...))
+• Token bucket por options['client_id'] (por defecto 'anonymous'), con
+  recarga perezosa y desalojo de clientes inactivos
+• Tope global de peticiones concurrentes (max_concurrent)
+• mode='reject': RateLimitExceeded (RuntimeError) inmediato
+  mode='wait': la petición espera su turno hasta max_wait segundos
+• Un lote (generate_batch) consume `count` tokens
+• El historial registra 'admission' (admitted/waited/rejected) y
+  'admission_wait'; get_metrics() devuelve los contadores agregados
+
+POLÍTICAS POR TENANT:
+=====================
+Opcional: SecurePasswordRouter(policies=PolicyRegistry("tenants.json"))
+• La petición indica options['tenant_id']
+• Las reglas del tenant (rango de longitud, clases, safe_mode, PIN estricto,
+  blacklist extra) se compilan una vez en un TenantConfig inmutable; por
+  petición solo hay una búsqueda en diccionario
+• Las clases de caracteres del tenant sustituyen a las include_* de la petición
+• strict_pin=True fuerza PIN_BLINDADO estricto para only_numbers
+• El archivo se recarga en caliente cuando cambia su mtime
+
+FUENTE DE ALEATORIEDAD:
+=======================
+Opcional: SecurePasswordRouter(rng=DeterministicRandomSource(seed))
+• Todos los generadores del router (también los de tenant) usan esa fuente
+• Por defecto SYSTEM_RANDOM (secrets / os.urandom)
+• La fuente determinista (SHAKE-256) solo se puede crear con
+  RANDOM_SOURCE_MODE=test|benchmark; con una semilla fija las ejecuciones
+  de un solo hilo se reproducen byte a byte
 
 MODO DE USO:
 ============
@@ -185,14 +271,19 @@ pytest test_secure_router.py -v
 
 import sys
 import math
+import time
+import heapq
 import logging
+import warnings
+import threading
 from datetime import datetime
-from typing import Dict, Tuple, Optional, Any
+from operator import itemgetter
+from typing import Dict, List, Tuple, Optional, Any, Union
 from enum import Enum
 
 # Imports de módulos locales
 try:
-    from security_pass import generate_password, calculate_entropy, get_entropy_strength
+    from security_pass import generate_password, exact_entropy, get_entropy_strength
 except ImportError as e:
     raise ImportError(f"No se pudo importar security_pass: {e}")
 
@@ -201,6 +292,39 @@ try:
 except ImportError as e:
     raise ImportError(f"No se pudo importar generador_pin: {e}")
 
+try:
+    from generador_token import GeneradorToken, TOKEN_ENCODINGS, TOKEN_MIN_BYTES, TOKEN_MAX_BYTES
+except ImportError as e:
+    raise ImportError(f"No se pudo importar generador_token: {e}")
+
+try:
+    from generador_passphrase import (
+        GeneradorPassphrase, abrir_lista, CAPITALIZATIONS,
+        PASSPHRASE_MIN_WORDS, PASSPHRASE_MAX_WORDS,
+    )
+except ImportError as e:
+    raise ImportError(f"No se pudo importar generador_passphrase: {e}")
+
+try:
+    from rate_limiter import AdmissionControl, RateLimitExceeded, DEFAULT_CLIENT_ID
+except ImportError as e:
+    raise ImportError(f"No se pudo importar rate_limiter: {e}")
+
+try:
+    from tenant_policy import PolicyRegistry, TenantConfig
+except ImportError as e:
+    raise ImportError(f"No se pudo importar tenant_policy: {e}")
+
+try:
+    from generator_registry import CostProfile, GeneratorRegistry, GeneratorSpec
+except ImportError as e:
+    raise ImportError(f"No se pudo importar generator_registry: {e}")
+
+try:
+    from random_source import RandomSource, resolve as resolve_random_source
+except ImportError as e:
+    raise ImportError(f"No se pudo importar random_source: {e}")
+
 
 # ============================= CONFIGURACIÓN =============================
 
@@ -211,11 +335,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger("SecureRouter")
 
+# Logger de los routers con debug=True: se configura una sola vez aquí para
+# que crear un router no modifique el nivel del logger global.
+debug_logger = logging.getLogger("SecureRouter.debug")
+debug_logger.setLevel(logging.DEBUG)
+
 
 class GeneratorType(Enum):
     """Tipos de generadores disponibles"""
     PIN_BLINDADO = "PIN_BLINDADO"
     STANDARD = "STANDARD"
+    TOKEN = "TOKEN"
+    PASSPHRASE = "PASSPHRASE"
 
 
 # Constantes de decisión
@@ -223,9 +354,135 @@ PIN_MIN_LENGTH = 4
 PIN_MAX_LENGTH = 32
 STANDARD_MIN_LENGTH = 4
 STANDARD_MAX_LENGTH = 32
+TOKEN_DEFAULT_BYTES = 32
+TOKEN_DEFAULT_ENCODING = "base64url"
+PASSPHRASE_DEFAULT_WORDS = 6
+PASSPHRASE_DEFAULT_SEPARATOR = "-"
+PASSPHRASE_DEFAULT_CAPITALIZATION = "lower"
+# Tamaño de la lista EFF, para estimar la entropía si la lista aún no está disponible
+PASSPHRASE_NOMINAL_WORDLIST = 7776
+CALIBRATION_SAMPLES = 200
+
+
+# ============================= REGISTRO DE GENERADORES =============================
+
+# Claves que no describen la forma del resultado: una petición que solo
+# contiene estas claves y min_entropy admite cualquier generador
+_ENTROPY_ONLY_KEYS = frozenset({'min_entropy', 'client_id', 'tenant_id'})
+
+
+def _entropy_only(options: Dict[str, Any]) -> bool:
+    return 'min_entropy' in options and _ENTROPY_ONLY_KEYS.issuperset(options)
+
+
+def _wants_pin(options: Dict[str, Any]) -> bool:
+    return options.get('only_numbers', False) and (
+        options.get('strict_security', False) or options.get('use_pin_armor', False))
+
+
+def _supports_standard(options: Dict[str, Any]) -> bool:
+    return not (options.get('token', False) or options.get('passphrase', False) or _wants_pin(options))
+
+
+def _supports_pin(options: Dict[str, Any]) -> bool:
+    return not (options.get('token', False) or options.get('passphrase', False)) and _wants_pin(options)
+
+
+def _supports_token(options: Dict[str, Any]) -> bool:
+    return options.get('token', False) or _entropy_only(options)
+
+
+def _supports_passphrase(options: Dict[str, Any]) -> bool:
+    return options.get('passphrase', False) or _entropy_only(options)
+
+
+def _entropy_standard(options: Dict[str, Any]) -> float:
+    # Mismos valores por defecto que SecurePasswordRouter._generate_standard
+    return exact_entropy(options.get('length', STANDARD_MIN_LENGTH),
+                         options.get('include_uppercase', True), options.get('include_lowercase', True),
+                         options.get('include_numbers', True), options.get('include_symbols', True),
+                         options.get('safe_mode', True))
+
+
+_pin_entropy = GeneradorPinBlindado()._calcular_entropia_bits
 
 
-# ============================= DECISION MATRIX =============================
+def _entropy_pin(options: Dict[str, Any]) -> float:
+    return _pin_entropy(options.get('length', PIN_MIN_LENGTH),
+                        strict_security=options.get('strict_security', False))
+
+
+def _entropy_token(options: Dict[str, Any]) -> float:
+    return 8.0 * options.get('token_bytes', TOKEN_DEFAULT_BYTES)
+
+
+def _entropy_passphrase(options: Dict[str, Any]) -> Optional[float]:
+    words = options.get('passphrase_words', PASSPHRASE_DEFAULT_WORDS)
+    try:
+        size = len(abrir_lista(options.get('wordlist_path')))
+    except (OSError, ValueError):
+        # Solicitada explícitamente: la generación informará del error de la lista
+        if not options.get('passphrase', False):
+            return None
+        size = PASSPHRASE_NOMINAL_WORDLIST
+    return words * math.log2(size)
+
+
+def _reason_standard(options: Dict[str, Any]) -> str:
+    if not options.get('only_numbers', False):
+        return "Caracteres mixtos: usando generador estándar"
+    return "Solo números estándar (sin restricciones de topología)"
+
+
+def _reason_pin(options: Dict[str, Any]) -> str:
+    if options.get('use_pin_armor', False):
+        return "Usuario solicitó PIN Blindado explícitamente"
+    return "Solo números + seguridad: PIN Blindado (4-32 dígitos)"
+
+
+def _reason_token(options: Dict[str, Any]) -> str:
+    encoding = options.get('token_encoding', TOKEN_DEFAULT_ENCODING)
+    if options.get('token', False):
+        return f"Token solicitado: material de clave {encoding}"
+    return f"Entropía mínima: material de clave {encoding}"
+
+
+def _reason_passphrase(options: Dict[str, Any]) -> str:
+    words = options.get('passphrase_words', PASSPHRASE_DEFAULT_WORDS)
+    if options.get('passphrase', False):
+        return f"Passphrase Diceware solicitada: {words} palabras"
+    return f"Entropía mínima: passphrase Diceware de {words} palabras"
+
+
+def build_default_registry() -> GeneratorRegistry:
+    """
+    Registro con los cuatro generadores integrados.
+
+    Los costes son estimaciones (CPython 3.11, un hilo) hasta calibrar.
+    """
+    return GeneratorRegistry([
+        GeneratorSpec(GeneratorType.STANDARD.value, _supports_standard, _entropy_standard,
+                      CostProfile(60.0, 1.0), _reason_standard,
+                      sample_options={'only_numbers': False, 'length': 16}),
+        GeneratorSpec(GeneratorType.PIN_BLINDADO.value, _supports_pin, _entropy_pin,
+                      CostProfile(90.0, 1.0), _reason_pin,
+                      sample_options={'only_numbers': True, 'length': 6, 'strict_security': True}),
+        GeneratorSpec(GeneratorType.TOKEN.value, _supports_token, _entropy_token,
+                      CostProfile(20.0, 0.03), _reason_token,
+                      sample_options={'token': True}),
+        GeneratorSpec(GeneratorType.PASSPHRASE.value, _supports_passphrase, _entropy_passphrase,
+                      CostProfile(15.0, 0.4), _reason_passphrase,
+                      sample_options={'passphrase': True}),
+    ], aliases={'pin': GeneratorType.PIN_BLINDADO.value})
+
+
+DEFAULT_REGISTRY = build_default_registry()
+
+
+def generator_name(generator_type: Union[GeneratorType, str]) -> str:
+    """Nombre de un generador integrado (GeneratorType) o registrado (str)."""
+    return generator_type.value if isinstance(generator_type, GeneratorType) else generator_type
+
 
 class DecisionMatrix:
     """
@@ -233,10 +490,13 @@ class DecisionMatrix:
     
     Define todas las reglas para elegir qué generador usar.
     Estructura: clara, mantenible, extensible.
+    Las reglas viven en un GeneratorRegistry (DEFAULT_REGISTRY por defecto).
     """
 
     @staticmethod
-    def decide(options: Dict[str, Any]) -> Tuple[GeneratorType, str]:
+    def decide(options: Dict[str, Any], registry: Optional[GeneratorRegistry] = None,
+               count: int = 1, entropies: Optional[Dict[str, Optional[float]]] = None
+               ) -> Tuple[Union[GeneratorType, str], str]:
         """
         Decide qué generador usar basado en las opciones.
         
@@ -246,41 +506,32 @@ class DecisionMatrix:
                 - length (int): Longitud deseada
                 - strict_security (bool): ¿Máxima seguridad?
                 - (opcional) use_pin_armor (bool): Forzar PIN Blindado
+                - (opcional) token (bool): Token / material de clave
+                - (opcional) passphrase (bool): Passphrase Diceware
+                - (opcional) min_entropy (float): Entropía mínima en bits
+            registry: Registro de generadores (DEFAULT_REGISTRY si None)
+            count: Elementos a generar (el coste en lote decide entre candidatos)
+            entropies: Entropías que sustituyen a las del registro (ver GeneratorRegistry.select)
         
         Returns:
-            Tuple[GeneratorType, str]: (tipo_generador, razón_lectura)
+            Tuple[GeneratorType | str, str]: (tipo_generador, razón_lectura);
+            str solo para generadores registrados fuera de GeneratorType
         
         Raises:
-            ValueError: Si opciones inválidas
+            ValueError: Si opciones inválidas o ningún generador las cumple
         """
         # ========== CAPA 1: Validaciones ==========
         DecisionMatrix._validate_options(options)
 
-        # ========== CAPA 2: Override explícito ==========
-        # Si usuario fuerza explícitamente PIN Blindado
-        if options.get('use_pin_armor', False):
-            if options.get('only_numbers', False):
-                return GeneratorType.PIN_BLINDADO, "Usuario solicitó PIN Blindado explícitamente"
-            else:
-                logger.warning("use_pin_armor=True pero no es solo números, usando STANDARD")
+        if options.get('use_pin_armor', False) and not options.get('only_numbers', False):
+            logger.warning("use_pin_armor=True pero no es solo números, usando STANDARD")
 
-        # ========== CAPA 3: Lógica de decisión principal ==========
-        
-        # Si caracteres mixtos → siempre STANDARD
-        if not options.get('only_numbers', False):
-            return GeneratorType.STANDARD, "Caracteres mixtos: usando generador estándar"
-        
-        # Si solo números + strict_security=True → PIN_BLINDADO
-        if options.get('only_numbers', False) and options.get('strict_security', False):
-            length = options.get('length', PIN_MIN_LENGTH)
-            if PIN_MIN_LENGTH <= length <= PIN_MAX_LENGTH:
-                return GeneratorType.PIN_BLINDADO, "Solo números + seguridad: PIN Blindado (4-32 dígitos)"
-            else:
-                raise ValueError(f"Solo números permite 4-32 dígitos, solicitados: {length}")
-        
-        # Si solo números + strict_security=False → STANDARD (números sin topología)
-        if options.get('only_numbers', False):
-            return GeneratorType.STANDARD, "Solo números estándar (sin restricciones de topología)"
+        # ========== CAPA 2: Generador más barato que cumple ==========
+        decision = (registry or DEFAULT_REGISTRY).select(options, count, entropies)
+        try:
+            return GeneratorType(decision.name), decision.reason
+        except ValueError:
+            return decision.name, decision.reason
 
     @staticmethod
     def _validate_options(options: Dict[str, Any]) -> None:
@@ -304,13 +555,82 @@ class DecisionMatrix:
                 raise ValueError(f"Length máxima es {STANDARD_MAX_LENGTH}, recibido: {length}")
 
         # Validar booleans
-        for key in ['only_numbers', 'strict_security', 'use_pin_armor']:
+        for key in ['only_numbers', 'strict_security', 'use_pin_armor', 'token', 'token_checksum', 'passphrase']:
             if key in options and not isinstance(options[key], bool):
                 raise ValueError(f"{key} debe ser bool, recibido: {type(options[key])}")
 
+        if options.get('token', False) and options.get('passphrase', False):
+            raise ValueError("token y passphrase son excluyentes")
+
+        if 'min_entropy' in options:
+            min_entropy = options['min_entropy']
+            if not isinstance(min_entropy, (int, float)) or isinstance(min_entropy, bool) or min_entropy < 0:
+                raise ValueError(f"min_entropy debe ser un número >= 0, recibido: {min_entropy!r}")
+
+        # Validar opciones de token
+        if 'token_bytes' in options:
+            token_bytes = options['token_bytes']
+            if not isinstance(token_bytes, int) or isinstance(token_bytes, bool):
+                raise ValueError(f"token_bytes debe ser int, recibido: {type(token_bytes)}")
+            if not (TOKEN_MIN_BYTES <= token_bytes <= TOKEN_MAX_BYTES):
+                raise ValueError(f"token_bytes debe ser {TOKEN_MIN_BYTES}-{TOKEN_MAX_BYTES}, recibido: {token_bytes}")
+        if 'token_encoding' in options and options['token_encoding'] not in TOKEN_ENCODINGS:
+            raise ValueError(f"token_encoding debe ser uno de {TOKEN_ENCODINGS}, recibido: {options['token_encoding']}")
+        if 'token_prefix' in options and not isinstance(options['token_prefix'], str):
+            raise ValueError(f"token_prefix debe ser str, recibido: {type(options['token_prefix'])}")
+
+        # Validar opciones de passphrase
+        if 'passphrase_words' in options:
+            words = options['passphrase_words']
+            if not isinstance(words, int) or isinstance(words, bool):
+                raise ValueError(f"passphrase_words debe ser int, recibido: {type(words)}")
+            if not (PASSPHRASE_MIN_WORDS <= words <= PASSPHRASE_MAX_WORDS):
+                raise ValueError(f"passphrase_words debe ser {PASSPHRASE_MIN_WORDS}-{PASSPHRASE_MAX_WORDS}, recibido: {words}")
+        for key in ['passphrase_separator', 'wordlist_path']:
+            if key in options and not isinstance(options[key], str):
+                raise ValueError(f"{key} debe ser str, recibido: {type(options[key])}")
+        if 'passphrase_capitalization' in options and options['passphrase_capitalization'] not in CAPITALIZATIONS:
+            raise ValueError(f"passphrase_capitalization debe ser uno de {CAPITALIZATIONS}, "
+                             f"recibido: {options['passphrase_capitalization']}")
+
+        # Validar client_id (control de admisión) y tenant_id (políticas)
+        for key in ['client_id', 'tenant_id']:
+            if key in options and (not isinstance(options[key], str) or not options[key]):
+                raise ValueError(f"{key} debe ser str no vacío, recibido: {options[key]!r}")
+
 
 # ============================= GENERADOR PRINCIPAL =============================
 
+class _HistoryView(list):
+    """Copia del historial que mantiene la API mutable antigua de `history`."""
+
+    def __init__(self, router: "SecurePasswordRouter", entries: List[Dict[str, Any]]):
+        super().__init__(entries)
+        self._router = router
+
+    @staticmethod
+    def _deprecated(method: str) -> None:
+        warnings.warn(f"router.history.{method}() está obsoleto: `history` es una copia "
+                      f"(usar clear_history() / get_history())", DeprecationWarning, stacklevel=3)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        self._deprecated("append")
+        super().append(entry)
+        self._router._record(entry)
+
+    def extend(self, entries) -> None:
+        self._deprecated("extend")
+        entries = list(entries)
+        super().extend(entries)
+        for entry in entries:
+            self._router._record(entry)
+
+    def clear(self) -> None:
+        self._deprecated("clear")
+        super().clear()
+        self._router.clear_history()
+
+
 class SecurePasswordRouter:
     """
     Router inteligente que orquesta la generación de contraseñas/PINs.
@@ -321,23 +641,136 @@ class SecurePasswordRouter:
     - Loguear decisiones (debugging)
     - Guardar history (auditoría)
     - Manejar errores gracefully
+    
+    Thread-safety:
+    - Generadores por hilo (threading.local), creados al primer uso
+    - Historial en shards por hilo, fusionados al leer
+    - AdmissionControl con locks por franja de clientes
     """
 
-    def __init__(self, debug: bool = False, track_history: bool = True):
+    def __init__(self, debug: bool = False, track_history: bool = True,
+                 admission: Optional[AdmissionControl] = None,
+                 policies: Optional[PolicyRegistry] = None,
+                 registry: Optional[GeneratorRegistry] = None,
+                 calibrate: bool = False,
+                 rng: Optional[RandomSource] = None):
         """
         Inicializa el router.
         
         Args:
             debug: Si True, imprime logs detallados
             track_history: Si True, guarda historial de generaciones
+            admission: Control de admisión por cliente (None = sin límites)
+            policies: Registro de políticas por tenant (None = sin tenants)
+            registry: Registro de generadores (None = DEFAULT_REGISTRY)
+            calibrate: Si True, mide el coste real de cada generador al arrancar
+            rng: Fuente de aleatoriedad de todos los generadores (None = SYSTEM_RANDOM)
         """
         self.debug = debug
         self.track_history = track_history
-        self.history: list = []
-        self.pin_generator = GeneradorPinBlindado()
+        self.admission = admission
+        self.policies = policies
+        self.registry = registry or DEFAULT_REGISTRY
+        self.rng = resolve_random_source(rng)
+        self._logger = debug_logger if debug else logger
+
+        # Estado por hilo: generadores y shard de historial
+        self._local = threading.local()
+        # Registro de shards (solo se bloquea al registrar el shard de un hilo nuevo)
+        self._history_shards: List[List[Dict[str, Any]]] = []
+        self._shards_lock = threading.Lock()
+
+        if calibrate:
+            self.calibrate()
+
+    def _thread_state(self) -> threading.local:
+        """
+        Estado del hilo actual, inicializado al primer uso en ese hilo.
+        """
+        state = self._local
+        if not hasattr(state, 'history'):
+            state.pin_generator = GeneradorPinBlindado(rng=self.rng)
+            state.token_generators = {}
+            state.passphrase_generators = {}
+            state.history = None   # se registra al primer evento (solo con track_history)
+        return state
+
+    @property
+    def pin_generator(self) -> GeneradorPinBlindado:
+        """GeneradorPinBlindado del hilo actual."""
+        return self._thread_state().pin_generator
+
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """
+        Historial fusionado de todos los hilos (copia, orden por timestamp).
+        append()/extend()/clear() sobre la copia se aplican al router con un
+        DeprecationWarning (antes `history` era la lista interna).
+        """
+        return _HistoryView(self, self.get_history())
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        """Añade un evento al shard de historial del hilo actual (sin locks)."""
+        state = self._thread_state()
+        if state.history is None:
+            state.history = []
+            with self._shards_lock:
+                self._history_shards.append(state.history)
+        state.history.append(entry)
+
+    def _admit(self, options: Dict[str, Any], cost: int = 1) -> Dict[str, Any]:
+        """
+        Pasa la petición por el control de admisión (si está configurado).
+        
+        Returns:
+            Campos de admisión para el historial ({} sin control de admisión)
+        
+        Raises:
+            RateLimitExceeded: Si el cliente excede su límite o el tope de concurrencia
+        """
+        if self.admission is None:
+            return {}
+        client_id = options.get('client_id', DEFAULT_CLIENT_ID)
+        waited = self.admission.admit(client_id, cost)
+        if waited:
+            self._logger.debug(f"Cliente '{client_id}' esperó {waited:.3f}s por límite de tasa")
+        return {'admission': 'waited' if waited else 'admitted', 'admission_wait': waited}
+
+    def _tenant_config(self, options: Dict[str, Any]) -> Optional[TenantConfig]:
+        """
+        Configuración compilada del tenant de la petición (None si no indica tenant_id).
+        
+        Raises:
+            ValueError: Si el tenant no existe o no hay registro de políticas
+        """
+        tenant_id = options.get('tenant_id')
+        if tenant_id is None:
+            return None
+        if self.policies is None:
+            raise ValueError("tenant_id requiere un router con registro de políticas (policies)")
+        try:
+            return self.policies.get(tenant_id)
+        except KeyError:
+            raise ValueError(f"Tenant desconocido: {tenant_id}")
 
-        if debug:
-            logger.setLevel(logging.DEBUG)
+    def _decide(self, options: Dict[str, Any], config: Optional[TenantConfig],
+                count: int = 1) -> Tuple[Union[GeneratorType, str], str]:
+        """
+        DecisionMatrix.decide + política del tenant: min_entropy se compara con
+        la entropía de sus clases precompiladas y strict_pin fuerza PIN Blindado.
+        """
+        entropies = None
+        if config is not None:
+            length = options.get('length', config.default_length)
+            entropies = {
+                GeneratorType.STANDARD.value: config.standard_entropy(length),
+                GeneratorType.PIN_BLINDADO.value: config.pin_entropy(length, options.get('strict_security', False)),
+            }
+        generator_type, decision_reason = DecisionMatrix.decide(options, self.registry, count, entropies)
+        if (config is not None and config.strict_pin and generator_type == GeneratorType.STANDARD
+                and options.get('only_numbers', False)):
+            return GeneratorType.PIN_BLINDADO, f"Política del tenant '{config.tenant_id}': PIN estricto"
+        return generator_type, decision_reason
 
     def generate(self, options: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -370,25 +803,27 @@ class SecurePasswordRouter:
         Raises:
             ValueError: Si opciones inválidas
             RuntimeError: Si generación falla
+            RateLimitExceeded: Si el control de admisión rechaza la petición
         """
+        admission = None
         try:
             # ========== FASE 1: VALIDACIÓN DE ENTRADA ==========
             self._validate_options(options)
-            logger.debug(f"Opciones validadas: {options}")
+            self._logger.debug(f"Opciones validadas: {options}")
+            config = self._tenant_config(options)
 
-            # ========== FASE 2: DECISIÓN ==========
-            generator_type, decision_reason = DecisionMatrix.decide(options)
-            logger.info(f"Generator elegido: {generator_type.value} - {decision_reason}")
+            # ========== FASE 2: DECISIÓN Y ADMISIÓN ==========
+            # Se admite después de decidir: una petición inválida no gasta tokens
+            generator_type, decision_reason = self._decide(options, config)
+            self._logger.debug(f"Generator elegido: {generator_name(generator_type)} - {decision_reason}")
+            admission = self._admit(options)
 
             # ========== FASE 3: GENERACIÓN ==========
-            if generator_type == GeneratorType.PIN_BLINDADO:
-                password, entropy = self._generate_pin_armor(options)
-            else:
-                password, entropy = self._generate_standard(options)
+            password, entropy = self._generate_with(generator_type, options, config)
 
             # ========== FASE 4: VALIDACIÓN DE SALIDA ==========
             self._validate_result(password, generator_type, options)
-            logger.debug(f"Resultado validado: {len(password)} chars, {entropy:.2f} bits")
+            self._logger.debug(f"Resultado validado: {len(password)} chars, {entropy:.2f} bits")
 
             # ========== FASE 5: CLASIFICACIÓN DE FORTALEZA ==========
             strength_label, strength_desc = get_entropy_strength(entropy)
@@ -399,7 +834,7 @@ class SecurePasswordRouter:
                 'entropy': entropy,
                 'strength': strength_label,
                 'strength_description': strength_desc,
-                'generator': generator_type.value,
+                'generator': generator_name(generator_type),
                 'decision_reason': decision_reason,
                 'length': len(password),
                 'validation': True,
@@ -408,63 +843,317 @@ class SecurePasswordRouter:
 
             # ========== FASE 7: LOGGING Y HISTORIAL ==========
             if self.track_history:
-                self.history.append({
+                self._record({
                     'timestamp': result['timestamp'],
                     'options': options,
-                    'generator': generator_type.value,
+                    'generator': generator_name(generator_type),
                     'entropy': entropy,
                     'decision_reason': decision_reason,
-                    'success': True
+                    'success': True,
+                    **admission
                 })
-                logger.debug(f"Historial actualizado. Total: {len(self.history)} generaciones")
+                self._logger.debug("Historial actualizado")
 
             return result
 
         except (ValueError, RuntimeError) as e:
-            logger.error(f"Error durante generación: {e}")
+            self._logger.error(f"Error durante generación: {e}")
             if self.track_history:
-                self.history.append({
+                entry = {
                     'timestamp': datetime.now(),
                     'options': options,
                     'error': str(e),
                     'success': False
-                })
+                }
+                if isinstance(e, RateLimitExceeded):
+                    entry['admission'] = 'rejected'
+                self._record(entry)
             raise
 
-    def _generate_pin_armor(self, options: Dict[str, Any]) -> Tuple[str, float]:
+        finally:
+            if admission:
+                self.admission.release()
+
+    def _generate_with(self, generator_type: Union[GeneratorType, str], options: Dict[str, Any],
+                       config: Optional[TenantConfig] = None) -> Tuple[str, float]:
+        """
+        Genera un elemento con el generador elegido.
+        
+        Returns:
+            Tuple[password, entropy]
+        """
+        if generator_type == GeneratorType.PIN_BLINDADO:
+            return self._generate_pin_armor(options, config)
+        if generator_type == GeneratorType.TOKEN:
+            return self._generate_token(options)
+        if generator_type == GeneratorType.PASSPHRASE:
+            return self._generate_passphrase(options)
+        if generator_type == GeneratorType.STANDARD:
+            return self._generate_standard(options, config)
+        try:
+            return self.registry.get(generator_type).generate(options)
+        except (KeyError, TypeError) as e:
+            raise RuntimeError(f"Generador registrado sin función generate: {generator_type} ({e})")
+
+    def _generate_pin_armor(self, options: Dict[str, Any],
+                            config: Optional[TenantConfig] = None) -> Tuple[str, float]:
         """
         Genera PIN usando GeneradorPinBlindado con opciones de seguridad.
         
         Args:
             options: Debe contener 'length' y opcionalmente 'strict_security'
+            config: Política compilada del tenant (opcional)
         
         Returns:
             Tuple[password, entropy]
         """
-        length = options.get('length', PIN_MIN_LENGTH)
         strict_security = options.get('strict_security', False)
-        
+        if config is not None:
+            length = options.get('length', config.default_length)
+            config.check_length(length)
+            return config.generate_pin(length, strict_security, self.rng)
+
+        length = options.get('length', PIN_MIN_LENGTH)
         if not (PIN_MIN_LENGTH <= length <= PIN_MAX_LENGTH):
             raise ValueError(f"PIN length debe ser {PIN_MIN_LENGTH}-{PIN_MAX_LENGTH}, recibido: {length}")
 
         try:
-            pin = self.pin_generator.generar(length, strict_security=strict_security)
-            entropy = self.pin_generator._calcular_entropia_bits(length, strict_security=strict_security)
-            logger.debug(f"PIN Blindado generado: {length} chars, {entropy:.2f} bits, strict_security={strict_security}")
+            pin_generator = self._thread_state().pin_generator
+            pin = pin_generator.generar(length, strict_security=strict_security)
+            entropy = pin_generator._calcular_entropia_bits(length, strict_security=strict_security)
+            self._logger.debug(f"PIN Blindado generado: {length} chars, {entropy:.2f} bits, strict_security={strict_security}")
             return pin, entropy
         except Exception as e:
             raise RuntimeError(f"Error generando PIN Blindado: {e}")
 
-    def _generate_standard(self, options: Dict[str, Any]) -> Tuple[str, float]:
+    def _token_generator(self, options: Dict[str, Any]) -> GeneradorToken:
+        """
+        Devuelve (cacheado por configuración) el GeneradorToken para las opciones.
+        """
+        key = (
+            options.get('token_encoding', TOKEN_DEFAULT_ENCODING),
+            options.get('token_bytes', TOKEN_DEFAULT_BYTES),
+            options.get('token_prefix', ''),
+            options.get('token_checksum', False),
+        )
+        generators = self._thread_state().token_generators
+        generator = generators.get(key)
+        if generator is None:
+            generator = GeneradorToken(*key, rng=self.rng)
+            generators[key] = generator
+        return generator
+
+    def _generate_token(self, options: Dict[str, Any]) -> Tuple[str, float]:
+        """
+        Genera un token / material de clave con GeneradorToken.
+        
+        Args:
+            options: token_encoding, token_bytes, token_prefix, token_checksum
+        
+        Returns:
+            Tuple[password, entropy]
+        """
+        try:
+            generator = self._token_generator(options)
+            token = generator.generar()
+            entropy = generator.calcular_entropia_bits()
+            self._logger.debug(f"Token generado: {generator.encoding}, {entropy:.0f} bits")
+            return token, entropy
+        except Exception as e:
+            raise RuntimeError(f"Error generando token: {e}")
+
+    def _passphrase_generator(self, options: Dict[str, Any]) -> GeneradorPassphrase:
+        """
+        Devuelve (cacheado por configuración) el GeneradorPassphrase para las opciones.
+        La lista de palabras se abre por mmap una sola vez por proceso.
+        """
+        key = (
+            options.get('wordlist_path'),
+            options.get('passphrase_words', PASSPHRASE_DEFAULT_WORDS),
+            options.get('passphrase_separator', PASSPHRASE_DEFAULT_SEPARATOR),
+            options.get('passphrase_capitalization', PASSPHRASE_DEFAULT_CAPITALIZATION),
+        )
+        generators = self._thread_state().passphrase_generators
+        generator = generators.get(key)
+        if generator is None:
+            generator = GeneradorPassphrase(abrir_lista(key[0]), *key[1:], rng=self.rng)
+            generators[key] = generator
+        return generator
+
+    def _generate_passphrase(self, options: Dict[str, Any]) -> Tuple[str, float]:
+        """
+        Genera una passphrase Diceware con GeneradorPassphrase.
+        
+        Args:
+            options: passphrase_words, passphrase_separator,
+                     passphrase_capitalization, wordlist_path
+        
+        Returns:
+            Tuple[password, entropy]
+        """
+        try:
+            generator = self._passphrase_generator(options)
+            passphrase = generator.generar()
+            entropy = generator.calcular_entropia_bits()
+            self._logger.debug(f"Passphrase generada: {generator.num_palabras} palabras, {entropy:.2f} bits")
+            return passphrase, entropy
+        except Exception as e:
+            raise RuntimeError(f"Error generando passphrase: {e}")
+
+    def generate_batch(self, options: Dict[str, Any], count: int) -> Dict[str, Any]:
+        """
+        Modo masivo: genera `count` credenciales con la misma configuración.
+        
+        TOKEN y PASSPHRASE usan su modo de lote (un solo bloque aleatorio);
+        el resto de generadores se invoca `count` veces. El historial recibe
+        una única entrada por lote. Con control de admisión, el lote consume
+        `count` tokens del cliente.
+        
+        Returns:
+            {
+                'passwords': List[str],
+                'entropy': float,       # Bits por elemento
+                'strength': str,
+                'generator': str,
+                'decision_reason': str,
+                'count': int,
+                'timestamp': datetime
+            }
+        """
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            raise ValueError(f"count debe ser int >= 1, recibido: {count}")
+        self._validate_options(options)
+        config = self._tenant_config(options)
+        generator_type, decision_reason = self._decide(options, config, count)
+
+        try:
+            admission = self._admit(options, count)
+        except RateLimitExceeded as e:
+            if self.track_history:
+                self._record({
+                    'timestamp': datetime.now(),
+                    'options': options,
+                    'error': str(e),
+                    'success': False,
+                    'admission': 'rejected'
+                })
+            raise
+
+        try:
+            passwords, entropy = self._generate_many(generator_type, options, count, config)
+        except (ValueError, FileNotFoundError) as e:
+            raise RuntimeError(f"Error generando lote {generator_name(generator_type)}: {e}")
+        finally:
+            if admission:
+                self.admission.release()
+
+        strength_label, _ = get_entropy_strength(entropy)
+        timestamp = datetime.now()
+
+        if self.track_history:
+            self._record({
+                'timestamp': timestamp,
+                'options': options,
+                'generator': generator_name(generator_type),
+                'entropy': entropy,
+                'decision_reason': f"{decision_reason} (lote de {count})",
+                'success': True,
+                **admission
+            })
+
+        return {
+            'passwords': passwords,
+            'entropy': entropy,
+            'strength': strength_label,
+            'generator': generator_name(generator_type),
+            'decision_reason': decision_reason,
+            'count': count,
+            'timestamp': timestamp
+        }
+
+    def _generate_many(self, generator_type: Union[GeneratorType, str], options: Dict[str, Any],
+                       count: int, config: Optional[TenantConfig] = None) -> Tuple[List[str], float]:
+        """
+        Genera `count` elementos: modo lote para TOKEN y PASSPHRASE,
+        `count` llamadas individuales para el resto.
+        
+        Returns:
+            Tuple[passwords, entropy]
+        """
+        if generator_type == GeneratorType.TOKEN:
+            generator = self._token_generator(options)
+            return generator.generar_lote(count), generator.calcular_entropia_bits()
+        if generator_type == GeneratorType.PASSPHRASE:
+            generator = self._passphrase_generator(options)
+            return generator.generar_lote(count), generator.calcular_entropia_bits()
+
+        passwords = []
+        entropy = 0.0
+        for _ in range(count):
+            password, entropy = self._generate_with(generator_type, options, config)
+            passwords.append(password)
+        return passwords, entropy
+
+    def calibrate(self, samples: int = CALIBRATION_SAMPLES) -> Dict[str, CostProfile]:
+        """
+        Mide el coste real (µs/elemento, individual y en lote) de cada
+        generador del registro con sus sample_options y lo actualiza.
+        
+        Los generadores que fallan (p. ej. passphrase sin lista) conservan
+        su coste estimado.
+        
+        Returns:
+            Los perfiles medidos, por nombre de generador
+        """
+        measured = {}
+        for spec in self.registry.specs():
+            if spec.sample_options is None:
+                continue
+            try:
+                generator_type = GeneratorType(spec.name)
+            except ValueError:
+                generator_type = spec.name
+            try:
+                self._generate_with(generator_type, spec.sample_options)   # calentamiento
+                start = time.perf_counter()
+                for _ in range(samples):
+                    self._generate_with(generator_type, spec.sample_options)
+                single = time.perf_counter() - start
+                start = time.perf_counter()
+                self._generate_many(generator_type, spec.sample_options, samples)
+                batch = time.perf_counter() - start
+            except (ValueError, RuntimeError, OSError) as e:
+                self._logger.warning(f"Calibración omitida para {spec.name}: {e}")
+                continue
+            measured[spec.name] = CostProfile(1e6 * single / samples, min(1.0, batch / single))
+
+        for name, cost in measured.items():
+            self.registry.set_cost(name, cost)
+        self._logger.info(f"Costes calibrados: " + ", ".join(
+            f"{name}={cost.us_per_item:.1f}µs" for name, cost in measured.items()))
+        return measured
+
+    def generate_token_batch(self, options: Dict[str, Any], count: int) -> Dict[str, Any]:
+        """Atajo de generate_batch para tokens (fuerza token=True)."""
+        return self.generate_batch(dict(options, token=True), count)
+
+    def _generate_standard(self, options: Dict[str, Any],
+                           config: Optional[TenantConfig] = None) -> Tuple[str, float]:
         """
         Genera contraseña usando generate_password de security_pass.py.
         
         Args:
             options: Configuración para generate_password
+            config: Política compilada del tenant (usa sus clases precompiladas)
         
         Returns:
             Tuple[password, entropy]
         """
+        if config is not None:
+            length = options.get('length', config.default_length)
+            config.check_length(length)
+            return config.generate_password(length, self.rng)
+
         # Mapear opciones del router a parámetros de generate_password
         size = options.get('length', STANDARD_MIN_LENGTH)
         include_uppercase = options.get('include_uppercase', True)
@@ -480,9 +1169,10 @@ class SecurePasswordRouter:
                 include_lowercase=include_lowercase,
                 include_numbers=include_numbers,
                 include_symbols=include_symbols,
-                safe_mode=safe_mode
+                safe_mode=safe_mode,
+                rng=self.rng
             )
-            logger.debug(f"Standard generado: {size} chars, {entropy:.2f} bits, {strength}")
+            self._logger.debug(f"Standard generado: {size} chars, {entropy:.2f} bits, {strength}")
             return password, entropy
         except Exception as e:
             raise RuntimeError(f"Error generando password standard: {e}")
@@ -497,6 +1187,8 @@ class SecurePasswordRouter:
         DecisionMatrix._validate_options(options)
 
         # Validaciones adicionales del router
+        if options.get('token', False) or options.get('passphrase', False):
+            return
         if not options.get('only_numbers', False):
             # Si no solo números, validar opciones de caracteres
             char_options = [
@@ -508,7 +1200,8 @@ class SecurePasswordRouter:
             if not any(char_options):
                 raise ValueError("Al menos un tipo de carácter debe estar habilitado")
 
-    def _validate_result(self, password: str, generator_type: GeneratorType, options: Dict[str, Any]) -> None:
+    def _validate_result(self, password: str, generator_type: Union[GeneratorType, str],
+                         options: Dict[str, Any]) -> None:
         """
         Validación post-generación del resultado.
         
@@ -526,7 +1219,18 @@ class SecurePasswordRouter:
                 raise RuntimeError(f"PIN debe ser solo dígitos, recibido: {password}")
             if not (PIN_MIN_LENGTH <= len(password) <= PIN_MAX_LENGTH):
                 raise RuntimeError(f"PIN length inválida: {len(password)}")
-        else:
+        elif generator_type == GeneratorType.TOKEN:
+            generator = self._token_generator(options)
+            if not password.startswith(generator.prefix):
+                raise RuntimeError(f"Token sin prefijo esperado: {generator.prefix}")
+            if len(password) != generator.longitud_token():
+                raise RuntimeError(f"Token length inválida: {len(password)}")
+        elif generator_type == GeneratorType.PASSPHRASE:
+            generator = self._passphrase_generator(options)
+            if not generator.es_valida(password):
+                raise RuntimeError(f"Passphrase inválida: se esperaban {generator.num_palabras} "
+                                   f"palabras de la lista")
+        elif generator_type == GeneratorType.STANDARD:
             if len(password) < STANDARD_MIN_LENGTH:
                 raise RuntimeError(f"Password muy corta: {len(password)}")
             if len(password) > STANDARD_MAX_LENGTH:
@@ -536,15 +1240,34 @@ class SecurePasswordRouter:
         """
         Retorna historial de generaciones.
         
+        Fusiona los shards de todos los hilos por timestamp (cada shard ya
+        está ordenado porque cada hilo solo añade al final del suyo).
+        
         Returns:
             Lista de eventos de generación
         """
-        return self.history.copy()
+        with self._shards_lock:
+            shards = [list(shard) for shard in self._history_shards]
+        return list(heapq.merge(*shards, key=itemgetter('timestamp')))
 
     def clear_history(self) -> None:
         """Limpia el historial"""
-        self.history.clear()
-        logger.info("Historial limpiado")
+        with self._shards_lock:
+            for shard in self._history_shards:
+                shard.clear()
+        self._logger.info("Historial limpiado")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Métricas del control de admisión.
+        
+        Returns:
+            {'admitted', 'rejected', 'waited', 'wait_seconds', 'clients',
+             'concurrency_rejected'} o {} si el router no tiene control de admisión
+        """
+        if self.admission is None:
+            return {}
+        return self.admission.metrics()
 
 
 # ============================= INTERFAZ CLI =============================
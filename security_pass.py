@@ -5,12 +5,30 @@ Includes input validation, security best practices, and entropy calculation.
 Security standards compliance:
 - OWASP: Complex character requirements
 - NIST SP 800-63B: Minimum entropy recommendations
-- Uses secrets module for cryptographically secure randomness
+- Uses secrets module for cryptographically secure randomness (every function
+  accepts an `rng` RandomSource; see random_source.py for the deterministic
+  test/benchmark mode)
+
+Entropy is exact: the "at least one character of each selected class" rule
+shrinks the keyspace below pool^length, so the keyspace is counted with
+inclusion-exclusion (exact_keyspace). The resulting entropies for every
+length 4-128, class subset and safe_mode are precomputed once per process
+and kept in memory, so exact_entropy() is a single table lookup. The table
+is only written to disk on request: entropy_table(path), or $KEYSPACE_CACHE.
+Passwords are sampled uniformly over that constrained keyspace (candidates
+missing a class are rejected), so the reported entropy is exact.
 """
+import os
+import zlib
+import array
 import string
-import secrets
+import struct
 import sys
 import math
+from functools import lru_cache
+from itertools import combinations, islice
+
+from random_source import resolve
 
 
 # Security constants
@@ -28,6 +46,25 @@ NUMBERS = string.digits
 SAFE_SYMBOLS = "!#$%&*+-=?@^_~"
 UNSAFE_SYMBOLS = "\"'`\\|;<>"
 
+# Strength levels (OWASP): entropy < threshold[i] -> level[i], else the last one
+STRENGTH_THRESHOLDS = (28, 36, 60)
+STRENGTH_LEVELS = (
+    ("⚠️  WEAK", "Crackable in hours"),
+    ("⚡ FAIR", "Crackable in days/weeks"),
+    ("✅ GOOD", "Crackable in years (acceptable)"),
+    ("🔐 STRONG", "Practically secure"),
+)
+
+# Exact entropy table (see exact_entropy)
+KEYSPACE_CACHE_PATH = os.environ.get("KEYSPACE_CACHE")   # None: memory only
+_KEYSPACE_MAGIC = b"KSPC"
+_KEYSPACE_VERSION = 1
+_KEYSPACE_HEADER = struct.Struct("<4sIIII")   # magic, version, fingerprint, min length, max length
+_KEYSPACE_COMBINATIONS = 32                   # 4 class flags x safe_mode
+
+# Random bytes drawn per token_bytes call by the streaming API
+RANDOM_BLOCK_SIZE = 4096
+
 
 def calculate_entropy(password_length, character_set_size):
     """
@@ -47,6 +84,147 @@ def calculate_entropy(password_length, character_set_size):
     return password_length * math.log2(character_set_size)
 
 
+def exact_keyspace(length, class_sizes, pool=None):
+    """
+    Number of strings of `length` over the union of disjoint classes that
+    contain at least one character of every class (inclusion-exclusion).
+
+    Args:
+        length (int): String length
+        class_sizes (sequence of int): Size of each required class
+        pool (int): Alphabet size, if larger than the required classes
+            (default: sum(class_sizes))
+
+    Returns:
+        int: Exact keyspace size (arbitrary precision)
+    """
+    if pool is None:
+        pool = sum(class_sizes)
+    total = 0
+    for k in range(len(class_sizes) + 1):
+        sign = -1 if k % 2 else 1
+        for excluded in combinations(class_sizes, k):
+            total += sign * (pool - sum(excluded)) ** length
+    return total
+
+
+def _combination_index(include_uppercase, include_lowercase, include_numbers,
+                       include_symbols, safe_mode):
+    mask = (bool(include_uppercase) | bool(include_lowercase) << 1
+            | bool(include_numbers) << 2 | bool(include_symbols) << 3)
+    return mask << 1 | (bool(safe_mode) and bool(include_symbols))
+
+
+def _combination_classes(index):
+    """Inverse of _combination_index: the flags as character_classes() arguments."""
+    mask, safe_mode = index >> 1, index & 1
+    return (bool(mask & 1), bool(mask & 2), bool(mask & 4), bool(mask & 8), bool(safe_mode))
+
+
+def _keyspace_fingerprint():
+    alphabets = "\0".join([UPPERCASE_LETTERS, LOWERCASE_LETTERS, NUMBERS, SAFE_SYMBOLS, UNSAFE_SYMBOLS])
+    return zlib.crc32(alphabets.encode("utf-8"))
+
+
+def _build_entropy_table():
+    """Exact entropy for every (length, class subset, safe_mode); 0.0 for empty subsets."""
+    table = array.array("d")
+    for length in range(MIN_PASSWORD_LENGTH, MAX_PASSWORD_LENGTH + 1):
+        for index in range(_KEYSPACE_COMBINATIONS):
+            flags = _combination_classes(index)
+            if not any(flags[:4]) or (flags[4] and not flags[3]):
+                table.append(0.0)
+                continue
+            classes, _ = character_classes(*flags)
+            table.append(math.log2(exact_keyspace(length, [len(c) for c in classes])))
+    return table
+
+
+def _load_entropy_table(path):
+    """Read the cache file; None if it is missing, stale or corrupt."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _KEYSPACE_HEADER.size:
+        return None
+    magic, version, fingerprint, low, high = _KEYSPACE_HEADER.unpack_from(data)
+    if (magic, version, fingerprint, low, high) != (
+            _KEYSPACE_MAGIC, _KEYSPACE_VERSION, _keyspace_fingerprint(),
+            MIN_PASSWORD_LENGTH, MAX_PASSWORD_LENGTH):
+        return None
+    table = array.array("d")
+    table.frombytes(data[_KEYSPACE_HEADER.size:])
+    if len(table) != (high - low + 1) * _KEYSPACE_COMBINATIONS:
+        return None
+    return table
+
+
+def _save_entropy_table(path, table):
+    """Write the cache file atomically; a read-only location just skips the cache."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(_KEYSPACE_HEADER.pack(_KEYSPACE_MAGIC, _KEYSPACE_VERSION, _keyspace_fingerprint(),
+                                          MIN_PASSWORD_LENGTH, MAX_PASSWORD_LENGTH))
+            f.write(table.tobytes())
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def _cached_entropy_table(path):
+    if path is None:
+        return _build_entropy_table()
+    table = _load_entropy_table(path)
+    if table is None:
+        table = _build_entropy_table()
+        _save_entropy_table(path, table)
+    return table
+
+
+def entropy_table(path=None):
+    """
+    Exact entropy table, built on first use and kept in memory.
+
+    Args:
+        path (str): Optional cache file (default: $KEYSPACE_CACHE, unset =
+            nothing is written); loaded if valid, otherwise built and saved
+
+    Returns:
+        array: Entropies indexed by (length - MIN_PASSWORD_LENGTH) * 32 + combination
+    """
+    return _cached_entropy_table(path or KEYSPACE_CACHE_PATH)
+
+
+def exact_entropy(length, include_uppercase=True, include_lowercase=True,
+                  include_numbers=True, include_symbols=True, safe_mode=False):
+    """
+    Exact entropy (bits) of a password with at least one character of each
+    selected class: log2(exact_keyspace). O(1) lookup for lengths 4-128.
+
+    Returns:
+        float: Entropy in bits
+
+    Raises:
+        ValueError: If no character type is selected
+    """
+    index = _combination_index(include_uppercase, include_lowercase, include_numbers,
+                               include_symbols, safe_mode)
+    if index < 2:
+        raise ValueError("At least one character type must be included")
+    if MIN_PASSWORD_LENGTH <= length <= MAX_PASSWORD_LENGTH:
+        return entropy_table()[(length - MIN_PASSWORD_LENGTH) * _KEYSPACE_COMBINATIONS + index]
+    classes, _ = character_classes(*_combination_classes(index))
+    keyspace = exact_keyspace(length, [len(c) for c in classes])
+    return math.log2(keyspace) if keyspace > 0 else 0.0
+
+
 def get_entropy_strength(entropy_bits):
     """
     Classify password strength based on entropy bits.
@@ -63,19 +241,70 @@ def get_entropy_strength(entropy_bits):
     Returns:
         tuple: (strength_level, description)
     """
-    if entropy_bits < 28:
-        return "⚠️  WEAK", "Crackable in hours"
-    elif entropy_bits < 36:
-        return "⚡ FAIR", "Crackable in days/weeks"
-    elif entropy_bits < 60:
-        return "✅ GOOD", "Crackable in years (acceptable)"
-    else:
-        return "🔐 STRONG", "Practically secure"
+    for threshold, level in zip(STRENGTH_THRESHOLDS, STRENGTH_LEVELS):
+        if entropy_bits < threshold:
+            return level
+    return STRENGTH_LEVELS[-1]
+
+
+@lru_cache(maxsize=None)
+def character_classes(include_uppercase=True, include_lowercase=True,
+                      include_numbers=True, include_symbols=True, safe_mode=False):
+    """
+    Character classes and combined pool for a set of options.
+
+    Cached: each combination of flags is built only once per process.
+
+    Returns:
+        tuple: (classes, pool) - tuple of per-class strings and their concatenation
+
+    Raises:
+        ValueError: If no character type is included
+    """
+    classes = []
+    if include_uppercase:
+        classes.append(UPPERCASE_LETTERS)
+    if include_lowercase:
+        classes.append(LOWERCASE_LETTERS)
+    if include_numbers:
+        classes.append(NUMBERS)
+    if include_symbols:
+        classes.append(SAFE_SYMBOLS if safe_mode else (SAFE_SYMBOLS + UNSAFE_SYMBOLS))
+
+    if not classes:
+        raise ValueError("At least one character type must be included")
+    return tuple(classes), ''.join(classes)
+
+
+def build_password(size, classes, pool, rng=None):
+    """
+    Build a password from precomputed classes (see character_classes).
+
+    Every character is drawn from the pool and candidates missing a class
+    are rejected, so the password is uniform over the constrained keyspace
+    whose size exact_entropy() reports.
+
+    Args:
+        rng (RandomSource): Randomness source (default: system CSPRNG)
+
+    Returns:
+        str: The password
+    """
+    return next(_password_stream(size, classes, pool, max(64, 4 * size), resolve(rng)))
+
+
+def _validate_size(size):
+    if not isinstance(size, int):
+        raise ValueError("Size must be an integer")
+    if size < MIN_PASSWORD_LENGTH:
+        raise ValueError(f"Minimum length is {MIN_PASSWORD_LENGTH} characters")
+    if size > MAX_PASSWORD_LENGTH:
+        raise ValueError(f"Maximum length is {MAX_PASSWORD_LENGTH} characters")
 
 
 def generate_password(size=12, include_uppercase=True, include_lowercase=True,
                       include_numbers=True, include_symbols=True, 
-                      safe_mode=False):
+                      safe_mode=False, rng=None):
     """
     Generate a cryptographically secure password.
 
@@ -86,6 +315,7 @@ def generate_password(size=12, include_uppercase=True, include_lowercase=True,
         include_numbers (bool): Include numbers (0-9)
         include_symbols (bool): Include symbols
         safe_mode (bool): Exclude problematic symbols (", ', `, \\)
+        rng (RandomSource): Randomness source (default: system CSPRNG)
 
     Returns:
         tuple: (password_str, entropy_bits, strength_description)
@@ -94,57 +324,91 @@ def generate_password(size=12, include_uppercase=True, include_lowercase=True,
         ValueError: If parameters are invalid
     """
     # Validate size
-    if not isinstance(size, int):
-        raise ValueError("Size must be an integer")
-    
-    if size < MIN_PASSWORD_LENGTH:
-        raise ValueError(f"Minimum length is {MIN_PASSWORD_LENGTH} characters")
-    
-    if size > MAX_PASSWORD_LENGTH:
-        raise ValueError(f"Maximum length is {MAX_PASSWORD_LENGTH} characters")
+    _validate_size(size)
 
-    # Build character set based on options
-    character_pool = ""
+    # Character set based on options (built once per combination)
+    flags = (bool(include_uppercase), bool(include_lowercase), bool(include_numbers),
+             bool(include_symbols), bool(safe_mode) if include_symbols else False)
+    classes, character_pool = character_classes(*flags)
+
+    # Uniform over the passwords containing every selected type
+    password_str = build_password(size, classes, character_pool, rng)
     
-    if include_uppercase:
-        character_pool += UPPERCASE_LETTERS
-    if include_lowercase:
-        character_pool += LOWERCASE_LETTERS
-    if include_numbers:
-        character_pool += NUMBERS
-    if include_symbols:
-        character_pool += SAFE_SYMBOLS if safe_mode else (SAFE_SYMBOLS + UNSAFE_SYMBOLS)
+    # Exact entropy of the constrained keyspace (table lookup)
+    entropy = exact_entropy(size, *flags)
+    strength, description = get_entropy_strength(entropy)
 
-    if not character_pool:
-        raise ValueError("At least one character type must be included")
+    return password_str, entropy, strength
 
-    # Build password ensuring at least one character from each selected type
-    password = []
-    
-    if include_uppercase:
-        password.append(secrets.choice(UPPERCASE_LETTERS))
-    if include_lowercase:
-        password.append(secrets.choice(LOWERCASE_LETTERS))
-    if include_numbers:
-        password.append(secrets.choice(NUMBERS))
-    if include_symbols:
-        symbols_set = SAFE_SYMBOLS if safe_mode else (SAFE_SYMBOLS + UNSAFE_SYMBOLS)
-        password.append(secrets.choice(symbols_set))
 
-    # Fill remaining positions with random characters from the complete pool
-    remaining_length = size - len(password)
-    password += [secrets.choice(character_pool) for _ in range(remaining_length)]
+@lru_cache(maxsize=None)
+def _byte_translation(alphabet):
+    """
+    bytes.translate() arguments mapping random bytes uniformly onto `alphabet`.
 
-    # Shuffle using cryptographically secure random
-    secrets.SystemRandom().shuffle(password)
-    
-    password_str = ''.join(password)
-    
-    # Calculate entropy
-    entropy = calculate_entropy(len(password_str), len(character_pool))
-    strength, description = get_entropy_strength(entropy)
+    Bytes >= 256 - 256 % len(alphabet) are deleted (rejection sampling), so
+    every remaining byte maps to each character with the same probability.
+    """
+    encoded = alphabet.encode('ascii')
+    limit = 256 - 256 % len(encoded)
+    table = bytes(encoded[b % len(encoded)] for b in range(256))
+    return table, bytes(range(limit, 256))
 
-    return password_str, entropy, strength
+
+def iter_passwords(size=12, include_uppercase=True, include_lowercase=True,
+                   include_numbers=True, include_symbols=True, safe_mode=False,
+                   block_size=RANDOM_BLOCK_SIZE, rng=None):
+    """
+    Infinite iterator of passwords (use itertools.islice to take N).
+
+    Randomness is drawn in blocks (rng.token_bytes, os.urandom by default) and
+    mapped to the pool with bytes.translate, so there is no per-character
+    call. Candidates missing a selected class are rejected, which makes every
+    yielded password uniform over the constrained keyspace (at least one
+    character of each class).
+
+    Returns:
+        Iterator[str]: Passwords of `size` characters
+
+    Raises:
+        ValueError: If parameters are invalid
+    """
+    _validate_size(size)
+    classes, pool = character_classes(
+        bool(include_uppercase), bool(include_lowercase), bool(include_numbers),
+        bool(include_symbols), bool(safe_mode) if include_symbols else False)
+    return _password_stream(size, classes, pool, max(block_size, 4 * size), resolve(rng))
+
+
+def _password_stream(size, classes, pool, block_size, rng):
+    table, delete = _byte_translation(pool)
+    token_bytes = rng.token_bytes
+    required = [frozenset(chars) for chars in classes] if len(classes) > 1 else []
+
+    buffer = ''
+    pos = 0
+    while True:
+        if len(buffer) - pos < size:
+            buffer = buffer[pos:] + token_bytes(block_size).translate(table, delete).decode('ascii')
+            pos = 0
+            continue
+        candidate = buffer[pos:pos + size]
+        pos += size
+        for chars in required:
+            if chars.isdisjoint(candidate):
+                break
+        else:
+            yield candidate
+
+
+def iter_password_chunks(chunk_size, **options):
+    """
+    Infinite iterator of lists of `chunk_size` passwords (see iter_passwords).
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be >= 1")
+    passwords = iter_passwords(**options)
+    return iter(lambda: list(islice(passwords, chunk_size)), None)
 
 
 def request_size():
@@ -0,0 +1,302 @@
+"""
+Puntuación Vectorizada de Fortaleza para Exportaciones de Credenciales.
+Archivo: strength_report.py
+
+Equivalente con numpy de security_pass.calculate_entropy /
+get_entropy_strength, pensado para millones de filas:
+
+1. puntuar(longitudes, tamanos_pool)
+   Arrays de longitudes y tamaños de pool -> entropía (log2(pool^longitud)),
+   código de fortaleza (0..3, índice en STRENGTH_LEVELS) e histograma por
+   nivel, en una sola pasada sin bucles en Python.
+
+2. puntuar_passwords(matriz)
+   Matriz uint8 (n, ancho) de contraseñas ASCII rellenas con ceros (ver
+   matriz_passwords). Las clases presentes en cada fila (mayúsculas,
+   minúsculas, dígitos, símbolos seguros / no seguros) se detectan con una
+   tabla byte -> bit y un OR por fila; la entropía es la EXACTA de la
+   política mínima que pudo producir la fila (security_pass.entropy_table,
+   al menos un carácter de cada clase presente) y log2(pool^longitud)
+   fuera del rango 4-128. Un byte fuera de los alfabetos cuenta como
+   símbolo no seguro.
+
+REPORTE (CLI):
+==============
+Lee una exportación CSV o JSONL en bloques de --chunk-size filas (la
+memoria no crece con el archivo) y acumula conteos por nivel e
+histograma de entropía (1 bit por barra) para percentiles aproximados.
+
+Uso:
+    python3 strength_report.py export.csv --column password
+    python3 strength_report.py export.jsonl --length-column length --pool-column pool_size
+    python3 strength_report.py export.csv --chunk-size 200000 --json informe.json
+"""
+
+import os
+import sys
+import csv
+import json
+import argparse
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from security_pass import (
+    LOWERCASE_LETTERS, MAX_PASSWORD_LENGTH, MIN_PASSWORD_LENGTH, NUMBERS,
+    SAFE_SYMBOLS, STRENGTH_LEVELS, STRENGTH_THRESHOLDS, UNSAFE_SYMBOLS,
+    UPPERCASE_LETTERS, entropy_table,
+)
+
+CHUNK_SIZE_POR_DEFECTO = 100_000
+# Histograma de entropía: una barra por bit, la última acumula el resto
+MAX_BITS_HISTOGRAMA = 1024
+FORMATOS = ("csv", "jsonl")
+
+_UMBRALES = np.asarray(STRENGTH_THRESHOLDS, dtype=np.float64)
+NUM_NIVELES = len(STRENGTH_LEVELS)
+
+# Bits de clase por byte (mismo orden que security_pass._combination_index)
+_MAYUS, _MINUS, _DIGITO, _SIMBOLO, _NO_SEGURO = 1, 2, 4, 8, 16
+
+
+def _tabla_clases() -> np.ndarray:
+    tabla = np.full(256, _SIMBOLO | _NO_SEGURO, dtype=np.uint8)
+    tabla[0] = 0   # relleno
+    for alfabeto, bits in ((UPPERCASE_LETTERS, _MAYUS), (LOWERCASE_LETTERS, _MINUS),
+                           (NUMBERS, _DIGITO), (SAFE_SYMBOLS, _SIMBOLO)):
+        tabla[list(alfabeto.encode("ascii"))] = bits
+    return tabla
+
+
+def _pool_por_mascara() -> np.ndarray:
+    pools = np.zeros(32, dtype=np.int64)
+    for mascara in range(32):
+        pools[mascara] = (
+            len(UPPERCASE_LETTERS) * bool(mascara & _MAYUS)
+            + len(LOWERCASE_LETTERS) * bool(mascara & _MINUS)
+            + len(NUMBERS) * bool(mascara & _DIGITO)
+            + (len(SAFE_SYMBOLS) + len(UNSAFE_SYMBOLS) * bool(mascara & _NO_SEGURO))
+            * bool(mascara & _SIMBOLO))
+    return pools
+
+
+_CLASE_BYTE = _tabla_clases()
+_POOL_MASCARA = _pool_por_mascara()
+
+
+def entropia(longitudes, tamanos_pool) -> np.ndarray:
+    """
+    calculate_entropy vectorizada: longitud * log2(pool), 0.0 si pool <= 1
+    o longitud <= 0.
+    """
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    pools = np.asarray(tamanos_pool, dtype=np.float64)
+    validos = (pools > 1) & (longitudes > 0)
+    return np.where(validos, longitudes * np.log2(np.where(validos, pools, 2.0)), 0.0)
+
+
+def codigos_fortaleza(entropias) -> np.ndarray:
+    """
+    get_entropy_strength vectorizada: índice en STRENGTH_LEVELS (uint8).
+    """
+    entropias = np.asarray(entropias, dtype=np.float64)
+    codigos = np.searchsorted(_UMBRALES, entropias, side="right").astype(np.uint8)
+    codigos[np.isnan(entropias)] = NUM_NIVELES - 1   # como la versión escalar
+    return codigos
+
+
+def histograma_niveles(codigos) -> np.ndarray:
+    """Conteo por nivel de fortaleza (longitud NUM_NIVELES)."""
+    return np.bincount(np.asarray(codigos, dtype=np.intp), minlength=NUM_NIVELES)
+
+
+def puntuar(longitudes, tamanos_pool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns:
+        (entropías float64, códigos uint8, histograma por nivel)
+    """
+    entropias = entropia(longitudes, tamanos_pool)
+    codigos = codigos_fortaleza(entropias)
+    return entropias, codigos, histograma_niveles(codigos)
+
+
+def matriz_passwords(passwords: Sequence[str], ancho: Optional[int] = None) -> np.ndarray:
+    """
+    Contraseñas -> matriz uint8 (n, ancho) con relleno de ceros (UTF-8;
+    se trunca a `ancho` si se indica).
+    """
+    codificadas = [p.encode("utf-8") for p in passwords]
+    if ancho is None:
+        ancho = max(map(len, codificadas), default=0) or 1
+    fijas = np.array(codificadas, dtype=f"S{ancho}")
+    return fijas.view(np.uint8).reshape(len(codificadas), ancho)
+
+
+def puntuar_passwords(matriz: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Puntúa una matriz de matriz_passwords.
+
+    Returns:
+        (entropías float64, códigos uint8, histograma por nivel)
+    """
+    matriz = np.asarray(matriz, dtype=np.uint8)
+    longitudes = np.count_nonzero(matriz, axis=1)
+    mascaras = np.bitwise_or.reduce(_CLASE_BYTE[matriz], axis=1)
+
+    # Respaldo fuera de la tabla exacta: log2(pool^longitud)
+    entropias = entropia(longitudes, _POOL_MASCARA[mascaras])
+
+    en_tabla = ((longitudes >= MIN_PASSWORD_LENGTH) & (longitudes <= MAX_PASSWORD_LENGTH)
+                & ((mascaras & 15) > 0))
+    if en_tabla.any():
+        clases = (mascaras & 15).astype(np.intp)
+        seguro = ((mascaras & _SIMBOLO) > 0) & ((mascaras & _NO_SEGURO) == 0)
+        indices = ((longitudes - MIN_PASSWORD_LENGTH) * 32 + (clases << 1) + seguro)[en_tabla]
+        entropias[en_tabla] = np.frombuffer(entropy_table(), dtype=np.float64)[indices]
+
+    codigos = codigos_fortaleza(entropias)
+    return entropias, codigos, histograma_niveles(codigos)
+
+
+# --- REPORTE EN BLOQUES ---
+
+class AcumuladorReporte:
+    """Conteos por nivel e histograma de entropía acumulados bloque a bloque."""
+
+    def __init__(self):
+        self.filas = 0
+        self.niveles = np.zeros(NUM_NIVELES, dtype=np.int64)
+        self.bits = np.zeros(MAX_BITS_HISTOGRAMA + 1, dtype=np.int64)
+        self.suma = 0.0
+        self.minimo = float("inf")
+        self.maximo = 0.0
+
+    def agregar(self, entropias: np.ndarray, histograma: np.ndarray) -> None:
+        if not len(entropias):
+            return
+        self.filas += len(entropias)
+        self.niveles += histograma
+        barras = np.minimum(entropias, MAX_BITS_HISTOGRAMA).astype(np.intp)
+        self.bits += np.bincount(barras, minlength=MAX_BITS_HISTOGRAMA + 1)
+        self.suma += float(entropias.sum())
+        self.minimo = min(self.minimo, float(entropias.min()))
+        self.maximo = max(self.maximo, float(entropias.max()))
+
+    def percentil(self, q: float) -> float:
+        """Percentil aproximado (límite inferior de la barra de 1 bit)."""
+        acumulado = np.cumsum(self.bits)
+        return float(np.searchsorted(acumulado, q / 100.0 * self.filas, side="left"))
+
+    def informe(self) -> Dict[str, Any]:
+        total = max(self.filas, 1)
+        return {
+            'filas': self.filas,
+            'niveles': [
+                {'nivel': nivel, 'descripcion': descripcion, 'filas': int(n),
+                 'porcentaje': round(100.0 * int(n) / total, 2)}
+                for (nivel, descripcion), n in zip(STRENGTH_LEVELS, self.niveles)
+            ],
+            'entropia': {
+                'media': round(self.suma / total, 2),
+                'min': round(self.minimo, 2) if self.filas else 0.0,
+                'max': round(self.maximo, 2),
+                'p10': self.percentil(10),
+                'p50': self.percentil(50),
+                'p90': self.percentil(90),
+            },
+        }
+
+
+def leer_filas(ruta: str, formato: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Filas (dict) de un CSV con cabecera o de un JSONL, en streaming."""
+    formato = formato or ("jsonl" if ruta.endswith((".jsonl", ".ndjson")) else "csv")
+    if formato not in FORMATOS:
+        raise ValueError(f"formato debe ser uno de {FORMATOS}, recibido: {formato}")
+    with open(ruta, newline="", encoding="utf-8") as f:
+        if formato == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+
+
+def _bloques(filas: Iterable[Dict[str, Any]], tamano: int) -> Iterator[List[Dict[str, Any]]]:
+    filas = iter(filas)
+    return iter(lambda: list(islice(filas, tamano)), [])
+
+
+def _numero(valor: Any) -> Any:
+    """Celda numérica; vacía (CSV) o null (JSONL) -> nan, que se puntúa como inválida."""
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return np.nan
+    return valor
+
+
+def reporte(filas: Iterable[Dict[str, Any]], columna: str = "password",
+            columna_longitud: Optional[str] = None, columna_pool: Optional[str] = None,
+            tamano_bloque: int = CHUNK_SIZE_POR_DEFECTO) -> Dict[str, Any]:
+    """
+    Puntúa las filas bloque a bloque: por contraseña (`columna`) o, si se
+    indican columna_longitud y columna_pool, por longitud y tamaño de pool.
+
+    Raises:
+        KeyError: Si una fila no tiene la columna pedida
+    """
+    if tamano_bloque < 1:
+        raise ValueError(f"tamano_bloque debe ser >= 1, recibido: {tamano_bloque}")
+    por_columnas = columna_longitud is not None and columna_pool is not None
+    acumulador = AcumuladorReporte()
+    for bloque in _bloques(filas, tamano_bloque):
+        if por_columnas:
+            longitudes = np.array([_numero(fila[columna_longitud]) for fila in bloque], dtype=np.float64)
+            pools = np.array([_numero(fila[columna_pool]) for fila in bloque], dtype=np.float64)
+            entropias, _, histograma = puntuar(longitudes, pools)
+        else:
+            entropias, _, histograma = puntuar_passwords(matriz_passwords([fila[columna] for fila in bloque]))
+        acumulador.agregar(entropias, histograma)
+    return acumulador.informe()
+
+
+def imprimir_informe(informe: Dict[str, Any]) -> None:
+    print("\n" + "=" * 60)
+    print(f"📊 Fortaleza de {informe['filas']:,} credenciales")
+    print("=" * 60)
+    for nivel in informe['niveles']:
+        print(f"  {nivel['nivel']:<10} {nivel['filas']:>12,} {nivel['porcentaje']:>7.2f}%  {nivel['descripcion']}")
+    e = informe['entropia']
+    print("-" * 60)
+    print(f"  Entropía: media {e['media']:.2f} bits, min {e['min']:.2f}, max {e['max']:.2f}")
+    print(f"  Percentiles (±1 bit): p10 {e['p10']:.0f}, p50 {e['p50']:.0f}, p90 {e['p90']:.0f}")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reporte de fortaleza de una exportación de credenciales")
+    parser.add_argument("ruta")
+    parser.add_argument("--format", choices=FORMATOS, default=None, help="Por defecto según la extensión")
+    parser.add_argument("--column", default="password")
+    parser.add_argument("--length-column", default=None)
+    parser.add_argument("--pool-column", default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE_POR_DEFECTO)
+    parser.add_argument("--json", default=None, help="Guardar el informe en JSON")
+    args = parser.parse_args(argv)
+
+    if (args.length_column is None) != (args.pool_column is None):
+        parser.error("--length-column y --pool-column van juntas")
+    if not os.path.exists(args.ruta):
+        parser.error(f"No existe: {args.ruta}")
+
+    informe = reporte(leer_filas(args.ruta, args.format), args.column,
+                      args.length_column, args.pool_column, args.chunk_size)
+    imprimir_informe(informe)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"💾 Informe guardado en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
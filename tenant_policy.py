@@ -0,0 +1,350 @@
+"""
+tenant_policy.py - Registro de políticas por tenant para SecurePasswordRouter
+
+Cada tenant define sus reglas en un archivo JSON:
+
+    {
+        "acme": {
+            "min_length": 12, "max_length": 24, "default_length": 16,
+            "include_symbols": true, "safe_mode": true,
+            "strict_pin": true,
+            "blacklist_extra": ["acme", "password", "1234"]
+        },
+        "kiosko": {"min_length": 6, "max_length": 8, "include_symbols": false}
+    }
+
+COMPILACIÓN:
+============
+Las reglas se compilan UNA vez (al cargar o recargar el archivo) en un
+TenantConfig inmutable con todo precalculado:
+• Clases de caracteres y pool combinado (security_pass.character_classes)
+• Entropía exacta por longitud permitida (security_pass.exact_entropy)
+• Generador de PIN propio del tenant (uno por hilo, creado al primer uso)
+• Autómata Aho-Corasick de la blacklist: rechaza en una sola pasada
+  cualquier resultado que contenga un término prohibido
+
+Por petición el coste es un diccionario: registry.get(tenant_id).
+
+RECARGA EN CALIENTE:
+====================
+El mtime del archivo se revisa como mucho cada `check_interval` segundos.
+Si cambió, se compila un diccionario nuevo y se sustituye de una vez
+(asignación atómica de referencia): los lectores nunca toman locks y
+nunca ven un registro a medio compilar. Si el archivo nuevo es inválido
+se conserva la versión anterior y se registra el error.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from security_pass import build_password, character_classes, exact_entropy
+from generador_pin import GeneradorPinBlindado
+from random_source import SYSTEM_RANDOM, RandomSource
+
+logger = logging.getLogger("TenantPolicy")
+
+TENANT_MIN_LENGTH = 4
+TENANT_MAX_LENGTH = 32
+DEFAULT_CHECK_INTERVAL = 1.0
+# Reintentos cuando un resultado contiene un término de la blacklist
+BLACKLIST_MAX_ATTEMPTS = 1000
+
+_RULE_TYPES = {
+    'min_length': int,
+    'max_length': int,
+    'default_length': int,
+    'include_uppercase': bool,
+    'include_lowercase': bool,
+    'include_numbers': bool,
+    'include_symbols': bool,
+    'safe_mode': bool,
+    'strict_pin': bool,
+    'blacklist_extra': list,
+}
+
+
+class BlacklistAutomaton:
+    """
+    Autómata Aho-Corasick (sin distinguir mayúsculas) sobre los términos prohibidos.
+
+    Las transiciones de fallo se resuelven al construir (DFA completo), así que
+    buscar es una consulta de diccionario por carácter, sin retrocesos.
+    """
+
+    __slots__ = ('terms', '_delta', '_output')
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = tuple(sorted({t.lower() for t in terms if t}))
+
+        goto = [{}]
+        output = [None]
+        for term in self.terms:
+            node = 0
+            for char in term:
+                nxt = goto[node].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][char] = nxt
+                    goto.append({})
+                    output.append(None)
+                node = nxt
+            if output[node] is None:
+                output[node] = term
+
+        # BFS: delta[n] = transiciones heredadas del enlace de fallo + las propias
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque()
+        fail = [0] * len(goto)
+        for node in goto[0].values():
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            delta[node] = {**delta[fail[node]], **goto[node]}
+            if output[node] is None:
+                output[node] = output[fail[node]]
+            for char, child in goto[node].items():
+                fail[child] = delta[fail[node]].get(char, 0) if node else 0
+                queue.append(child)
+
+        self._delta = tuple(delta)
+        self._output = tuple(output)
+
+    def search(self, text: str) -> Optional[str]:
+        """
+        Returns:
+            El primer término prohibido encontrado en `text`, o None
+        """
+        delta, output = self._delta, self._output
+        node = 0
+        for char in text.lower():
+            node = delta[node].get(char, 0)
+            if output[node] is not None:
+                return output[node]
+        return None
+
+    def __bool__(self) -> bool:
+        return bool(self.terms)
+
+
+class TenantConfig(NamedTuple):
+    """Configuración compilada (inmutable) de un tenant."""
+    tenant_id: str
+    min_length: int
+    max_length: int
+    default_length: int
+    classes: Tuple[str, ...]
+    pool: str
+    entropies: Tuple[float, ...]   # entropía exacta, indexada por length - min_length
+    strict_pin: bool
+    pin_generators: threading.local   # GeneradorPinBlindado por hilo (ver pin_generator)
+    blacklist: BlacklistAutomaton
+
+    @property
+    def pin_generator(self) -> GeneradorPinBlindado:
+        """GeneradorPinBlindado del hilo actual."""
+        local = self.pin_generators
+        generator = getattr(local, 'generator', None)
+        if generator is None:
+            generator = local.generator = GeneradorPinBlindado()
+        return generator
+
+    def standard_entropy(self, length: int) -> Optional[float]:
+        """Entropía exacta de una contraseña del tenant (None si la longitud no está permitida)."""
+        if not (self.min_length <= length <= self.max_length):
+            return None
+        return self.entropies[length - self.min_length]
+
+    def pin_entropy(self, length: int, strict_security: bool) -> float:
+        """Entropía de un PIN del tenant (strict_pin fuerza el modo estricto)."""
+        return self.pin_generator._calcular_entropia_bits(
+            length, strict_security=strict_security or self.strict_pin)
+
+    def check_length(self, length: int) -> None:
+        """
+        Raises:
+            ValueError: Si la longitud está fuera del rango del tenant
+        """
+        if not (self.min_length <= length <= self.max_length):
+            raise ValueError(f"Tenant '{self.tenant_id}': length debe ser "
+                             f"{self.min_length}-{self.max_length}, recibido: {length}")
+
+    def generate_password(self, length: int, rng: Optional[RandomSource] = None) -> Tuple[str, float]:
+        """
+        Contraseña con las clases precompiladas del tenant, sin términos prohibidos.
+
+        Args:
+            rng: Fuente de aleatoriedad (None = CSPRNG del sistema)
+
+        Returns:
+            Tuple[password, entropy]
+        """
+        for _ in range(BLACKLIST_MAX_ATTEMPTS):
+            password = build_password(length, self.classes, self.pool, rng)
+            if not self.blacklist or self.blacklist.search(password) is None:
+                return password, self.entropies[length - self.min_length]
+        raise RuntimeError(f"Tenant '{self.tenant_id}': la blacklist rechaza todas las contraseñas generadas")
+
+    def generate_pin(self, length: int, strict_security: bool,
+                     rng: Optional[RandomSource] = None) -> Tuple[str, float]:
+        """
+        PIN con el generador del tenant, sin términos prohibidos.
+
+        Args:
+            rng: Fuente de aleatoriedad (None = CSPRNG del sistema)
+
+        Returns:
+            Tuple[pin, entropy]
+        """
+        strict_security = strict_security or self.strict_pin
+        generator = self.pin_generator if rng is None or rng is SYSTEM_RANDOM else GeneradorPinBlindado(rng=rng)
+        for _ in range(BLACKLIST_MAX_ATTEMPTS):
+            pin = generator.generar(length, strict_security=strict_security)
+            if not self.blacklist or self.blacklist.search(pin) is None:
+                return pin, self.pin_entropy(length, strict_security)
+        raise RuntimeError(f"Tenant '{self.tenant_id}': la blacklist rechaza todos los PINs generados")
+
+
+def compile_policy(tenant_id: str, rules: Dict[str, Any]) -> TenantConfig:
+    """
+    Valida y compila las reglas de un tenant.
+
+    Raises:
+        ValueError: Si las reglas son inválidas
+    """
+    if not isinstance(rules, dict):
+        raise ValueError(f"Tenant '{tenant_id}': las reglas deben ser un objeto, recibido: {type(rules)}")
+    for key, value in rules.items():
+        expected = _RULE_TYPES.get(key)
+        if expected is None:
+            raise ValueError(f"Tenant '{tenant_id}': regla desconocida '{key}'")
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ValueError(f"Tenant '{tenant_id}': {key} debe ser {expected.__name__}, recibido: {value!r}")
+
+    min_length = rules.get('min_length', TENANT_MIN_LENGTH)
+    max_length = rules.get('max_length', TENANT_MAX_LENGTH)
+    if not (TENANT_MIN_LENGTH <= min_length <= max_length <= TENANT_MAX_LENGTH):
+        raise ValueError(f"Tenant '{tenant_id}': rango de longitud inválido {min_length}-{max_length} "
+                         f"(permitido {TENANT_MIN_LENGTH}-{TENANT_MAX_LENGTH})")
+    default_length = rules.get('default_length', max(min_length, min(16, max_length)))
+    if not (min_length <= default_length <= max_length):
+        raise ValueError(f"Tenant '{tenant_id}': default_length fuera de rango: {default_length}")
+
+    include_symbols = rules.get('include_symbols', True)
+    flags = (
+        rules.get('include_uppercase', True),
+        rules.get('include_lowercase', True),
+        rules.get('include_numbers', True),
+        include_symbols,
+        rules.get('safe_mode', True) if include_symbols else False,
+    )
+    classes, pool = character_classes(*flags)
+
+    extra = rules.get('blacklist_extra', [])
+    if not all(isinstance(term, str) for term in extra):
+        raise ValueError(f"Tenant '{tenant_id}': blacklist_extra debe ser una lista de str")
+
+    return TenantConfig(
+        tenant_id=tenant_id,
+        min_length=min_length,
+        max_length=max_length,
+        default_length=default_length,
+        classes=classes,
+        pool=pool,
+        entropies=tuple(exact_entropy(length, *flags) for length in range(min_length, max_length + 1)),
+        strict_pin=rules.get('strict_pin', False),
+        pin_generators=threading.local(),
+        blacklist=BlacklistAutomaton(extra),
+    )
+
+
+def compile_policies(policies: Dict[str, Any]) -> Dict[str, TenantConfig]:
+    """Compila un diccionario {tenant_id: reglas}."""
+    if not isinstance(policies, dict):
+        raise ValueError(f"El archivo de políticas debe ser un objeto, recibido: {type(policies)}")
+    return {tenant_id: compile_policy(tenant_id, rules) for tenant_id, rules in policies.items()}
+
+
+class PolicyRegistry:
+    """
+    Registro de configuraciones compiladas por tenant con recarga por mtime.
+
+    Uso:
+        registry = PolicyRegistry("tenants.json")
+        config = registry.get("acme")        # KeyError si no existe
+    """
+
+    def __init__(self, path: Optional[str] = None, policies: Optional[Dict[str, Any]] = None,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL):
+        """
+        Args:
+            path: Archivo JSON de políticas (recargado al cambiar su mtime)
+            policies: Políticas en memoria (si no hay archivo)
+            check_interval: Segundos mínimos entre revisiones del mtime
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._reload_lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self._configs: Dict[str, TenantConfig] = compile_policies(policies or {})
+        if path is not None:
+            self.reload()
+
+    def reload(self, blocking: bool = True) -> bool:
+        """
+        Recompila el archivo si su mtime cambió.
+
+        Args:
+            blocking: Si False y otro hilo ya está recargando, no espera
+
+        Returns:
+            bool: True si se cargó una versión nueva
+
+        Raises:
+            ValueError / OSError: En la carga inicial, si el archivo es inválido
+        """
+        if not self._reload_lock.acquire(blocking):
+            return False
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    configs = compile_policies(json.load(f))
+            except (ValueError, OSError) as e:
+                if self._mtime is None:
+                    raise
+                logger.error(f"Políticas inválidas en {self.path}, se conserva la versión anterior: {e}")
+                self._mtime = mtime
+                return False
+            self._configs = configs
+            self._mtime = mtime
+            logger.info(f"Políticas cargadas: {len(configs)} tenants desde {self.path}")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def get(self, tenant_id: str) -> TenantConfig:
+        """
+        Configuración compilada del tenant.
+
+        Raises:
+            KeyError: Si el tenant no existe
+        """
+        if self.path is not None and time.monotonic() >= self._next_check:
+            try:
+                self.reload(blocking=False)
+            except OSError as e:
+                logger.error(f"No se pudo revisar {self.path}: {e}")
+        return self._configs[tenant_id]
+
+    def tenants(self) -> Tuple[str, ...]:
+        return tuple(self._configs)
@@ -0,0 +1,145 @@
+"""
+Pruebas del motor HOTP/TOTP (vectores de RFC 4226 y RFC 6238).
+Archivo: test_OTPGenerate.py
+"""
+
+import os
+import tempfile
+import unittest
+
+import OTPGenerate
+from OTPGenerate import OTPKey, decode_secret, generate_secret, shutdown_workers, verify_batch
+from otp_replay import ReplayCache
+
+SECRET_SHA1 = b"12345678901234567890"
+SECRET_SHA256 = b"12345678901234567890123456789012"
+SECRET_SHA512 = b"1234567890" * 6 + b"1234"
+
+
+class TestOTPEngine(unittest.TestCase):
+
+    def test_01_hotp_rfc4226(self):
+        esperados = ['755224', '287082', '359152', '969429', '338314',
+                     '254676', '287922', '162583', '399871', '520489']
+        clave = OTPKey(SECRET_SHA1)
+        self.assertEqual([clave.hotp(i) for i in range(10)], esperados)
+
+    def test_02_totp_rfc6238(self):
+        vectores = {
+            ('sha1', SECRET_SHA1): {59: '94287082', 1111111109: '07081804', 20000000000: '65353130'},
+            ('sha256', SECRET_SHA256): {59: '46119246', 1111111109: '68084774', 20000000000: '77737706'},
+            ('sha512', SECRET_SHA512): {59: '90693936', 1111111109: '25091201', 20000000000: '47863826'},
+        }
+        for (algoritmo, secreto), casos in vectores.items():
+            clave = OTPKey(secreto, digits=8, algorithm=algoritmo)
+            for instante, codigo in casos.items():
+                self.assertEqual(clave.totp(instante), codigo, f"{algoritmo} @ {instante}")
+
+    def test_03_ventana_de_verificacion(self):
+        clave = OTPKey(SECRET_SHA1)
+        codigo = clave.totp(1000)
+        paso = clave.time_step(1000)
+        self.assertEqual(clave.verify_totp(codigo, 1000 + 30, window=1), paso)
+        self.assertIsNone(clave.verify_totp(codigo, 1000 + 90, window=1))
+        self.assertIsNone(clave.verify_totp("12345", 1000))
+        self.assertEqual(clave.verify_hotp(clave.hotp(7), 5, look_ahead=2), 7)
+
+    def test_04_secreto_base32(self):
+        secreto = generate_secret()
+        self.assertEqual(len(decode_secret(secreto.lower())), 20)
+
+    def test_05_verificacion_por_lotes(self):
+        instante = 1_700_000_000
+        intentos = [(SECRET_SHA1, OTPKey(SECRET_SHA1).totp(instante)),
+                    (SECRET_SHA256, '000000'),
+                    (SECRET_SHA256, OTPKey(SECRET_SHA256).totp(instante - 30))]
+        paso = OTPKey(SECRET_SHA1).time_step(instante)
+        self.assertEqual(verify_batch(intentos, for_time=instante), [paso, None, paso - 1])
+        self.assertEqual(verify_batch(intentos, for_time=instante, processes=2), [paso, None, paso - 1])
+
+    def test_06_workers_reutilizados_entre_lotes(self):
+        intentos = [(SECRET_SHA1, '000000'), (SECRET_SHA256, '000000')]
+        try:
+            verify_batch(intentos, for_time=59, processes=2)
+            workers = list(OTPGenerate._shard_executors)
+            verify_batch(intentos, for_time=59, processes=2)
+            self.assertEqual(OTPGenerate._shard_executors, workers)
+        finally:
+            shutdown_workers()
+        self.assertEqual(OTPGenerate._shard_executors, [])
+
+
+class TestReplayCache(unittest.TestCase):
+
+    def test_01_rechaza_reutilizacion_en_la_ventana(self):
+        cache = ReplayCache(window=1)
+        clave = OTPKey(SECRET_SHA1)
+        codigo = clave.totp(1000)
+        paso = clave.time_step(1000)
+        self.assertEqual(cache.verify(clave, "alice", codigo, 1000), paso)
+        self.assertIsNone(cache.verify(clave, "alice", codigo, 1000 + 20))
+        self.assertEqual(cache.verify(clave, "bob", codigo, 1000), paso)
+
+    def test_02_memoria_acotada_por_la_ventana(self):
+        cache = ReplayCache(window=1, stripes=4)
+        for paso in range(50):
+            for usuario in range(20):
+                cache.check_and_mark(f"u{usuario}", paso, paso)
+        cache.purge(49)
+        self.assertEqual(len(cache), 40)
+        self.assertFalse(cache.check_and_mark("nuevo", 10, 49))
+
+    def test_03_snapshot(self):
+        cache = ReplayCache(window=1)
+        cache.check_and_mark("alice", 100, 100)
+        cache.check_and_mark("bob", 99, 100)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "replay.snap")
+            self.assertEqual(cache.save_snapshot(ruta), 2)
+            restaurada = ReplayCache(window=1)
+            # En el paso 101 la entrada de bob (paso 99) ya expiró
+            self.assertEqual(restaurada.load_snapshot(ruta, now_step=101), 1)
+            self.assertFalse(restaurada.check_and_mark("alice", 100, 101))
+
+    def test_04_base_de_tiempo_y_usuario(self):
+        clave = OTPKey(SECRET_SHA1, t0=15)
+        with self.assertRaises(ValueError):
+            ReplayCache().verify(clave, "alice", clave.totp(1000), 1000)
+        cache = ReplayCache(t0=15)
+        self.assertEqual(cache.current_step(1000), clave.time_step(1000))
+        self.assertEqual(cache.verify(clave, "alice", clave.totp(1000), 1000), clave.time_step(1000))
+        with self.assertRaises(TypeError):
+            cache.check_and_mark(42, 1, 1)
+
+        largo = "u" * 70000
+        self.assertTrue(cache.check_and_mark(largo, 100, 100))
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "replay.bin")
+            cache.save_snapshot(ruta)
+            restaurada = ReplayCache(t0=15)
+            restaurada.load_snapshot(ruta, now_step=100)
+            self.assertFalse(restaurada.check_and_mark(largo, 100, 100))
+            with self.assertRaises(ValueError):
+                ReplayCache().load_snapshot(ruta, now_step=100)
+
+    def test_05_snapshot_truncado(self):
+        cache = ReplayCache(window=1)
+        cache.check_and_mark("alice", 100, 100)
+        cache.check_and_mark("bob", 100, 100)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "replay.snap")
+            cache.save_snapshot(ruta)
+            with open(ruta, "rb") as f:
+                datos = f.read()
+            # Cortes: tras la cabecera, a mitad de un registro y a mitad de un usuario
+            for corte in (28, 32, len(datos) - 2):
+                with open(ruta, "wb") as f:
+                    f.write(datos[:corte])
+                restaurada = ReplayCache(window=1)
+                with self.assertRaisesRegex(ValueError, "Truncated replay snapshot"):
+                    restaurada.load_snapshot(ruta, now_step=100)
+                self.assertEqual(len(restaurada), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -3,11 +3,17 @@ Auditoría de Seguridad y Pruebas Unitarias para el Generador de PIN.
 Archivo: test_generador_pin.py
 """
 
+import importlib.util
+import os
 import unittest
+from itertools import islice
 from unittest.mock import patch
 
 # Importamos la clase desde tu archivo principal 'generador_pin.py'
 from generador_pin import GeneradorPinBlindado
+from random_source import (
+    RANDOM_SOURCE_MODE_ENV, DeterministicRandomSource, InsecureRandomSourceError, RandomSource,
+)
 
 
 class TestAuditoriaPinBlindado(unittest.TestCase):
@@ -102,6 +108,103 @@ class TestAuditoriaPinBlindado(unittest.TestCase):
                 es_valido = self.generador._es_transicion_valida(pin[i+1], pin[i]) # pylint: disable=protected-access
                 self.assertTrue(es_valido, f"PIN inseguro: {pin}")
 
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "requiere numpy")
+    def test_09_auditoria_estadistica(self):
+        """Chi-cuadrado por posición/bigramas y runs test contra la cadena de Markov esperada."""
+        from randomness_audit import ejecutar_auditoria
+
+        informe = ejecutar_auditoria("pin", 20000, 6)
+        self.assertEqual(informe['imposibles'], 0)
+        self.assertTrue(informe['aprobado'], f"p mínimo: {informe['p_min']}")
+        self.assertEqual(len(informe['bigramas']), 5)
+
+        # Segundo dígito copiado del primero: marginales perfectas, solo falla el par 0-1
+        import numpy as np
+        from randomness_audit import auditar_muestras, esperado_otp
+
+        _, marginal, bigrama = esperado_otp(3)
+        muestras = np.random.default_rng(1).integers(0, 10, (5000, 3), dtype=np.uint8)
+        muestras[:, 1] = muestras[:, 0]
+        bigramas = auditar_muestras(muestras, marginal, bigrama)['bigramas']
+        self.assertLess(bigramas[0]['p'], 1e-9)
+        self.assertGreater(bigramas[1]['p'], 1e-6)
+
+    def test_10_tablas_compartidas_entre_instancias(self):
+        """Las reglas son inmutables y las comparten todas las instancias."""
+        otro = GeneradorPinBlindado()
+        self.assertIs(self.generador.blacklist, otro.blacklist)
+        self.assertIs(self.generador.adyacencias_fisicas, otro.adyacencias_fisicas)
+        self.assertIsInstance(self.generador.blacklist, frozenset)
+        with self.assertRaises(TypeError):
+            self.generador.adyacencias_fisicas['5'] = ()
+
+    def test_11_blacklist_extra_copy_on_write(self):
+        """blacklist_extra solo afecta a su instancia."""
+        propio = GeneradorPinBlindado(blacklist_extra=["1603"])
+        self.assertIn("1603", propio.blacklist)
+        self.assertIn("1379", propio.blacklist)
+        self.assertNotIn("1603", self.generador.blacklist)
+
+        propio.agregar_blacklist("3816")
+        self.assertIn("3816", propio.blacklist)
+        self.assertNotIn("3816", GeneradorPinBlindado().blacklist)
+        self.assertEqual(len(propio.blacklist), len(self.generador.blacklist) + 2)
+
+        with patch('secrets.choice', side_effect=['1', '6', '0', '3', '3', '8', '1', '6', '2', '7', '2', '7']):
+            self.assertEqual(propio.generar(4), "2727")
+
+    def test_12_iterador_de_pins(self):
+        """iter_pins respeta transiciones, blacklist y extras; los lotes tienen el tamaño pedido."""
+        propio = GeneradorPinBlindado(blacklist_extra=["1603"])
+        pins = list(islice(propio.iter_pins(4), 3000))
+        self.assertEqual(len(pins), 3000)
+        for pin in pins:
+            self.assertNotIn(pin, propio.blacklist)
+            for i in range(3):
+                self.assertTrue(propio._es_transicion_valida(pin[i + 1], pin[i]), pin)  # pylint: disable=protected-access
+
+        lote = next(self.generador.iter_pins_lotes(8, 50, strict_security=False))
+        self.assertEqual(len(lote), 50)
+        self.assertTrue(all(len(p) == 8 and p.isdigit() for p in lote))
+        with self.assertRaises(ValueError):
+            self.generador.iter_pins(3)
+
+    @patch.dict(os.environ, {RANDOM_SOURCE_MODE_ENV: "test"})
+    def test_13_fuente_determinista_reproducible(self):
+        """Misma semilla -> mismos PINs, sin parchear secrets llamada a llamada."""
+        def serie(semilla):
+            generador = GeneradorPinBlindado(rng=DeterministicRandomSource(semilla))
+            return ([generador.generar(6) for _ in range(50)]
+                    + list(islice(generador.iter_pins(8), 50))
+                    + [generador.generar(5, strict_security=False)])
+
+        primera = serie(42)
+        self.assertEqual(primera, serie(42))
+        self.assertNotEqual(primera, serie(43))
+        for pin in primera[:100]:
+            self.assertNotIn(pin, self.generador.blacklist)
+
+    def test_14_fuente_determinista_bloqueada_en_produccion(self):
+        """Sin RANDOM_SOURCE_MODE=test|benchmark la fuente determinista no se puede crear."""
+        with patch.dict(os.environ, {RANDOM_SOURCE_MODE_ENV: ""}):
+            with self.assertRaises(InsecureRandomSourceError):
+                DeterministicRandomSource(42)
+
+    def test_15_interfaz_abstracta_de_fuentes(self):
+        """RandomSource exige token_bytes y randbelow; choice y shuffle vienen de randbelow."""
+        class SoloBytes(RandomSource):
+            def token_bytes(self, n):
+                return bytes(n)
+
+        class Ceros(SoloBytes):
+            def randbelow(self, n):
+                return 0
+
+        for clase in (RandomSource, SoloBytes):
+            with self.assertRaises(TypeError):
+                clase()
+        self.assertEqual(GeneradorPinBlindado(rng=Ceros()).generar(4, strict_security=False), "0000")
+
     def test_08_validacion_limites(self):
         """Verifica errores en longitudes inválidas."""
         with self.assertRaises(ValueError):
@@ -0,0 +1,568 @@
+"""
+Pruebas Unitarias e Integración para el Router Inteligente.
+Archivo: test_secure_router.py
+"""
+
+import io
+import os
+import json
+import math
+import logging
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from secure_router import DecisionMatrix, GeneratorType, SecurePasswordRouter, build_default_registry
+from generator_registry import CostProfile, GeneratorSpec
+from generador_token import GeneradorToken
+from generador_passphrase import GeneradorPassphrase, ListaPalabras, construir_indice
+from router_batch import run_batch
+from rate_limiter import AdmissionControl, RateLimitExceeded
+from tenant_policy import BlacklistAutomaton, PolicyRegistry, compile_policy
+from random_source import RANDOM_SOURCE_MODE_ENV, DeterministicRandomSource
+
+
+def construir_lista_temporal(directorio: str, palabras: int = 7776) -> str:
+    """Crea una lista estilo EFF en `directorio` y devuelve la ruta del índice."""
+    origen = os.path.join(directorio, "lista.txt")
+    with open(origen, "w", encoding="utf-8") as f:
+        for i in range(palabras):
+            f.write(f"{i:05d}\tpalabra{i}\n")
+    destino = os.path.join(directorio, "lista.idx")
+    construir_indice(origen, destino)
+    return destino
+
+
+class TestDecisionMatrix(unittest.TestCase):
+    """Lógica pura de selección de generador."""
+
+    def test_01_mixtos_usa_standard(self):
+        tipo, _ = DecisionMatrix.decide({'only_numbers': False, 'length': 12})
+        self.assertEqual(tipo, GeneratorType.STANDARD)
+
+    def test_02_numeros_estrictos_usa_pin(self):
+        tipo, _ = DecisionMatrix.decide({'only_numbers': True, 'length': 6, 'strict_security': True})
+        self.assertEqual(tipo, GeneratorType.PIN_BLINDADO)
+
+    def test_03_token_tiene_prioridad(self):
+        tipo, _ = DecisionMatrix.decide({'token': True, 'only_numbers': True, 'strict_security': True})
+        self.assertEqual(tipo, GeneratorType.TOKEN)
+
+    def test_04_token_opciones_invalidas(self):
+        with self.assertRaises(ValueError):
+            DecisionMatrix.decide({'token': True, 'token_bytes': 8})
+        with self.assertRaises(ValueError):
+            DecisionMatrix.decide({'token': True, 'token_encoding': 'base58'})
+
+
+class TestRegistroGeneradores(unittest.TestCase):
+    """Selección por coste y entropía mínima, caché y costes medidos."""
+
+    def setUp(self):
+        self.registro = build_default_registry()
+
+    def test_01_decisiones_por_defecto_sin_cambios(self):
+        casos = [
+            ({'only_numbers': False, 'length': 12}, GeneratorType.STANDARD),
+            ({'only_numbers': True, 'length': 6}, GeneratorType.STANDARD),
+            ({'only_numbers': True, 'length': 6, 'strict_security': True}, GeneratorType.PIN_BLINDADO),
+            ({'only_numbers': True, 'use_pin_armor': True}, GeneratorType.PIN_BLINDADO),
+            ({'use_pin_armor': True}, GeneratorType.STANDARD),
+            ({}, GeneratorType.STANDARD),
+            ({'passphrase': True}, GeneratorType.PASSPHRASE),
+        ]
+        for opciones, esperado in casos:
+            self.assertEqual(DecisionMatrix.decide(opciones, self.registro)[0], esperado, opciones)
+
+    def test_02_entropia_minima(self):
+        tipo, razon = DecisionMatrix.decide({'min_entropy': 200}, self.registro)
+        self.assertEqual(tipo, GeneratorType.TOKEN)
+        self.assertIn('256.00 bits', razon)
+        with self.assertRaises(ValueError):
+            DecisionMatrix.decide({'only_numbers': False, 'length': 8, 'min_entropy': 80}, self.registro)
+        with self.assertRaises(ValueError):
+            DecisionMatrix.decide({'min_entropy': -1}, self.registro)
+
+    def test_03_generador_registrado_mas_barato(self):
+        llamadas = []
+
+        def soporta(opciones):
+            llamadas.append(1)
+            return 'min_entropy' in opciones
+
+        self.registro.register(GeneratorSpec(
+            'HEX128', soporta, lambda o: 128.0, CostProfile(0.5), lambda o: "Hex de 128 bits",
+            generate=lambda o: (os.urandom(16).hex(), 128.0)))
+        router = SecurePasswordRouter(registry=self.registro)
+        for _ in range(3):
+            resultado = router.generate({'min_entropy': 100, 'client_id': f"c{len(llamadas)}"})
+        self.assertEqual(resultado['generator'], 'HEX128')
+        self.assertEqual(len(resultado['password']), 32)
+        # Decisión cacheada por forma de petición (client_id no cuenta)
+        self.assertEqual(len(llamadas), 1)
+
+        self.registro.set_cost('HEX128', CostProfile(1e6))
+        self.assertEqual(router.generate({'min_entropy': 100})['generator'], GeneratorType.TOKEN.value)
+
+    def test_04_costes_desde_benchmark_y_calibracion(self):
+        informe = {
+            'results': {'pin': [{'threads': 1, 'us_per_item': 40.0}],
+                        'token': [{'threads': 1, 'us_per_item': 10.0}]},
+            'batch': {'token': {'us_per_item': 1.0}},
+        }
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'bench.json')
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(informe, f)
+            aplicados = self.registro.load_costs(ruta)
+        self.assertEqual(aplicados['PIN_BLINDADO'], CostProfile(40.0, 1.0))
+        self.assertEqual(self.registro.get('TOKEN').cost, CostProfile(10.0, 0.1))
+
+        medidos = SecurePasswordRouter(registry=self.registro, track_history=False).calibrate(samples=20)
+        self.assertIn('STANDARD', medidos)
+        self.assertEqual(self.registro.get('STANDARD').cost, medidos['STANDARD'])
+
+
+class TestGeneradorToken(unittest.TestCase):
+    """Codificación, checksum y entropía de tokens."""
+
+    def test_01_codificaciones_y_checksum(self):
+        """Todas las codificaciones (alineadas o no) verifican su checksum."""
+        for encoding in ("hex", "base32", "base64url", "crockford"):
+            for num_bytes in (16, 30, 32):
+                generador = GeneradorToken(encoding, num_bytes, prefix="sk_", checksum=True)
+                for token in generador.generar_lote(50):
+                    self.assertEqual(len(token), generador.longitud_token())
+                    self.assertTrue(generador.verificar_checksum(token), f"{encoding}/{num_bytes}: {token}")
+
+    def test_02_lote_coincide_con_codificacion_individual(self):
+        """El corte del lote codificado en bloque equivale a codificar token a token."""
+        for encoding in ("hex", "base32", "base64url", "crockford"):
+            generador = GeneradorToken(encoding, 17)
+            material = bytes(range(17 * 3))
+            # pylint: disable=protected-access
+            lote = generador._codificar_lote(material, 3)
+            individual = [generador._codificar_uno(material[i:i + 17]) for i in range(0, 51, 17)]
+            self.assertEqual(lote, individual)
+
+    def test_03_checksum_detecta_alteracion(self):
+        generador = GeneradorToken("hex", 16, checksum=True)
+        token = generador.generar()
+        alterado = ("0" if token[0] != "0" else "1") + token[1:]
+        self.assertFalse(generador.verificar_checksum(alterado))
+
+    def test_04_entropia_exacta(self):
+        self.assertEqual(GeneradorToken("crockford", 20).calcular_entropia_bits(), 160.0)
+
+
+class TestGeneradorPassphrase(unittest.TestCase):
+    """Índice memory-mapped y generación Diceware."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.ruta = construir_lista_temporal(cls.tmp.name)
+        cls.lista = ListaPalabras(cls.ruta)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.lista.cerrar()
+        cls.tmp.cleanup()
+
+    def test_01_indice_acceso_directo(self):
+        self.assertEqual(len(self.lista), 7776)
+        self.assertEqual(self.lista.palabra(0), "palabra0")
+        self.assertEqual(self.lista.palabra(7775), "palabra7775")
+        with self.assertRaises(IndexError):
+            self.lista.palabra(7776)
+
+    def test_02_formato_y_entropia(self):
+        generador = GeneradorPassphrase(self.lista, 6, separador=" ", capitalizacion="title")
+        frase = generador.generar()
+        palabras = frase.split(" ")
+        self.assertEqual(len(palabras), 6)
+        self.assertTrue(all(p.startswith("Palabra") for p in palabras))
+        self.assertAlmostEqual(generador.calcular_entropia_bits(), 77.55, places=2)
+
+    def test_03_lote(self):
+        generador = GeneradorPassphrase(self.lista, 5)
+        lote = generador.generar_lote(500)
+        self.assertEqual(len(lote), 500)
+        self.assertTrue(all(len(frase.split("-")) == 5 for frase in lote))
+
+    def test_04_duplicados_sin_distinguir_mayusculas(self):
+        origen = os.path.join(self.tmp.name, "mayusculas.txt")
+        destino = os.path.join(self.tmp.name, "mayusculas.idx")
+        with open(origen, "w", encoding="utf-8") as f:
+            f.write("Casa\ncasa\nCASA\nperro\ngato\n")
+        self.assertEqual(construir_indice(origen, destino), 3)
+        lista = ListaPalabras(destino)
+        try:
+            self.assertEqual([lista.palabra(i) for i in range(3)], ["Casa", "perro", "gato"])
+        finally:
+            lista.cerrar()
+
+    def test_05_validacion_exacta(self):
+        generador = GeneradorPassphrase(self.lista, 4)
+        self.assertTrue(generador.es_valida(generador.generar()))
+        for frase in ("palabra1-palabra2-palabra3", "palabra1-palabra2-palabra3-palabra4-palabra5",
+                      "palabra1--palabra3-palabra4", "palabra1-palabra2-palabra3-palabra4-",
+                      "palabra1-palabra2-palabra3-Palabra4", "palabra1-palabra2-palabra3-otra"):
+            self.assertFalse(generador.es_valida(frase), frase)
+        # Sin separador la passphrase se segmenta igual
+        pegada = GeneradorPassphrase(self.lista, 4, separador="", capitalizacion="title")
+        self.assertTrue(pegada.es_valida("Palabra1Palabra22Palabra3Palabra7775"))
+        self.assertFalse(pegada.es_valida("Palabra1Palabra22Palabra3"))
+
+
+class TestSecurePasswordRouter(unittest.TestCase):
+    """Integración: generación completa a través del router."""
+
+    def setUp(self):
+        self.router = SecurePasswordRouter(debug=False, track_history=True)
+
+    def test_01_pin_blindado(self):
+        result = self.router.generate({'only_numbers': True, 'length': 6, 'strict_security': True})
+        self.assertEqual(result['generator'], GeneratorType.PIN_BLINDADO.value)
+        self.assertTrue(result['password'].isdigit())
+
+    def test_02_standard(self):
+        result = self.router.generate({'only_numbers': False, 'length': 16})
+        self.assertEqual(result['generator'], GeneratorType.STANDARD.value)
+        self.assertEqual(len(result['password']), 16)
+
+    def test_03_token(self):
+        result = self.router.generate({'token': True, 'token_encoding': 'hex',
+                                       'token_bytes': 16, 'token_prefix': 'api_'})
+        self.assertEqual(result['generator'], GeneratorType.TOKEN.value)
+        self.assertTrue(result['password'].startswith('api_'))
+        self.assertEqual(result['entropy'], 128.0)
+
+    def test_04_token_lote(self):
+        batch = self.router.generate_token_batch({'token_encoding': 'crockford'}, 1000)
+        self.assertEqual(len(batch['passwords']), 1000)
+        self.assertEqual(len(set(batch['passwords'])), 1000)
+        self.assertEqual(len(self.router.get_history()), 1)
+
+    def test_05_passphrase(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = construir_lista_temporal(directorio, palabras=100)
+            options = {'passphrase': True, 'passphrase_words': 4, 'wordlist_path': ruta}
+            result = self.router.generate(options)
+            self.assertEqual(result['generator'], GeneratorType.PASSPHRASE.value)
+            self.assertEqual(len(result['password'].split('-')), 4)
+            batch = self.router.generate_batch(options, 10)
+            self.assertEqual(len(batch['passwords']), 10)
+
+    def test_06_passphrase_sin_lista(self):
+        with self.assertRaises(RuntimeError):
+            self.router.generate({'passphrase': True, 'wordlist_path': '/no/existe.idx'})
+
+    def test_07_concurrencia_historial_y_generadores_por_hilo(self):
+        """Varios hilos comparten el router: historial completo y generadores propios."""
+        generadores = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(50):
+                self.router.generate({'only_numbers': True, 'length': 6, 'strict_security': True})
+            with lock:
+                generadores.append(self.router.pin_generator)
+
+        hilos = [threading.Thread(target=worker) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        historial = self.router.get_history()
+        self.assertEqual(len(historial), 400)
+        marcas = [evento['timestamp'] for evento in historial]
+        self.assertEqual(marcas, sorted(marcas))
+        self.assertEqual(len({id(g) for g in generadores}), 8)
+
+        self.router.clear_history()
+        self.assertEqual(self.router.get_history(), [])
+
+    def test_08_debug_no_altera_logger_global(self):
+        nivel = logging.getLogger("SecureRouter").level
+        SecurePasswordRouter(debug=True)
+        self.assertEqual(logging.getLogger("SecureRouter").level, nivel)
+
+    @patch.dict(os.environ, {RANDOM_SOURCE_MODE_ENV: "test"})
+    def test_09_fuente_determinista_reproducible(self):
+        """Todos los generadores del router (y los de tenant) usan la fuente inyectada."""
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = construir_lista_temporal(directorio, palabras=100)
+            peticiones = [
+                {'only_numbers': True, 'length': 6, 'strict_security': True},
+                {'only_numbers': False, 'length': 16},
+                {'token': True, 'token_encoding': 'crockford', 'token_checksum': True},
+                {'passphrase': True, 'passphrase_words': 4, 'wordlist_path': ruta},
+                {'only_numbers': False, 'tenant_id': 'acme'},
+            ]
+
+            def serie(semilla):
+                router = SecurePasswordRouter(
+                    track_history=False, rng=DeterministicRandomSource(semilla),
+                    policies=PolicyRegistry(policies={'acme': {'include_symbols': False}}))
+                salida = [router.generate(options)['password'] for options in peticiones]
+                return salida + router.generate_batch(peticiones[2], 20)['passwords']
+
+            primera = serie(1)
+            self.assertEqual(primera, serie(1))
+            self.assertNotEqual(primera, serie(2))
+
+    def test_10_history_obsoleto_y_shards_sin_historial(self):
+        self.router.clear_history()
+        evento = {'timestamp': datetime.now(), 'success': True}
+        with self.assertWarns(DeprecationWarning):
+            self.router.history.append(evento)
+        self.assertEqual(self.router.get_history(), [evento])
+        with self.assertWarns(DeprecationWarning):
+            self.router.history.clear()
+        self.assertEqual(self.router.get_history(), [])
+
+        sin_historial = SecurePasswordRouter(track_history=False)
+        resultados = []
+
+        def worker():
+            resultados.append(sin_historial.generate({'length': 12, 'include_numbers': True}))
+
+        hilos = [threading.Thread(target=worker) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual([r['generator'] for r in resultados], [GeneratorType.STANDARD.value] * 4)
+        self.assertEqual(sin_historial._history_shards, [])
+
+
+class TestRouterBatch(unittest.TestCase):
+    """Driver JSONL: orden, errores por línea y modo lote."""
+
+    def test_01_orden_y_errores(self):
+        entrada = io.StringIO(
+            '{"only_numbers": true, "length": 6, "strict_security": true}\n'
+            '\n'
+            '{"length": 2}\n'
+            'no es json\n'
+            '{"token": true, "count": 5}\n'
+        )
+        salida, errores = io.StringIO(), io.StringIO()
+        resumen = run_batch(entrada, salida, errores, chunk_size=2, progress_every=0)
+
+        self.assertEqual((resumen['lines'], resumen['ok'], resumen['errors']), (4, 2, 2))
+        ok = [json.loads(line) for line in salida.getvalue().splitlines()]
+        fallos = [json.loads(line) for line in errores.getvalue().splitlines()]
+        self.assertEqual([r['line'] for r in ok], [1, 5])
+        self.assertEqual([r['line'] for r in fallos], [3, 4])
+        self.assertEqual(len(ok[1]['result']['passwords']), 5)
+
+
+class RelojFalso:
+    """Reloj monotónico controlable para el token bucket."""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class TestControlAdmision(unittest.TestCase):
+    """Token bucket por cliente y tope de concurrencia."""
+
+    OPCIONES = {'only_numbers': True, 'length': 6, 'strict_security': True}
+
+    def test_01_rechazo_por_cliente_y_recarga(self):
+        reloj = RelojFalso()
+        router = SecurePasswordRouter(admission=AdmissionControl(rate=1, burst=2, clock=reloj))
+        ruidoso = dict(self.OPCIONES, client_id='ruidoso')
+        router.generate(ruidoso)
+        router.generate(ruidoso)
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            router.generate(ruidoso)
+        self.assertAlmostEqual(ctx.exception.retry_after, 1.0)
+        # Otro cliente no se ve afectado
+        router.generate(dict(self.OPCIONES, client_id='tranquilo'))
+        reloj.ahora = 1.0
+        router.generate(ruidoso)
+
+        historial = router.get_history()
+        self.assertEqual([e['admission'] for e in historial],
+                         ['admitted', 'admitted', 'rejected', 'admitted', 'admitted'])
+        metricas = router.get_metrics()
+        self.assertEqual((metricas['admitted'], metricas['rejected'], metricas['clients']), (4, 1, 2))
+
+    def test_02_modo_espera_y_lotes(self):
+        router = SecurePasswordRouter(admission=AdmissionControl(rate=100, burst=5, mode='wait', max_wait=0.5))
+        opciones = dict(self.OPCIONES, client_id='lote')
+        router.generate_batch(opciones, 5)
+        router.generate(opciones)
+        self.assertEqual(router.get_history()[-1]['admission'], 'waited')
+        self.assertGreater(router.get_metrics()['wait_seconds'], 0)
+        # Espera necesaria (10 s) por encima de max_wait: se rechaza
+        with self.assertRaises(RateLimitExceeded):
+            router.generate_batch(opciones, 1000)
+
+    def test_03_tope_de_concurrencia(self):
+        control = AdmissionControl(rate=1000, burst=1000, max_concurrent=1)
+        router = SecurePasswordRouter(admission=control)
+        control.admit('otro')
+        with self.assertRaises(RateLimitExceeded):
+            router.generate(self.OPCIONES)
+        control.release()
+        router.generate(self.OPCIONES)
+        router.generate(self.OPCIONES)
+        self.assertEqual(router.get_metrics()['concurrency_rejected'], 1)
+
+    def test_04_desalojo_de_clientes_inactivos(self):
+        reloj = RelojFalso()
+        control = AdmissionControl(rate=1, burst=1, idle_ttl=10, stripes=1, clock=reloj)
+        for i in range(100):
+            control.admit(f"c{i}")
+        reloj.ahora = 20.0
+        control.admit("nuevo")
+        self.assertEqual(control.metrics()['clients'], 1)
+
+    def test_05_rechazo_por_concurrencia_devuelve_tokens(self):
+        reloj = RelojFalso()
+        control = AdmissionControl(rate=1, burst=1, max_concurrent=1, clock=reloj)
+        control.admit('otro')
+        with self.assertRaises(RateLimitExceeded):
+            control.admit('cliente')
+        control.release()
+        # El rechazo por concurrencia no consumió el único token del cliente
+        control.admit('cliente')
+        control.release()
+        self.assertEqual(control.metrics()['admitted'], 2)
+
+    def test_06_coste_mayor_que_la_rafaga(self):
+        control = AdmissionControl(rate=10, burst=5)
+        with self.assertRaises(ValueError):
+            control.admit('lote', cost=6)
+        self.assertEqual(control.metrics()['rejected'], 0)
+
+    def test_07_peticion_invalida_no_gasta_tokens(self):
+        reloj = RelojFalso()
+        control = AdmissionControl(rate=1, burst=1, clock=reloj)
+        router = SecurePasswordRouter(admission=control)
+        with self.assertRaises(ValueError):
+            router.generate(dict(self.OPCIONES, tenant_id='acme'))
+        router.generate(self.OPCIONES)
+        self.assertEqual((control.metrics()['admitted'], control.metrics()['rejected']), (1, 0))
+
+    def test_08_reembolso_deshace_la_espera(self):
+        control = AdmissionControl(rate=100, burst=1, max_concurrent=1, mode='wait', max_wait=0.05)
+        control.admit('cliente')
+        control.release()
+        control.admit('otro')
+        # Espera ~10 ms por tokens y luego agota max_wait en el tope de concurrencia
+        with self.assertRaises(RateLimitExceeded):
+            control.admit('cliente')
+        control.release()
+        metricas = control.metrics()
+        self.assertEqual((metricas['admitted'], metricas['waited'], metricas['wait_seconds']), (2, 0, 0.0))
+
+
+class TestPoliticasTenant(unittest.TestCase):
+    """Políticas compiladas por tenant y recarga en caliente."""
+
+    POLITICAS = {
+        'acme': {'min_length': 12, 'max_length': 20, 'include_symbols': False, 'strict_pin': True},
+        # Solo dígitos y sin 0-4: toda contraseña válida usa únicamente 5-9
+        'digitos': {'include_uppercase': False, 'include_lowercase': False, 'include_symbols': False,
+                    'blacklist_extra': ['0', '1', '2', '3', '4']},
+    }
+
+    def test_01_automata_blacklist(self):
+        automata = BlacklistAutomaton(['he', 'she', 'hers', 'ACME'])
+        self.assertEqual(automata.search('ushers'), 'she')
+        self.assertEqual(automata.search('xxacmexx'), 'acme')
+        self.assertEqual(automata.search('ahishe'), 'she')
+        self.assertIsNone(automata.search('abcdef'))
+        self.assertFalse(BlacklistAutomaton([]))
+
+    def test_02_compilacion_y_validacion(self):
+        config = compile_policy('acme', self.POLITICAS['acme'])
+        self.assertEqual((config.min_length, config.max_length, config.default_length), (12, 20, 16))
+        self.assertEqual(len(config.pool), 62)
+        with self.assertRaises(ValueError):
+            compile_policy('malo', {'min_length': 10, 'max_length': 8})
+        with self.assertRaises(ValueError):
+            compile_policy('malo', {'colores': True})
+
+    def test_03_router_aplica_politica(self):
+        router = SecurePasswordRouter(policies=PolicyRegistry(policies=self.POLITICAS))
+        resultado = router.generate({'tenant_id': 'acme'})
+        self.assertEqual(resultado['length'], 16)
+        self.assertTrue(resultado['password'].isalnum())
+        with self.assertRaises(ValueError):
+            router.generate({'tenant_id': 'acme', 'length': 8})
+        with self.assertRaises(ValueError):
+            router.generate({'tenant_id': 'desconocido'})
+
+        pin = router.generate({'tenant_id': 'acme', 'only_numbers': True, 'length': 12})
+        self.assertEqual(pin['generator'], GeneratorType.PIN_BLINDADO.value)
+
+        lote = router.generate_batch({'tenant_id': 'digitos', 'length': 4}, 50)
+        self.assertTrue(all(set(p) <= set('56789') for p in lote['passwords']))
+
+    def test_04_recarga_por_mtime(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'tenants.json')
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(self.POLITICAS, f)
+            registro = PolicyRegistry(ruta, check_interval=0)
+            self.assertEqual(registro.get('acme').min_length, 12)
+
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump({'acme': {'min_length': 6, 'max_length': 10}}, f)
+            estado = os.stat(ruta)
+            os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(registro.get('acme').min_length, 6)
+            self.assertEqual(registro.tenants(), ('acme',))
+
+            # Un archivo inválido conserva la versión anterior
+            with open(ruta, 'w', encoding='utf-8') as f:
+                f.write('{roto')
+            os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 2_000_000_000))
+            self.assertEqual(registro.get('acme').max_length, 10)
+
+    def test_05_min_entropy_con_clases_del_tenant(self):
+        solo_digitos = {'include_uppercase': False, 'include_lowercase': False, 'include_symbols': False}
+        router = SecurePasswordRouter(policies=PolicyRegistry(policies={'pin': solo_digitos}))
+        # Con las clases por defecto serían ~75 bits; el tenant solo usa dígitos: 12·log2(10) ≈ 39.86
+        with self.assertRaisesRegex(ValueError, "39.86"):
+            router.generate({'tenant_id': 'pin', 'length': 12, 'min_entropy': 40})
+        resultado = router.generate({'tenant_id': 'pin', 'length': 12, 'min_entropy': 39})
+        self.assertAlmostEqual(resultado['entropy'], 12 * math.log2(10))
+        self.assertIn("39.86 bits", resultado['decision_reason'])
+        # La caché de decisiones no mezcla la petición sin tenant con la del tenant
+        self.assertEqual(router.generate({'length': 12, 'min_entropy': 40})['generator'],
+                         GeneratorType.STANDARD.value)
+
+    def test_06_generador_de_pin_por_hilo(self):
+        config = compile_policy('acme', self.POLITICAS['acme'])
+        generadores = []
+        lock = threading.Lock()
+
+        def worker():
+            config.generate_pin(8, True)
+            with lock:
+                generadores.append((config.pin_generator, config.pin_generator))
+
+        hilos = [threading.Thread(target=worker) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertTrue(all(a is b for a, b in generadores))
+        self.assertEqual(len({id(a) for a, _ in generadores}), 4)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
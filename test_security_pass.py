@@ -0,0 +1,198 @@
+"""
+Pruebas del generador de contraseñas estándar.
+Archivo: test_security_pass.py
+"""
+
+import csv
+import importlib.util
+import json
+import math
+import os
+import tempfile
+import unittest
+from itertools import islice, product
+from unittest.mock import patch
+
+import security_pass
+from security_pass import (
+    LOWERCASE_LETTERS, NUMBERS, SAFE_SYMBOLS, STRENGTH_LEVELS, UPPERCASE_LETTERS,
+    calculate_entropy, entropy_table, get_entropy_strength, exact_entropy, exact_keyspace,
+    generate_password, iter_password_chunks, iter_passwords,
+)
+from random_source import RANDOM_SOURCE_MODE_ENV, DeterministicRandomSource
+
+
+class TestSecurityPass(unittest.TestCase):
+
+    def test_01_generate_password(self):
+        password, entropy, _ = generate_password(16, safe_mode=True)
+        self.assertEqual(len(password), 16)
+        self.assertTrue(set(password) <= set(UPPERCASE_LETTERS + LOWERCASE_LETTERS + NUMBERS + SAFE_SYMBOLS))
+        with self.assertRaises(ValueError):
+            generate_password(3)
+
+    def test_02_iterador_incluye_todas_las_clases(self):
+        clases = [UPPERCASE_LETTERS, LOWERCASE_LETTERS, NUMBERS, SAFE_SYMBOLS]
+        for password in islice(iter_passwords(4, safe_mode=True), 2000):
+            self.assertEqual(len(password), 4)
+            for clase in clases:
+                self.assertFalse(set(clase).isdisjoint(password), password)
+
+    def test_03_lotes(self):
+        lotes = iter_password_chunks(100, size=10, include_symbols=False)
+        primero, segundo = next(lotes), next(lotes)
+        self.assertEqual((len(primero), len(segundo)), (100, 100))
+        self.assertTrue(all(p.isalnum() and len(p) == 10 for p in primero + segundo))
+        with self.assertRaises(ValueError):
+            iter_passwords(200)
+
+    def test_04_keyspace_exacto(self):
+        """Inclusión-exclusión frente a enumeración directa en alfabetos pequeños."""
+        for sizes in [(2,), (2, 3), (1, 2, 2), (2, 1, 1, 1)]:
+            alphabet = range(sum(sizes))
+            bounds = [sum(sizes[:i]) for i in range(len(sizes) + 1)]
+            for length in range(1, 6):
+                esperado = sum(
+                    all(any(bounds[i] <= c < bounds[i + 1] for c in s) for i in range(len(sizes)))
+                    for s in product(alphabet, repeat=length))
+                self.assertEqual(exact_keyspace(length, sizes), esperado, (sizes, length))
+
+        self.assertEqual(exact_entropy(8, False, False, True, False), 8 * math.log2(10))
+        self.assertAlmostEqual(exact_entropy(12, safe_mode=True),
+                               math.log2(exact_keyspace(12, [26, 26, 10, len(SAFE_SYMBOLS)])))
+        self.assertLess(generate_password(12, safe_mode=True)[1], 12 * math.log2(76))
+        with self.assertRaises(ValueError):
+            exact_entropy(12, False, False, False, False)
+
+    def test_05_tabla_en_cache(self):
+        """Sin ruta la tabla vive en memoria; con ruta se guarda, se recarga y un archivo corrupto se reconstruye."""
+        self.assertIsNone(security_pass.KEYSPACE_CACHE_PATH)
+        cache = security_pass._cached_entropy_table
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch("security_pass.os.replace") as replace:
+                self.assertIs(entropy_table(), entropy_table())
+            replace.assert_not_called()
+
+            path = os.path.join(tmp, "keyspace.cache")
+            construida = entropy_table(path)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(construida, entropy_table())
+            cache.cache_clear()
+            self.assertEqual(entropy_table(path), construida)
+            self.assertEqual(exact_entropy(200, include_symbols=False),
+                             math.log2(exact_keyspace(200, [26, 26, 10])))
+
+            with open(path, "r+b") as f:
+                f.write(b"XXXX")
+            cache.cache_clear()
+            self.assertEqual(entropy_table(path), construida)
+            self.assertEqual(security_pass._load_entropy_table(path), construida)
+
+    @patch.dict(os.environ, {RANDOM_SOURCE_MODE_ENV: "benchmark"})
+    def test_06_fuente_determinista(self):
+        """Con la misma semilla la salida se reproduce byte a byte."""
+        def serie(semilla):
+            rng = DeterministicRandomSource(semilla)
+            return ([generate_password(16, safe_mode=True, rng=rng)[0] for _ in range(20)]
+                    + list(islice(iter_passwords(12, rng=rng), 200)))
+
+        primera = serie("bench")
+        self.assertEqual(primera, serie("bench"))
+        self.assertNotEqual(primera, serie("otra"))
+        self.assertEqual(DeterministicRandomSource(7).token_bytes(70000)[65530:65540],
+                         DeterministicRandomSource(7).token_bytes(65540)[65530:])
+
+    @patch.dict(os.environ, {RANDOM_SOURCE_MODE_ENV: "test"})
+    def test_07_uniforme_en_keyspace_restringido(self):
+        """build_password reparte por igual entre todas las cadenas con las dos clases."""
+        rng = DeterministicRandomSource(5)
+        clases = ("ab", "c")
+        cuentas = {}
+        for _ in range(64000):
+            password = security_pass.build_password(4, clases, "abc", rng)
+            cuentas[password] = cuentas.get(password, 0) + 1
+        self.assertEqual(len(cuentas), exact_keyspace(4, [2, 1]))   # 64 cadenas
+        # Esperado 1000 por cadena; forzar una por clase y barajar daría ~889 o ~1185
+        for password, n in cuentas.items():
+            self.assertLess(abs(n - 1000), 100, (password, n))
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "requiere numpy")
+class TestStrengthReport(unittest.TestCase):
+    """Puntuación vectorizada frente a las funciones escalares."""
+
+    def test_01_longitudes_y_pools(self):
+        import numpy as np
+        from strength_report import puntuar
+
+        longitudes = np.arange(0, 60).repeat(12)
+        pools = np.tile(np.array([0, 1, 2, 10, 14, 26, 36, 52, 62, 76, 84, 95]), 60)
+        entropias, codigos, histograma = puntuar(longitudes, pools)
+        for longitud, pool, e, codigo in zip(longitudes.tolist(), pools.tolist(), entropias, codigos):
+            esperada = calculate_entropy(longitud, pool)
+            self.assertAlmostEqual(e, esperada)
+            self.assertEqual(STRENGTH_LEVELS[codigo], get_entropy_strength(esperada))
+        self.assertEqual(histograma.sum(), len(longitudes))
+
+    def test_02_matriz_de_passwords(self):
+        from strength_report import matriz_passwords, puntuar_passwords
+
+        passwords = [generate_password(n, safe_mode=safe)[0] for n in (4, 12, 40) for safe in (True, False)]
+        passwords += [generate_password(10, include_symbols=False)[0], "abc", "x" * 200]
+        entropias, codigos, _ = puntuar_passwords(matriz_passwords(passwords))
+
+        for password, e in zip(passwords[:6], entropias):
+            inseguro = not set(password) <= set(UPPERCASE_LETTERS + LOWERCASE_LETTERS + NUMBERS + SAFE_SYMBOLS)
+            self.assertAlmostEqual(e, exact_entropy(len(password), safe_mode=not inseguro), msg=password)
+        letras, mayus, digitos = (any(c in clase for c in passwords[6])
+                                  for clase in (LOWERCASE_LETTERS, UPPERCASE_LETTERS, NUMBERS))
+        self.assertAlmostEqual(entropias[6], exact_entropy(10, mayus, letras, digitos, False))
+        self.assertAlmostEqual(entropias[7], calculate_entropy(3, 26))
+        self.assertAlmostEqual(entropias[8], calculate_entropy(200, 26))
+        self.assertEqual(STRENGTH_LEVELS[codigos[7]], get_entropy_strength(entropias[7]))
+
+    def test_03_reporte_por_bloques(self):
+        from strength_report import leer_filas, reporte
+
+        passwords = [generate_password(16)[0] for _ in range(250)] + ["abcd"] * 50
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta_csv = os.path.join(tmp, "export.csv")
+            with open(ruta_csv, "w", newline="", encoding="utf-8") as f:
+                escritor = csv.writer(f)
+                escritor.writerow(["id", "password"])
+                escritor.writerows(enumerate(passwords))
+            ruta_jsonl = os.path.join(tmp, "export.jsonl")
+            with open(ruta_jsonl, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps({'password': p, 'length': len(p), 'pool': 26}) + "\n"
+                             for p in passwords)
+
+            informe = reporte(leer_filas(ruta_jsonl), tamano_bloque=7)
+            self.assertEqual(informe['filas'], 300)
+            self.assertEqual([n['filas'] for n in informe['niveles']], [50, 0, 0, 250])
+            self.assertEqual(informe, reporte(leer_filas(ruta_jsonl), tamano_bloque=1000))
+
+            por_columnas = reporte(leer_filas(ruta_jsonl), columna_longitud='length', columna_pool='pool')
+            self.assertAlmostEqual(por_columnas['entropia']['max'], round(calculate_entropy(16, 26), 2))
+
+            self.assertEqual(reporte(leer_filas(ruta_csv), tamano_bloque=64), informe)
+
+    def test_04_celdas_vacias_por_columnas(self):
+        from strength_report import leer_filas, reporte
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta_csv = os.path.join(tmp, "columnas.csv")
+            with open(ruta_csv, "w", newline="", encoding="utf-8") as f:
+                f.write("length,pool\n16,26\n,26\n16,\n16\n")
+            ruta_jsonl = os.path.join(tmp, "columnas.jsonl")
+            with open(ruta_jsonl, "w", encoding="utf-8") as f:
+                f.write('{"length": 16, "pool": 26}\n{"length": null, "pool": 26}\n'
+                        '{"length": 16, "pool": null}\n{"length": 16, "pool": null}\n')
+            informe = reporte(leer_filas(ruta_csv), columna_longitud='length', columna_pool='pool')
+            self.assertEqual(informe['filas'], 4)
+            self.assertEqual(informe['niveles'][0]['filas'], 3)
+            self.assertEqual(informe, reporte(leer_filas(ruta_jsonl), columna_longitud='length',
+                                              columna_pool='pool'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,82 @@
+"""
+Pruebas del archivo de descargas (protocolo de yt-dlp) y la deduplicación.
+Archivo: test_yt_archive.py
+"""
+
+import os
+import tempfile
+import unittest
+
+from yt_archive import DownloadArchive, archive_id
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+INFO = {'id': 'dQw4w9WgXcQ', 'extractor_key': 'Youtube'}
+
+
+class TestDownloadArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = DownloadArchive(os.path.join(self.tmp.name, "archivo.db"), dedupe=True)
+
+    def tearDown(self):
+        self.archive.close()
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_01_protocolo_de_download_archive(self):
+        self.assertFalse(self.archive)
+        self.assertNotIn("youtube dQw4w9WgXcQ", self.archive)
+        self.assertNotIn(None, self.archive)
+        self.archive.add("youtube dQw4w9WgXcQ")
+        self.archive.add("youtube dQw4w9WgXcQ")
+        self.assertTrue(self.archive)
+        self.assertIn("youtube dQw4w9WgXcQ", self.archive)
+        self.assertEqual(len(self.archive), 1)
+        self.assertEqual(list(self.archive), ["youtube dQw4w9WgXcQ"])
+
+    def test_02_por_url(self):
+        self.assertEqual(archive_id(URL), "youtube dQw4w9WgXcQ")
+        self.assertFalse(self.archive.contains_url(URL))
+        final = self.write("video.mp4", b"contenido")
+        self.archive.record(INFO, final)
+        self.assertTrue(self.archive.contains_url("https://youtu.be/dQw4w9WgXcQ"))
+        self.assertEqual(self.archive.filepath(URL), final)
+        # yt-dlp anota sin archivo: no borra el ya registrado
+        self.archive.add("youtube dQw4w9WgXcQ")
+        self.assertEqual(self.archive.filepath(URL), final)
+
+    def test_03_texto_de_yt_dlp(self):
+        source = self.write("archive.txt", b"youtube aaaaaaaaaaa\n\nyoutube bbbbbbbbbbb\n")
+        self.assertEqual(self.archive.import_text(source), 2)
+        target = os.path.join(self.tmp.name, "export.txt")
+        self.assertEqual(self.archive.export_text(target), 2)
+        with open(target, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "youtube aaaaaaaaaaa\nyoutube bbbbbbbbbbb\n")
+
+    def test_04_deduplicacion_con_hardlinks(self):
+        first = self.write("Titulo.mp4", b"A" * 1000)
+        same = self.write("Otro titulo.mp4", b"A" * 1000)
+        other = self.write("Distinto.mp4", b"B" * 1000)
+        self.assertIsNone(self.archive.dedupe(first))
+        self.assertEqual(self.archive.dedupe(same), first)
+        self.assertTrue(os.path.samefile(first, same))
+        self.assertIsNone(self.archive.dedupe(other))
+        self.assertFalse(os.path.samefile(first, other))
+        # Ya enlazado: no se vuelve a hashear ni a enlazar
+        self.assertEqual(self.archive.dedupe(same), first)
+
+        # Si el original desaparece, el siguiente ocupa su lugar
+        os.remove(first)
+        os.remove(same)
+        again = self.write("Otra vez.mp4", b"A" * 1000)
+        self.assertIsNone(self.archive.dedupe(again))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,105 @@
+"""
+Pruebas de la selección de formatos por objetivo (tabla de formatos sintética).
+Archivo: test_yt_formats.py
+"""
+
+import unittest
+
+from yt_formats import (AUDIO_CODEC_EFFICIENCY, PREFER_SIZE, VIDEO_CODEC_EFFICIENCY,
+                        FormatObjective, candidates, codec_efficiency, estimate_size, rank,
+                        select, select_audio)
+
+MB = 1000 ** 2
+
+INFO = {
+    'duration': 100,
+    'formats': [
+        {'format_id': '18', 'ext': 'mp4', 'height': 360, 'vcodec': 'avc1.42001E',
+         'acodec': 'mp4a.40.2', 'filesize': 5 * MB},
+        # Sin tamaño: 1200 kbit/s × 100 s = 15 MB estimados
+        {'format_id': '22', 'ext': 'mp4', 'height': 720, 'vcodec': 'avc1.64001F',
+         'acodec': 'mp4a.40.2', 'tbr': 1200},
+        {'format_id': '136', 'ext': 'mp4', 'height': 720, 'vcodec': 'avc1.4d401f',
+         'acodec': 'none', 'vbr': 1500, 'filesize': 18 * MB},
+        {'format_id': '247', 'ext': 'webm', 'height': 720, 'vcodec': 'vp9',
+         'acodec': 'none', 'vbr': 1000, 'filesize': 12 * MB},
+        {'format_id': '398', 'ext': 'mp4', 'height': 720, 'vcodec': 'av01.0.05M.08',
+         'acodec': 'none', 'vbr': 900, 'filesize': 11 * MB},
+        {'format_id': '137', 'ext': 'mp4', 'height': 1080, 'vcodec': 'avc1.640028',
+         'acodec': 'none', 'vbr': 4000, 'filesize': 50 * MB},
+        {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2',
+         'abr': 128, 'filesize': 1_600_000},
+        {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus',
+         'abr': 130, 'filesize': 1_650_000},
+        # Storyboard: imágenes, aunque declare altura y no diga vcodec
+        {'format_id': 'sb0', 'ext': 'mhtml', 'height': 2160, 'acodec': 'none'},
+    ],
+}
+
+
+class TestFormatSelection(unittest.TestCase):
+
+    def test_01_tabla_de_objetivos(self):
+        casos = [
+            # (objetivo, strict, formato esperado)
+            (FormatObjective(), False, '137+251'),
+            (FormatObjective(min_height=720, prefer=PREFER_SIZE), False, '398+140'),
+            (FormatObjective(max_bytes=20 * MB), False, '136+251'),
+            (FormatObjective(max_bytes=15 * MB), False, '398+251'),
+            (FormatObjective(max_height=480), False, '18'),
+            (FormatObjective(max_bytes=1 * MB), False, '18'),     # el más cercano
+            (FormatObjective(max_bytes=1 * MB), True, None),
+            (FormatObjective(min_height=2160), False, '137+251'),
+            (FormatObjective(min_height=2160), True, None),
+        ]
+        for objetivo, strict, esperado in casos:
+            elegido = select(INFO, objetivo, strict=strict)
+            self.assertEqual(elegido and elegido.format_id, esperado, f"{objetivo} strict={strict}")
+
+    def test_02_tamano_estimado(self):
+        self.assertEqual(estimate_size({'filesize': 10}, 100), (10, False))
+        self.assertEqual(estimate_size({'filesize_approx': 20}, 100), (20, True))
+        self.assertEqual(estimate_size({'tbr': 1200}, 100), (15 * MB, True))
+        self.assertEqual(estimate_size({'vbr': 1000, 'abr': 200}, 100), (15 * MB, True))
+        self.assertEqual(estimate_size({'tbr': 1200}, None), (None, True))
+
+        por_id = {c.format_id: c for c in candidates(INFO)}
+        self.assertEqual((por_id['22'].size, por_id['22'].estimated), (15 * MB, True))
+        self.assertEqual((por_id['137+140'].size, por_id['137+140'].estimated),
+                         (51_600_000, False))
+        # Sin duración no hay estimación por bitrate (los tamaños declarados siguen)
+        sin_duracion = {c.format_id: c for c in candidates({**INFO, 'duration': None})}
+        self.assertIsNone(sin_duracion['22'].size)
+        # Sin tamaño no se puede garantizar un límite de bytes
+        self.assertFalse(FormatObjective(max_bytes=100 * MB).accepts(sin_duracion['22']))
+        self.assertTrue(FormatObjective(max_bytes=100 * MB).accepts(sin_duracion['136+140']))
+
+    def test_03_storyboards_excluidos(self):
+        ids = [c.format_id for c in candidates(INFO)]
+        self.assertFalse([i for i in ids if 'sb0' in i])
+        self.assertEqual(len(ids), 2 + 4 * 2)   # 2 completos + 4 videos × 2 audios
+
+    def test_04_eficiencia_de_codec(self):
+        self.assertEqual(codec_efficiency('av01.0.05M.08', VIDEO_CODEC_EFFICIENCY), 1.6)
+        self.assertEqual(codec_efficiency('VP9', VIDEO_CODEC_EFFICIENCY), 1.4)
+        self.assertEqual(codec_efficiency('none', AUDIO_CODEC_EFFICIENCY), 1.0)
+        self.assertEqual(codec_efficiency('desconocido', AUDIO_CODEC_EFFICIENCY), 1.0)
+        # A 720p: AV1 a 900 kbit/s por delante de VP9 a 1000 y de H.264 a 1200
+        orden = []
+        for c in rank(INFO, FormatObjective(max_height=720)):
+            video = c.format_id.split('+')[0]
+            if video not in orden:
+                orden.append(video)
+        self.assertEqual(orden, ['136', '398', '247', '22', '18', '137'])
+
+    def test_05_solo_audio(self):
+        self.assertEqual(select_audio(INFO).format_id, '251')
+        self.assertEqual(select_audio(INFO, codec='mp4a').format_id, '140')
+        self.assertEqual(select_audio(INFO, codec='vorbis').format_id, '251')
+        # Con tolerancia amplia, a calidad parecida gana el de menos bytes
+        self.assertEqual(select_audio(INFO, tolerance=0.5).format_id, '140')
+        self.assertIsNone(select_audio({'formats': INFO['formats'][:2]}))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
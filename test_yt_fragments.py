@@ -0,0 +1,98 @@
+"""
+Pruebas de la política de fragmentos y del presupuesto de conexiones.
+Archivo: test_yt_fragments.py
+"""
+
+import time
+import threading
+import unittest
+
+from yt_fragments import (MIB, ConnectionBudget, FragmentPolicy, ThroughputMeter, host_key)
+
+HOST = "youtube.com"
+
+
+class TestFragmentPolicy(unittest.TestCase):
+
+    def test_01_muestras_pequenas_no_cuentan(self):
+        policy = FragmentPolicy()
+        self.assertFalse(policy.record(HOST, 4, MIB, 1.0))
+        self.assertFalse(policy.record(HOST, 4, 10 * MIB, 0.1))
+        self.assertEqual(policy.suggest(HOST), 4)
+        self.assertEqual(policy.stats(), {})
+
+    def test_02_escalada_hacia_menos_conexiones(self):
+        # Host que rinde igual con cualquier concurrencia: converge al mínimo útil
+        policy = FragmentPolicy(initial_fragments=4)
+        self.assertTrue(policy.record(HOST, 4, 10 * MIB, 1.0))
+        self.assertEqual(policy.suggest(HOST), 8)        # primero explora hacia arriba
+        policy.record(HOST, 8, 10 * MIB, 1.0)
+        self.assertEqual(policy.suggest(HOST), 2)        # empate: prueba con menos
+        policy.record(HOST, 2, 10 * MIB, 1.0)
+        self.assertEqual(policy.suggest(HOST), 1)
+        policy.record(HOST, 1, 5 * MIB, 1.0)             # con 1 rinde la mitad
+        self.assertEqual(policy.suggest(HOST), 2)
+
+    def test_03_escalada_hacia_mas_conexiones(self):
+        policy = FragmentPolicy(initial_fragments=4, max_fragments=16)
+        rates = {4: 10, 8: 20, 16: 35}
+        fragments = policy.suggest(HOST)
+        for _ in range(6):
+            policy.record(HOST, fragments, rates.get(fragments, 5) * MIB, 1.0)
+            fragments = policy.suggest(HOST)
+        self.assertEqual(fragments, 16)
+        self.assertEqual(policy.stats()[HOST]['fragments'], 16)
+
+    def test_04_plan(self):
+        policy = FragmentPolicy(min_chunk=MIB, max_chunk=10 * MIB, chunk_seconds=4.0)
+        plan = policy.plan(HOST, max_connections=2)
+        self.assertEqual((plan.fragments, plan.http_chunk_size), (2, 10 * MIB))
+        policy.record(HOST, 4, 2 * MIB, 1.0)              # 2 MiB/s -> bloques de 8 MiB
+        plan = policy.plan(HOST)
+        self.assertEqual(plan.http_chunk_size, 8 * MIB)
+        self.assertEqual(plan.ydl_opts()['concurrent_fragment_downloads'], plan.fragments)
+        with self.assertRaises(ValueError):
+            FragmentPolicy(min_fragments=4, max_fragments=2)
+
+    def test_05_host_y_medidor(self):
+        self.assertEqual(host_key("https://www.youtube.com/watch?v=x"), "youtube.com")
+        self.assertEqual(host_key("https://music.youtube.com/x"), "youtube.com")
+        now = [0.0]
+        meter = ThroughputMeter(clock=lambda: now[0])
+        meter({'downloaded_bytes': 500, 'filename': 'a.part'})   # ya en disco (.part)
+        now[0] = 2.0
+        meter({'downloaded_bytes': 1500, 'filename': 'a.part'})
+        meter({'downloaded_bytes': 1200, 'filename': 'a.part'})  # no monótono
+        self.assertEqual((meter.bytes, meter.seconds), (1000, 2.0))
+
+
+class TestConnectionBudget(unittest.TestCase):
+
+    def test_01_reparto(self):
+        budget = ConnectionBudget(4)
+        self.assertEqual(budget.acquire(3), 3)
+        self.assertEqual(budget.acquire(3), 1)           # lo que queda libre
+        self.assertEqual(budget.in_use, 4)
+        cancelled = threading.Event()
+        cancelled.set()
+        self.assertEqual(budget.acquire(1, cancelled), 0)
+        budget.release(3)
+        self.assertEqual(budget.acquire(10), 3)          # nunca más que el total
+        with self.assertRaises(ValueError):
+            ConnectionBudget(0)
+
+    def test_02_espera_a_que_se_libere(self):
+        budget = ConnectionBudget(1)
+        budget.acquire(1)
+        granted = []
+        waiter = threading.Thread(target=lambda: granted.append(budget.acquire(2)))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(granted, [])
+        budget.release(1)
+        waiter.join(2)
+        self.assertEqual(granted, [1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
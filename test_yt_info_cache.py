@@ -0,0 +1,80 @@
+"""
+Pruebas de la caché de info (LRU en memoria, TTL y nivel en disco).
+Archivo: test_yt_info_cache.py
+"""
+
+import os
+import tempfile
+import unittest
+
+from yt_info_cache import InfoCache, video_key
+
+URL_A = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+URL_B = "https://www.youtube.com/watch?v=9bZkp7q19f0"
+URL_C = "https://www.youtube.com/watch?v=kJQP7kiw5Fk"
+
+
+def info(url):
+    return {'webpage_url': url, 'formats': [{'format_id': '18', 'ext': 'mp4'}]}
+
+
+class TestInfoCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = [1000.0]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "info.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cache(self, **kwargs):
+        return InfoCache(clock=lambda: self.now[0], **kwargs)
+
+    def test_01_clave_por_video(self):
+        self.assertEqual(video_key(URL_A), "Youtube:dQw4w9WgXcQ")
+        self.assertEqual(video_key("https://youtu.be/dQw4w9WgXcQ?t=10"), video_key(URL_A))
+        cache = self.cache()
+        cache.put(URL_A, info(URL_A))
+        self.assertEqual(cache.get("https://www.youtube.com/shorts/dQw4w9WgXcQ"), info(URL_A))
+
+    def test_02_ttl(self):
+        cache = self.cache(ttl=10)
+        cache.put(URL_A, info(URL_A))
+        self.now[0] += 9
+        self.assertIsNotNone(cache.get(URL_A))
+        self.now[0] += 2
+        self.assertIsNone(cache.get(URL_A))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_03_lru(self):
+        cache = self.cache(max_entries=2)
+        cache.put(URL_A, info(URL_A))
+        cache.put(URL_B, info(URL_B))
+        cache.get(URL_A)                     # A pasa a ser la más reciente
+        cache.put(URL_C, info(URL_C))
+        self.assertIsNone(cache.get(URL_B))
+        self.assertIsNotNone(cache.get(URL_A))
+        self.assertIsNotNone(cache.get(URL_C))
+        with self.assertRaises(ValueError):
+            InfoCache(max_entries=0)
+
+    def test_04_nivel_en_disco(self):
+        cache = self.cache(max_entries=1, path=self.path, ttl=10)
+        cache.put(URL_A, info(URL_A))
+        cache.put(URL_B, info(URL_B))        # A sale de memoria, no del disco
+        self.assertEqual(cache.get(URL_A), info(URL_A))
+        cache.close()
+
+        reopened = self.cache(path=self.path, ttl=10)
+        self.assertEqual(reopened.get(URL_B), info(URL_B))
+        reopened.invalidate(URL_B)
+        self.assertIsNone(reopened.get(URL_B))
+        self.now[0] += 11
+        self.assertIsNone(reopened.get(URL_A))
+        self.assertEqual(reopened.purge_expired(), 1)
+        reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
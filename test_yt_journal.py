@@ -0,0 +1,82 @@
+"""
+Pruebas del diario persistente de trabajos.
+Archivo: test_yt_journal.py
+"""
+
+import os
+import tempfile
+import unittest
+
+from yt_journal import (JOURNAL_DONE, JOURNAL_FAILED, JOURNAL_QUEUED, JOURNAL_RUNNING,
+                        JobJournal)
+
+URL_A = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+URL_B = "https://www.youtube.com/watch?v=9bZkp7q19f0"
+
+
+class TestJobJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.now = [0.0]
+        self.journal = JobJournal(os.path.join(self.tmp.name, "lote.db"), flush_interval=1.0,
+                                  clock=lambda: self.now[0])
+        self.final = os.path.join(self.tmp.name, "video.mp4")
+        with open(self.final, "wb") as f:
+            f.write(b"x" * 100)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def test_01_completado_intacto(self):
+        self.journal.queue(URL_A)
+        self.journal.start(URL_A)
+        self.journal.finish(URL_A, self.final)
+        self.assertEqual(self.journal.completed(URL_A), self.final)
+        # Misma clave para otra URL del mismo video
+        self.assertEqual(self.journal.completed("https://youtu.be/dQw4w9WgXcQ"), self.final)
+        entry = self.journal.lookup(URL_A)
+        self.assertEqual((entry.status, entry.filesize, entry.attempts), (JOURNAL_DONE, 100, 1))
+        self.assertEqual(self.journal.pending(), [])
+
+    def test_02_archivo_cambiado_vuelve_a_la_cola(self):
+        self.journal.queue(URL_A)
+        self.journal.finish(URL_A, self.final)
+        with open(self.final, "ab") as f:
+            f.write(b"y")
+        self.assertIsNone(self.journal.completed(URL_A))
+        self.assertEqual([(e.url, e.status) for e in self.journal.pending()],
+                         [(URL_A, JOURNAL_QUEUED)])
+
+        self.journal.finish(URL_A, self.final)
+        os.remove(self.final)
+        self.assertIsNone(self.journal.completed(URL_A))
+        self.assertIsNone(self.journal.lookup(URL_A).filepath)
+
+    def test_03_pendientes_y_progreso(self):
+        self.journal.queue(URL_A, "137+140")
+        self.journal.queue(URL_B)
+        self.journal.start(URL_A)
+        self.assertTrue(self.journal.progress(URL_A, {'a.f137.mp4': 10}))
+        self.assertFalse(self.journal.progress(URL_A, {'a.f137.mp4': 20}))   # dentro del intervalo
+        self.journal.start(URL_B)
+        self.journal.fail(URL_B, "HTTP Error 403")
+        self.now[0] += 1.0
+        self.assertTrue(self.journal.progress(URL_A, {'a.f137.mp4': 30, 'a.f140.m4a': 5}))
+
+        pending = self.journal.pending()
+        self.assertEqual([e.status for e in pending], [JOURNAL_RUNNING, JOURNAL_FAILED])
+        self.assertEqual(pending[0].format_choice, "137+140")
+        self.assertEqual((pending[0].bytes_done, pending[0].parts),
+                         (35, {'a.f137.mp4': 30, 'a.f140.m4a': 5}))
+        self.assertEqual(pending[1].error, "HTTP Error 403")
+
+        # Volver a encolar conserva bytes e intentos
+        self.journal.queue(URL_A)
+        entry = self.journal.lookup(URL_A)
+        self.assertEqual((entry.status, entry.bytes_done, entry.attempts), (JOURNAL_QUEUED, 35, 1))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,233 @@
+"""
+Pruebas del gestor de descargas concurrentes (con un downloader falso, sin red).
+Archivo: test_yt_manager.py
+"""
+
+import os
+import time
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp.utils import DownloadError
+
+from yt_fragments import FragmentPolicy, host_key
+from yt_journal import JobJournal
+from yt_manager import (JOB_CANCELLED, JOB_DONE, JOB_FAILED, BandwidthLimiter,
+                        DownloadManager, parse_rate)
+
+
+def youtube(i):
+    return f"https://www.youtube.com/watch?v=video{i:06d}"
+
+
+class FakeDownloader:
+    """
+    Sustituto de YouTubeDownloader: llama a los hooks de progreso con
+    `steps` bloques de `chunk` bytes y anota concurrencia por host y orden.
+    """
+
+    def __init__(self, steps=5, chunk=1000, delay=0.005, failures=0, merge=None, gate=None):
+        self.fragment_policy = FragmentPolicy()
+        self.steps = steps
+        self.chunk = chunk
+        self.delay = delay
+        self.failures = failures      # intentos fallidos por URL antes de terminar bien
+        self.merge = merge            # ThreadPoolExecutor: simula la fusión en el pool
+        self.gate = gate              # threading.Event que retiene las descargas
+        self.order = []
+        self.attempts = {}
+        self.peak = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def download(self, url, format_choice=None, progress_hooks=None, max_connections=None):
+        host = host_key(url)
+        with self._lock:
+            self.order.append(url)
+            self.attempts[url] = self.attempts.get(url, 0) + 1
+            attempt = self.attempts[url]
+            self._active[host] = self._active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self._active[host])
+        try:
+            if self.gate is not None:
+                self.gate.wait(5)
+            for step in range(1, self.steps + 1):
+                time.sleep(self.delay)
+                for hook in progress_hooks or ():
+                    hook({'status': 'downloading', 'downloaded_bytes': step * self.chunk,
+                          'filename': url})
+            if attempt <= self.failures:
+                raise DownloadError(f"fallo simulado {attempt}")
+        finally:
+            with self._lock:
+                self._active[host] -= 1
+        info = {'requested_downloads': [{'filepath': url}]}
+        if self.merge is not None:
+            info['postprocess'] = self.merge.submit(time.sleep, 0.1)
+        return info
+
+
+class TestDownloadManager(unittest.TestCase):
+
+    def test_01_limite_por_host(self):
+        downloader = FakeDownloader()
+        urls = [youtube(i) for i in range(8)] + [f"https://vimeo.com/{i}" for i in range(4)]
+        with DownloadManager(downloader, workers=6, per_host=2) as manager:
+            jobs = manager.submit_many(urls)
+            manager.join()
+        self.assertTrue(all(job.status == JOB_DONE for job in jobs))
+        self.assertEqual(downloader.peak, {'youtube.com': 2, 'vimeo.com': 2})
+        self.assertEqual(manager.metrics()['bytes'], len(urls) * 5000)
+
+    def test_02_prioridad(self):
+        gate = threading.Event()
+        downloader = FakeDownloader(gate=gate, steps=1)
+        with DownloadManager(downloader, workers=1) as manager:
+            first = manager.submit(youtube(0))
+            while not downloader.order:
+                time.sleep(0.001)
+            manager.submit(youtube(1), priority=0)
+            manager.submit(youtube(2), priority=5)
+            manager.submit(youtube(3), priority=0)
+            gate.set()
+            manager.join()
+        self.assertEqual(first.status, JOB_DONE)
+        self.assertEqual(downloader.order, [youtube(0), youtube(2), youtube(1), youtube(3)])
+
+    def test_03_cancelacion(self):
+        gate = threading.Event()
+        downloader = FakeDownloader(gate=gate, steps=50, delay=0.01)
+        with DownloadManager(downloader, workers=1) as manager:
+            running = manager.submit(youtube(0))
+            queued = manager.submit(youtube(1))
+            while not downloader.order:
+                time.sleep(0.001)
+            self.assertTrue(manager.cancel(queued))
+            self.assertTrue(manager.cancel(running))
+            gate.set()
+            manager.join()
+        self.assertEqual(running.status, JOB_CANCELLED)
+        self.assertEqual(queued.status, JOB_CANCELLED)
+        self.assertIsNone(running.error)
+        self.assertEqual(downloader.order, [youtube(0)])
+        self.assertFalse(manager.cancel(running))
+
+    def test_04_reintentos_con_espera(self):
+        downloader = FakeDownloader(failures=2, steps=1)
+        with DownloadManager(downloader, retries=2, backoff=0.02, backoff_max=0.05) as manager:
+            job = manager.submit(youtube(0))
+            manager.join()
+        self.assertEqual(job.status, JOB_DONE)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(manager.metrics()['retries'], 2)
+
+        downloader = FakeDownloader(failures=5, steps=1)
+        with DownloadManager(downloader, retries=1, backoff=0.01) as manager:
+            job = manager.submit(youtube(0))
+            manager.join()
+        self.assertEqual(job.status, JOB_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn("fallo simulado 2", job.error)
+
+        manager = DownloadManager(downloader, backoff=1.0, backoff_max=3.0)
+        delays = [manager.retry_delay(n) for n in (1, 2, 3, 4)]
+        manager.shutdown()
+        for delay, tope in zip(delays, (1.0, 2.0, 3.0, 3.0)):
+            self.assertTrue(tope / 2 <= delay <= tope, delays)
+
+    def test_05_contrapresion_de_feed(self):
+        gate = threading.Event()
+        downloader = FakeDownloader(gate=gate, steps=1, delay=0)
+        produced = []
+
+        def entries():
+            for i in range(20):
+                produced.append(i)
+                yield {'url': youtube(i)}
+
+        with DownloadManager(downloader, workers=1) as manager:
+            manager.feed(entries(), max_pending=3)
+            time.sleep(0.1)
+            # 1 en curso + 3 en cola + 1 esperando hueco en el alimentador
+            self.assertLessEqual(len(produced), 5)
+            self.assertTrue(manager.feeding)
+            gate.set()
+            manager.join()
+        self.assertFalse(manager.feeding)
+        self.assertEqual(len(produced), 20)
+        self.assertEqual(manager.metrics()[JOB_DONE], 20)
+
+    def test_06_limitador_de_ancho_de_banda(self):
+        now = [0.0]
+        limiter = BandwidthLimiter(100, clock=lambda: now[0])
+        sin_espera = threading.Event()
+        sin_espera.set()
+        self.assertEqual(limiter.consume(100, sin_espera), 0.0)
+        self.assertAlmostEqual(limiter.consume(50, sin_espera), 0.5)
+        now[0] = 2.0   # recarga hasta el burst, no más
+        self.assertEqual(limiter.consume(50, sin_espera), 0.0)
+        self.assertAlmostEqual(limiter.consume(100, sin_espera), 0.5)
+        with self.assertRaises(ValueError):
+            BandwidthLimiter(0)
+        self.assertEqual(parse_rate("2M"), 2 * 1024 ** 2)
+        self.assertEqual(parse_rate("512k"), 512 * 1024)
+
+    def test_07_diario_salta_completados(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            final = os.path.join(tmp, "video.mp4")
+            with open(final, "wb") as f:
+                f.write(b"x" * 100)
+            journal = JobJournal(os.path.join(tmp, "lote.db"))
+            journal.queue(youtube(0))
+            journal.finish(youtube(0), final)
+            downloader = FakeDownloader(steps=1)
+            with DownloadManager(downloader, journal=journal) as manager:
+                skipped = manager.submit(youtube(0))
+                fresh = manager.submit(youtube(1))
+                manager.join()
+            journal.close()
+        self.assertTrue(skipped.skipped)
+        self.assertEqual(skipped.filepath, final)
+        self.assertEqual(fresh.status, JOB_DONE)
+        self.assertEqual(downloader.order, [youtube(1)])
+
+    def test_08_shutdown_espera_fusiones(self):
+        with ThreadPoolExecutor(1) as merges:
+            downloader = FakeDownloader(steps=1, merge=merges)
+            with tempfile.TemporaryDirectory() as tmp:
+                journal = JobJournal(os.path.join(tmp, "lote.db"))
+                with DownloadManager(downloader, workers=3, journal=journal) as manager:
+                    jobs = manager.submit_many([youtube(i) for i in range(3)])
+                journal.close()
+        self.assertEqual([job.status for job in jobs], [JOB_DONE] * 3)
+        self.assertEqual(manager.metrics()['postprocessing'], 0)
+
+    def test_09_cancelar_detiene_el_alimentador(self):
+        gate = threading.Event()
+        downloader = FakeDownloader(gate=gate, steps=20, delay=0.01)
+        produced = []
+
+        def entries():
+            for i in range(1000):
+                produced.append(i)
+                yield youtube(i)
+
+        with DownloadManager(downloader, workers=1) as manager:
+            manager.feed(entries(), max_pending=3)
+            while len(produced) < 5:
+                time.sleep(0.001)
+            manager.cancel_all()
+            gate.set()
+            self.assertTrue(manager.join(timeout=5))
+            with self.assertRaises(RuntimeError):
+                manager.feed([youtube(0)])
+        self.assertFalse(manager.feeding)
+        self.assertLessEqual(len(produced), 6)
+        self.assertEqual(downloader.order, [youtube(0)])
+        self.assertTrue(all(job.status == JOB_CANCELLED for job in manager.jobs()))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
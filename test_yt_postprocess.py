@@ -0,0 +1,152 @@
+"""
+Pruebas del pool de postprocesado (ffmpeg simulado, sin procesos reales).
+Archivo: test_yt_postprocess.py
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from subprocess import CompletedProcess
+from unittest.mock import patch
+
+import yt_postprocess
+from yt_postprocess import (PostProcessError, PostProcessPool, extract_audio, merge_streams,
+                            remux, run_ffmpeg)
+
+
+class FakeFFmpeg:
+    """Sustituto de run_ffmpeg: anota los argumentos y escribe el archivo de salida."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ffmpeg, args):
+        self.calls.append(args)
+        with open(args[-1], "w") as f:
+            f.write("salida")
+
+
+class TestPostProcess(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ffmpeg = FakeFFmpeg()
+        patcher = patch.object(yt_postprocess, "run_ffmpeg", self.ffmpeg)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name, content=None):
+        path = os.path.join(self.tmp.name, name)
+        if content is not None:
+            with open(path, "w") as f:
+                f.write(content)
+        return path
+
+    def test_01_fusion_sin_recodificar(self):
+        video, audio = self.path("t.f137.mp4", "v"), self.path("t.f140.m4a", "a")
+        final = self.path("t.mp4")
+        self.assertEqual(merge_streams("ffmpeg", video, audio, final), final)
+        self.assertEqual(self.ffmpeg.calls[0], [
+            "-i", video, "-i", audio, "-map", "0:v:0", "-map", "1:a:0", "-c", "copy",
+            "-movflags", "+faststart", self.path("t.temp.mp4")])
+        # El temporal se renombra al final y las partes se borran
+        with open(final) as f:
+            self.assertEqual(f.read(), "salida")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["t.mp4"])
+
+    def test_02_fusion_con_miniatura_conservando_partes(self):
+        video, audio = self.path("t.f248.webm", "v"), self.path("t.f251.webm", "a")
+        thumbnail = self.path("t.jpg", "j")
+        merge_streams("ffmpeg", video, audio, self.path("t.mkv"), thumbnail, keep_parts=True)
+        args = self.ffmpeg.calls[0]
+        self.assertEqual(args[4:6], ["-i", thumbnail])
+        self.assertIn("2:v:0", args)
+        self.assertEqual(args[-5:-1], ["-c:v:1", "mjpeg", "-disposition:v:1", "attached_pic"])
+        self.assertNotIn("-movflags", args)   # solo para mp4/m4a/mov
+        self.assertEqual(sorted(os.listdir(self.tmp.name)),
+                         ["t.f248.webm", "t.f251.webm", "t.jpg", "t.mkv"])
+
+    def test_03_remux_y_extraccion_de_audio(self):
+        fuente = self.path("t.webm", "x")
+        remux("ffmpeg", fuente, self.path("t.mkv"))
+        self.assertEqual(self.ffmpeg.calls[-1][:6], ["-i", fuente, "-map", "0", "-c", "copy"])
+        self.assertFalse(os.path.exists(fuente))
+
+        # Mismo códec: copia; otro códec: recodifica con el codificador del formato
+        casos = [("t.m4a", "m4a", "mp4a.40.2", "copy"), ("t.mp3", "mp3", "opus", "libmp3lame"),
+                 ("t.opus", "opus", None, "libopus")]
+        for nombre, formato, acodec, esperado in casos:
+            fuente = self.path("t.webm", "x")
+            extract_audio("ffmpeg", fuente, self.path(nombre), formato, acodec)
+            args = self.ffmpeg.calls[-1]
+            self.assertEqual(args[args.index("-c:a") + 1], esperado, nombre)
+            self.assertEqual(args[-1], self.path(nombre.replace(".", ".temp.")))
+            self.assertFalse(os.path.exists(fuente))
+
+        # Sobre sí mismo no borra la fuente (ya es la salida renombrada)
+        fuente = self.path("u.m4a", "x")
+        extract_audio("ffmpeg", fuente, fuente, "m4a", "mp4a.40.2")
+        self.assertTrue(os.path.exists(fuente))
+
+    def test_04_error_de_ffmpeg(self):
+        fallo = CompletedProcess([], 1, stdout="", stderr="Invalid data found\n")
+        with patch("yt_postprocess.subprocess.run", return_value=fallo) as run:
+            with self.assertRaisesRegex(PostProcessError, r"ffmpeg \(1\): Invalid data found"):
+                run_ffmpeg("/usr/bin/ffmpeg", ["-i", "x"])
+        self.assertEqual(run.call_args.args[0],
+                         ["/usr/bin/ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", "x"])
+
+
+class TestPostProcessPool(unittest.TestCase):
+
+    def test_01_submit_bloquea_con_la_cola_llena(self):
+        gate = threading.Event()
+        with PostProcessPool(workers=1, max_pending=1, ffmpeg="ffmpeg") as pool:
+            # 1 en curso + 1 en cola ocupan todos los huecos
+            futures = [pool.submit(gate.wait, 5) for _ in range(2)]
+            enviado = threading.Event()
+
+            def tercero():
+                futures.append(pool.submit(gate.wait, 5))
+                enviado.set()
+
+            hilo = threading.Thread(target=tercero)
+            hilo.start()
+            self.assertFalse(enviado.wait(0.2))
+            self.assertEqual(pool.metrics()['submitted'], 2)
+            gate.set()
+            hilo.join(5)
+            self.assertTrue(enviado.is_set())
+            for future in futures:
+                future.result(5)
+
+            with self.assertRaises(ZeroDivisionError):
+                pool.submit(lambda: 1 / 0).result(5)
+
+        metrics = pool.metrics()
+        self.assertEqual((metrics['submitted'], metrics['done'], metrics['failed'], metrics['pending']),
+                         (4, 3, 1, 0))
+        self.assertGreaterEqual(metrics['wait_seconds'], 0.15)
+        self.assertTrue(pool.available)
+
+    def test_02_merge_en_el_pool(self):
+        ffmpeg = FakeFFmpeg()
+        with tempfile.TemporaryDirectory() as tmp, patch.object(yt_postprocess, "run_ffmpeg", ffmpeg):
+            partes = []
+            for nombre in ("t.f137.mp4", "t.f140.m4a"):
+                partes.append(os.path.join(tmp, nombre))
+                with open(partes[-1], "w") as f:
+                    f.write(nombre)
+            final = os.path.join(tmp, "t.mp4")
+            with PostProcessPool(workers=2, ffmpeg="ffmpeg") as pool:
+                self.assertEqual(pool.merge(*partes, final).result(5), final)
+            self.assertEqual(os.listdir(tmp), ["t.mp4"])
+        self.assertEqual(pool.metrics()['done'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
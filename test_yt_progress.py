@@ -0,0 +1,63 @@
+"""
+Pruebas del progreso agregado (métricas y dibujo, sin terminal).
+Archivo: test_yt_progress.py
+"""
+
+import io
+import unittest
+
+from yt_progress import (PROGRESS_DOWNLOADING, PROGRESS_PROCESSING, ProgressAggregator,
+                         format_eta, format_rate)
+
+
+class TestProgressAggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.progress = ProgressAggregator(stream=self.stream, render=False, max_lines=1)
+
+    def test_01_metricas_por_trabajo(self):
+        video = self.progress.track(1, "https://youtu.be/a")
+        self.progress.track(2)
+        video({'status': 'downloading', 'downloaded_bytes': 400, 'total_bytes': 1000,
+               'speed': 100.0, 'eta': 6, 'info_dict': {'title': 'Mi video'}})
+        metrics = self.progress.metrics()
+        self.assertEqual((metrics['active'], metrics['waiting']), (1, 1))
+        self.assertEqual((metrics['bytes'], metrics['speed']), (400, 100.0))
+        first = metrics['jobs'][0]
+        self.assertEqual((first['label'], first['status'], first['total']),
+                         ('Mi video', PROGRESS_DOWNLOADING, 1000))
+        self.assertEqual(metrics['jobs'][1]['label'], '2')
+
+        # Video terminado, empieza el audio: el total acumula los dos archivos
+        video({'status': 'finished', 'total_bytes': 1000})
+        video({'status': 'downloading', 'downloaded_bytes': 50, 'total_bytes': 200})
+        snapshot = self.progress.metrics()['jobs'][0]
+        self.assertEqual((snapshot['downloaded'], snapshot['total']), (1050, 1200))
+        video({'status': 'finished', 'total_bytes': 200})
+        self.assertEqual(self.progress.metrics()['jobs'][0]['status'], PROGRESS_PROCESSING)
+
+        self.progress.finish(1, "done")
+        self.progress.finish(2, "failed")
+        metrics = self.progress.metrics()
+        self.assertEqual(metrics['finished'], {'done': 1, 'failed': 1})
+        self.assertEqual((metrics['bytes'], metrics['jobs']), (1200, []))
+
+    def test_02_dibujo_sin_terminal(self):
+        for key in (1, 2):
+            hook = self.progress.track(key, f"Video {key}")
+            hook({'status': 'downloading', 'downloaded_bytes': 10, 'speed': 10.0 * key})
+        lines = self.progress.lines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("2 activas", lines[0])
+        self.assertIn("Video 2", lines[1])            # el más rápido primero
+        self.assertIn("1 más", lines[2])
+        self.progress.draw()
+        self.progress.write("aviso")
+        self.assertEqual(self.stream.getvalue().splitlines(), [lines[0], "aviso"])
+        self.assertEqual(format_eta(3725), "1:02:05")
+        self.assertEqual(format_rate(None), "-")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,241 @@
+"""
+Pruebas de YouTubeDownloader con un YoutubeDL simulado (sin red).
+Archivo: test_yt_videos.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+from concurrent.futures import Future
+
+import yt_videos
+from yt_dlp.utils import DownloadError
+
+from yt_archive import DownloadArchive
+from yt_videos import YouTubeDownloader
+
+VIDEO_A = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+VIDEO_B = "https://www.youtube.com/watch?v=9bZkp7q19f0"
+VIDEO_C = "https://www.youtube.com/watch?v=kJQP7kiw5Fk"
+CHANNEL = "https://www.youtube.com/@canal"
+
+
+def flat(url, vid):
+    return {'_type': 'url', 'ie_key': 'Youtube', 'id': vid, 'url': url, 'title': vid}
+
+
+class FakeExtractor:
+
+    @staticmethod
+    def is_single_video(url):
+        return True
+
+
+class FakeYoutubeDL:
+    """Responde con `results` (URL -> resultado de extract_info) y anota las llamadas."""
+
+    results = {}
+    parts = []
+    calls = []
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def sanitize_info(self, info):
+        return info
+
+    def get_info_extractor(self, ie_key):
+        return FakeExtractor()
+
+    def extract_info(self, url, download=True, process=True, ie_key=None):
+        FakeYoutubeDL.calls.append(url)
+        return self.results[url]
+
+    def prepare_filename(self, info):
+        return info['filename']
+
+    def process_ie_result(self, info, download=True):
+        if not download:
+            return {**info, 'requested_formats': [{'format_id': '137'}, {'format_id': '140'}]}
+        return {**info, 'requested_downloads': list(self.parts)}
+
+
+class TestYouTubeDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.real_ydl = yt_videos.yt_dlp.YoutubeDL
+        yt_videos.yt_dlp.YoutubeDL = FakeYoutubeDL
+        FakeYoutubeDL.results = {}
+        FakeYoutubeDL.parts = []
+        FakeYoutubeDL.calls = []
+        self.archive = DownloadArchive(":memory:")
+
+    def tearDown(self):
+        yt_videos.yt_dlp.YoutubeDL = self.real_ydl
+        self.archive.close()
+        self.tmp.cleanup()
+
+    def downloader(self, **kwargs):
+        return YouTubeDownloader(self.tmp.name, verbose=False, archive=self.archive, **kwargs)
+
+    def test_01_listas_anidadas_con_archivo_y_cache(self):
+        self.archive.add("youtube 9bZkp7q19f0")
+        resolved = {'_type': 'video', 'ie_key': 'Youtube', 'id': 'kJQP7kiw5Fk',
+                    'webpage_url': VIDEO_C, 'formats': [{'format_id': '18'}]}
+        FakeYoutubeDL.results[CHANNEL] = {
+            '_type': 'playlist', 'extractor_key': 'YoutubeTab', 'entries': [
+                flat(VIDEO_A, 'dQw4w9WgXcQ'),
+                {'_type': 'playlist', 'entries': [flat(VIDEO_B, '9bZkp7q19f0'), resolved]},
+            ]}
+        downloader = self.downloader()
+        entries = list(downloader.iter_playlist(CHANNEL))
+        self.assertEqual([e['url'] for e in entries], [VIDEO_A, VIDEO_C])
+        self.assertIs(downloader.info_cache.get(VIDEO_C), resolved)
+        self.assertIsNone(downloader.info_cache.get(VIDEO_A))
+        self.assertEqual(list(downloader.iter_playlist(CHANNEL, start=2)), entries[1:])
+
+    def test_02_archivado_no_se_extrae(self):
+        final = os.path.join(self.tmp.name, "video.mp4")
+        self.archive.record({'id': 'dQw4w9WgXcQ', 'extractor_key': 'Youtube'}, final)
+        result = self.downloader().download("https://youtu.be/dQw4w9WgXcQ")
+        self.assertTrue(result['archived'])
+        self.assertEqual(result['requested_downloads'], [{'filepath': final}])
+        self.assertEqual(FakeYoutubeDL.calls, [])
+
+    def test_03_partes_incompletas(self):
+        class Pool:
+            available = True
+
+            def merge(self, *args):
+                raise AssertionError("no debe fusionar")
+
+        FakeYoutubeDL.results[VIDEO_A] = {
+            'id': 'dQw4w9WgXcQ', 'extractor_key': 'Youtube', 'title': 't',
+            'filename': os.path.join(self.tmp.name, "t.mp4")}
+        FakeYoutubeDL.parts = [{'filepath': os.path.join(self.tmp.name, "t.f137.mp4"),
+                                'vcodec': 'avc1'}]
+        with self.assertRaisesRegex(DownloadError, "137,140"):
+            self.downloader(postprocess=Pool()).download(VIDEO_A)
+
+    def test_04_video_suelto_queda_en_cache(self):
+        info = {'_type': 'video', 'extractor_key': 'Youtube', 'id': 'dQw4w9WgXcQ',
+                'webpage_url': VIDEO_A, 'formats': [{'format_id': '18'}]}
+        FakeYoutubeDL.results[VIDEO_A] = info
+        downloader = self.downloader()
+        self.assertEqual([e['id'] for e in downloader.iter_playlist(VIDEO_A)], ['dQw4w9WgXcQ'])
+        self.assertIs(downloader.info_cache.get(VIDEO_A), info)
+
+    def test_05_partes_al_pool_de_fusion(self):
+        merges = []
+
+        class Pool:
+            available = True
+
+            def merge(self, *args):
+                merges.append(args)
+                future = Future()
+                future.set_result(args[2])
+                return future
+
+        final = os.path.join(self.tmp.name, "t.mp4")
+        video = os.path.join(self.tmp.name, "t.f137.mp4")
+        audio = os.path.join(self.tmp.name, "t.f140.m4a")
+        thumbnail = os.path.join(self.tmp.name, "t.jpg")
+        FakeYoutubeDL.results[VIDEO_A] = {
+            'id': 'dQw4w9WgXcQ', 'extractor_key': 'Youtube', 'title': 't', 'filename': final}
+        FakeYoutubeDL.parts = [
+            {'filepath': audio, 'vcodec': 'none', 'acodec': 'mp4a.40.2'},
+            {'filepath': video, 'vcodec': 'avc1', 'acodec': 'none',
+             'thumbnails': [{'url': 'x'}, {'url': 'y', 'filepath': thumbnail}]},
+        ]
+        result = self.downloader(postprocess=Pool(), embed_thumbnail=True).download(VIDEO_A)
+        self.assertEqual(merges, [(video, audio, final, thumbnail)])
+        self.assertEqual(result['requested_downloads'], [{'filepath': final}])
+        self.assertEqual(result['postprocess'].result(), final)
+        # Se anota en el archivo al terminar la fusión, con la ruta final
+        self.assertEqual(self.archive.filepath(VIDEO_A), final)
+
+        # Sin archivo de descargas pero con el final ya en disco: ni partes ni fusión
+        with open(final, "w") as f:
+            f.write("x")
+        result = YouTubeDownloader(self.tmp.name, verbose=False, postprocess=Pool()).download(VIDEO_A)
+        self.assertEqual(result['requested_downloads'], [{'filepath': final}])
+        self.assertNotIn('postprocess', result)
+        self.assertEqual(len(merges), 1)
+
+    def test_06_opciones_de_solo_audio(self):
+        class Pool:
+            available = True
+
+        opts = self.downloader(audio_only=True).download_options()
+        self.assertEqual(opts['format'], 'bestaudio/best')
+        self.assertNotIn('postprocessors', opts)
+        self.assertEqual(self.downloader(audio_only=True).download_options('251')['format'],
+                         '251/bestaudio/best')
+        # Sin pool convierte yt-dlp (FFmpegExtractAudio); con pool, la conversión va al pool
+        opts = self.downloader(audio_only=True, audio_format='mp3').download_options()
+        self.assertEqual(opts['postprocessors'], [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3'}])
+        opts = self.downloader(audio_only=True, audio_format='mp3', postprocess=Pool()).download_options()
+        self.assertNotIn('postprocessors', opts)
+        # audio_format solo cuenta en modo audio
+        self.assertIsNone(self.downloader(audio_format='mp3').audio_format)
+        with self.assertRaises(ValueError):
+            self.downloader(audio_only=True, audio_format='wav')
+
+    def test_07_conversion_de_audio_en_el_pool(self):
+        conversions = []
+
+        class Pool:
+            available = True
+
+            def extract_audio(self, *args):
+                conversions.append(args)
+                future = Future()
+                future.set_result(args[1])
+                return future
+
+        webm = os.path.join(self.tmp.name, "t.webm")
+        m4a = os.path.join(self.tmp.name, "t.m4a")
+        casos = [
+            # (archivo bajado, acodec, formato pedido, conversión esperada o None)
+            (webm, 'opus', 'mp3', (webm, os.path.join(self.tmp.name, "t.mp3"), 'mp3', 'opus')),
+            (webm, 'opus', 'opus', (webm, os.path.join(self.tmp.name, "t.opus"), 'opus', 'opus')),
+            (m4a, 'mp4a.40.2', 'm4a', None),     # mismo códec y extensión: nada que hacer
+        ]
+        for source, acodec, audio_format, esperado in casos:
+            conversions.clear()
+            FakeYoutubeDL.results[VIDEO_A] = {'id': 'dQw4w9WgXcQ', 'extractor_key': 'Youtube',
+                                              'title': 't'}
+            FakeYoutubeDL.parts = [{'filepath': source, 'acodec': acodec, 'vcodec': 'none'}]
+            downloader = YouTubeDownloader(self.tmp.name, verbose=False, postprocess=Pool(),
+                                           audio_only=True, audio_format=audio_format)
+            result = downloader.download(VIDEO_A)
+            if esperado is None:
+                self.assertEqual(conversions, [])
+                self.assertNotIn('postprocess', result)
+                self.assertEqual(result['requested_downloads'][0]['filepath'], source)
+            else:
+                self.assertEqual(conversions, [esperado])
+                self.assertEqual(result['requested_downloads'][0]['filepath'], esperado[1])
+                self.assertEqual(result['postprocess'].result(), esperado[1])
+
+    def test_08_audioyt_valida_el_formato(self):
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audioYt.py")
+        proceso = subprocess.run([sys.executable, script, "wav"], stdin=subprocess.DEVNULL,
+                                 capture_output=True, text=True, timeout=60)
+        self.assertEqual(proceso.returncode, 1)
+        self.assertIn("Uso: python3 audioYt.py [m4a|mp3|opus]", proceso.stderr)
+        self.assertNotIn("Traceback", proceso.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,241 @@
+"""
+Archivo de Descargas e Índice de Contenido
+Archivo: yt_archive.py
+
+yt-dlp evita repetir descargas con download_archive: un archivo de texto con
+una línea "<extractor> <id>" por video que se carga entero en un set al
+crear cada YoutubeDL. Con cientos de miles de entradas eso son segundos de
+arranque y decenas de MB por instancia (y YouTubeDownloader crea una por
+descarga).
+
+DownloadArchive guarda las mismas claves en SQLite (clave primaria sin
+rowid: una búsqueda en el índice por consulta, sin cargar nada al arrancar)
+e implementa el protocolo que yt-dlp acepta en lugar de una ruta
+(`in`, add() y bool), así que se pasa tal cual como download_archive.
+Además guarda el archivo final de cada video.
+
+DEDUPLICACIÓN (opcional):
+=========================
+Dos trabajos pueden guardar el mismo contenido con títulos distintos
+('%(title)s.%(ext)s'). Con dedupe=True cada archivo completado se compara
+con los anteriores del mismo tamaño (solo entonces se calcula su hash,
+BLAKE2b) y, si coincide, se sustituye por un hardlink al existente.
+
+Uso:
+    archive = DownloadArchive("archivo.db", dedupe=True)
+    archive.import_text("archive.txt")          # archivo de yt-dlp existente
+    downloader = YouTubeDownloader(archive=archive)
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Iterable, Iterator, Optional
+
+from yt_dlp.utils import make_archive_id
+
+from yt_info_cache import video_key
+
+HASH_ALGORITHM = "blake2b"
+IMPORT_BATCH = 10000
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS archive ("
+    "id TEXT PRIMARY KEY, filepath TEXT, added REAL NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS content ("
+    "filepath TEXT PRIMARY KEY, size INTEGER NOT NULL, hash TEXT)",
+    "CREATE INDEX IF NOT EXISTS content_size ON content (size)",
+)
+
+
+def archive_id(url: str) -> Optional[str]:
+    """Clave de download_archive ("youtube <id>") de una URL, sin red (None si no se reconoce)."""
+    key = video_key(url)
+    if key == url:
+        return None
+    extractor, _, video_id = key.partition(":")
+    return make_archive_id(extractor, video_id)
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, HASH_ALGORITHM).hexdigest()
+
+
+class DownloadArchive:
+    """
+    Archivo de descargas en SQLite, compatible con download_archive de yt-dlp.
+    Thread-safe (una conexión con lock).
+    """
+
+    def __init__(self, path: str, dedupe: bool = False):
+        """
+        Args:
+            path: Archivo SQLite
+            dedupe: Sustituir por hardlinks los archivos de contenido repetido
+        """
+        self.path = path
+        self.dedupe_enabled = dedupe
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    # --- Protocolo de download_archive (yt-dlp) ---
+
+    def __contains__(self, vid_id: object) -> bool:
+        if not isinstance(vid_id, str):
+            return False
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM archive WHERE id = ?", (vid_id,)).fetchone() is not None
+
+    def add(self, vid_id: str, filepath: Optional[str] = None) -> None:
+        """Registra un video (yt-dlp lo llama sin archivo; record() lo completa)."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO archive VALUES (?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "filepath = COALESCE(excluded.filepath, archive.filepath)",
+                (vid_id, filepath, time.time()))
+            self._db.commit()
+
+    def __bool__(self) -> bool:
+        # yt-dlp comprueba `if not self.archive` antes de cada búsqueda
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM archive LIMIT 1").fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            ids = [row[0] for row in self._db.execute("SELECT id FROM archive ORDER BY id")]
+        return iter(ids)
+
+    # --- Por URL ---
+
+    def contains_url(self, url: str) -> bool:
+        vid_id = archive_id(url)
+        return vid_id is not None and vid_id in self
+
+    def filepath(self, url: str) -> Optional[str]:
+        """Archivo guardado para la URL, si está archivada."""
+        vid_id = archive_id(url)
+        if vid_id is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT filepath FROM archive WHERE id = ?", (vid_id,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, info: dict, filepath: Optional[str]) -> Optional[str]:
+        """
+        Registra un video descargado (info de yt-dlp) y, con dedupe, deduplica
+        su archivo.
+
+        Returns:
+            str: Archivo existente al que se enlazó `filepath`, o None
+        """
+        linked = None
+        if filepath and self.dedupe_enabled:
+            linked = self.dedupe(filepath)
+        extractor = info.get('extractor_key') or info.get('ie_key')
+        if extractor and info.get('id'):
+            self.add(make_archive_id(extractor, info['id']), filepath)
+        return linked
+
+    # --- Compatibilidad con archivos de texto ---
+
+    def import_text(self, path: str) -> int:
+        """Importa un archivo de download_archive de yt-dlp. Returns: líneas leídas."""
+        count = 0
+        now = time.time()
+        with open(path, encoding="utf-8") as f:
+            batch = []
+            for line in f:
+                line = line.strip()
+                if line:
+                    batch.append((line, now))
+                    count += 1
+                if len(batch) >= IMPORT_BATCH:
+                    self._insert_ids(batch)
+                    batch = []
+            self._insert_ids(batch)
+        return count
+
+    def export_text(self, path: str) -> int:
+        """Escribe las claves en formato de download_archive de yt-dlp."""
+        ids = list(self)
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(vid_id + "\n" for vid_id in ids)
+        return len(ids)
+
+    def _insert_ids(self, rows: Iterable[tuple]) -> None:
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO archive (id, added) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    # --- Deduplicación ---
+
+    def dedupe(self, path: str) -> Optional[str]:
+        """
+        Enlaza `path` al archivo existente con el mismo contenido, si lo hay.
+
+        Solo se calcula el hash cuando otro archivo indexado tiene el mismo
+        tamaño (y el de ese otro, si aún no lo tenía). Si el hardlink no es
+        posible (otro sistema de archivos), se conserva el archivo.
+
+        Returns:
+            str: Archivo al que quedó enlazado `path`, o None si es contenido nuevo
+        """
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        with self._lock:
+            candidates = self._db.execute(
+                "SELECT filepath, hash FROM content WHERE size = ? AND filepath != ?",
+                (size, path)).fetchall()
+
+        digest = None
+        for candidate, candidate_hash in candidates:
+            if not os.path.isfile(candidate) or os.path.getsize(candidate) != size:
+                self._forget(candidate)
+                continue
+            if os.path.samefile(candidate, path):
+                return candidate
+            digest = digest or file_hash(path)
+            if candidate_hash is None:
+                candidate_hash = file_hash(candidate)
+                self._store(candidate, size, candidate_hash)
+            if candidate_hash == digest and self._link(candidate, path):
+                self._store(path, size, digest)
+                return candidate
+        self._store(path, size, digest)
+        return None
+
+    def _link(self, source: str, path: str) -> bool:
+        """Sustituye `path` por un hardlink a `source` (atómico)."""
+        tmp = f"{path}.dedupe-{os.getpid()}"
+        try:
+            os.link(source, tmp)
+        except OSError:
+            return False
+        os.replace(tmp, path)
+        return True
+
+    def _store(self, path: str, size: int, digest: Optional[str]) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO content VALUES (?, ?, ?)", (path, size, digest))
+            self._db.commit()
+
+    def _forget(self, path: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM content WHERE filepath = ?", (path,))
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,233 @@
+"""
+Selección de Formatos por Objetivo (bytes / calidad)
+Archivo: yt_formats.py
+
+get_available_formats solo miraba los formatos con video y audio juntos
+(en YouTube casi siempre solo el 18, a 360p) y los ordenaba por altura. Los
+formatos separados, que son la mayoría, y el tamaño de cada opción
+quedaban fuera.
+
+rank() puntúa todos los candidatos de un video:
+- Formatos completos (video y audio): "18"
+- Cada par de video solo + audio solo: "137+140"
+
+Tamaño: filesize; si falta, filesize_approx o tbr (kbit/s) × duración / 8.
+En los pares, la suma de las dos partes.
+
+Calidad: (altura, fps, bitrate efectivo de video, bitrate efectivo de audio).
+El bitrate efectivo pondera por la eficiencia del códec: a igual bitrate,
+AV1 y VP9 se ven mejor que H.264, y a igual calidad pesan menos.
+
+FormatObjective fija las restricciones y qué se optimiza:
+    FormatObjective(min_height=720, prefer=PREFER_SIZE)   # menos bytes con >= 720p
+    FormatObjective(max_bytes=50 * 1024**2)               # mejor calidad en <= 50 MB
+
+Modo audio: select_audio() elige entre los formatos de solo audio el que
+da más calidad por byte (el más pequeño cuyo bitrate efectivo está dentro
+de `tolerance` del mejor).
+
+Uso:
+    downloader = YouTubeDownloader(format_objective=FormatObjective(min_height=720,
+                                                                    prefer=PREFER_SIZE))
+    python3 yt_manager.py urls.txt --min-height 720 --prefer size
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+PREFER_QUALITY = "quality"
+PREFER_SIZE = "size"
+
+# Calidad relativa por bit (H.264 / AAC = 1.0); aproximaciones habituales
+VIDEO_CODEC_EFFICIENCY = {
+    'avc1': 1.0, 'h264': 1.0, 'vp8': 1.0,
+    'vp9': 1.4, 'vp09': 1.4,
+    'hev1': 1.5, 'hvc1': 1.5, 'hevc': 1.5, 'h265': 1.5,
+    'av01': 1.6, 'av1': 1.6,
+}
+AUDIO_CODEC_EFFICIENCY = {
+    'mp4a': 1.0, 'aac': 1.0, 'mp3': 0.8, 'vorbis': 1.1, 'opus': 1.4,
+}
+
+
+def codec_efficiency(codec: Optional[str], table: Dict[str, float]) -> float:
+    """Eficiencia de un códec de yt-dlp ('avc1.64001F' -> 'avc1'); 1.0 si no se conoce."""
+    if not codec or codec == 'none':
+        return 1.0
+    return table.get(codec.split('.')[0].lower(), 1.0)
+
+
+def estimate_size(fmt: Dict[str, Any], duration: Optional[float]) -> Tuple[Optional[int], bool]:
+    """
+    Bytes de un formato.
+
+    Returns:
+        tuple: (bytes o None si no hay forma de saberlo, True si es estimado)
+    """
+    if fmt.get('filesize'):
+        return int(fmt['filesize']), False
+    if fmt.get('filesize_approx'):
+        return int(fmt['filesize_approx']), True
+    tbr = fmt.get('tbr') or (fmt.get('vbr') or 0) + (fmt.get('abr') or 0)
+    if tbr and duration:
+        return int(tbr * 1000 / 8 * duration), True
+    return None, True
+
+
+class FormatCandidate(NamedTuple):
+    """Opción de descarga: un formato completo o un par video+audio."""
+    format_id: str              # especificación para yt-dlp: "18" o "137+140"
+    height: int
+    fps: float
+    ext: str
+    vcodec: Optional[str]
+    acodec: Optional[str]
+    size: Optional[int]         # bytes (None = desconocido)
+    estimated: bool             # True si size sale del bitrate
+    video_rate: float           # kbit/s × eficiencia del códec
+    audio_rate: float
+
+
+class FormatObjective(NamedTuple):
+    """Restricciones y criterio de selección."""
+    min_height: Optional[int] = None
+    max_height: Optional[int] = None
+    max_bytes: Optional[int] = None
+    prefer: str = PREFER_QUALITY   # PREFER_QUALITY o PREFER_SIZE
+
+    def accepts(self, c: FormatCandidate) -> bool:
+        if self.min_height and c.height < self.min_height:
+            return False
+        if self.max_height and c.height > self.max_height:
+            return False
+        # Sin tamaño conocido no se puede garantizar el límite
+        return self.max_bytes is None or (c.size is not None and c.size <= self.max_bytes)
+
+    def key(self, c: FormatCandidate) -> tuple:
+        """Clave de orden (menor = mejor)."""
+        size = c.size if c.size is not None else float('inf')
+        quality = (-c.height, -c.fps, -c.video_rate, -c.audio_rate)
+        return (size, *quality) if self.prefer == PREFER_SIZE else (*quality, size)
+
+    def violation(self, c: FormatCandidate) -> float:
+        """Cuánto se aleja un candidato de las restricciones (0 = las cumple)."""
+        excess = 0.0
+        if self.min_height and c.height < self.min_height:
+            excess += (self.min_height - c.height) / self.min_height
+        if self.max_height and c.height > self.max_height:
+            excess += (c.height - self.max_height) / self.max_height
+        if self.max_bytes is not None:
+            if c.size is None:
+                excess += 1.0
+            elif c.size > self.max_bytes:
+                excess += (c.size - self.max_bytes) / self.max_bytes
+        return excess
+
+
+def _audio_only(info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    audios = [f for f in info.get('formats') or []
+              if f.get('format_id') and f.get('vcodec') == 'none' and f.get('acodec') != 'none']
+    # Con pistas dobladas, solo las del idioma preferido por el extractor
+    if audios:
+        best_language = max(a.get('language_preference') or 0 for a in audios)
+        audios = [a for a in audios if (a.get('language_preference') or 0) == best_language]
+    return audios
+
+
+def _rate(fmt: Dict[str, Any], kind: str) -> float:
+    return float(fmt.get(kind) or fmt.get('tbr') or 0)
+
+
+def candidates(info: Dict[str, Any]) -> List[FormatCandidate]:
+    """Formatos completos y todos los pares video+audio de un video (sin ordenar)."""
+    duration = info.get('duration')
+    muxed, videos = [], []
+    for f in info.get('formats') or []:
+        # Los storyboards (mhtml) son imágenes, no video; el audio solo va en pares
+        if not f.get('format_id') or f.get('ext') == 'mhtml' or f.get('vcodec') == 'none':
+            continue
+        if f.get('acodec') != 'none':
+            muxed.append(f)
+        else:
+            videos.append(f)
+    audios = _audio_only(info)
+
+    result = []
+    for f in muxed:
+        size, estimated = estimate_size(f, duration)
+        result.append(FormatCandidate(
+            str(f['format_id']), f.get('height') or 0, f.get('fps') or 0, f.get('ext') or 'mp4',
+            f.get('vcodec'), f.get('acodec'), size, estimated,
+            _rate(f, 'vbr') * codec_efficiency(f.get('vcodec'), VIDEO_CODEC_EFFICIENCY),
+            (f.get('abr') or 0) * codec_efficiency(f.get('acodec'), AUDIO_CODEC_EFFICIENCY)))
+    for v in videos:
+        v_size, v_estimated = estimate_size(v, duration)
+        v_rate = _rate(v, 'vbr') * codec_efficiency(v.get('vcodec'), VIDEO_CODEC_EFFICIENCY)
+        for a in audios:
+            a_size, a_estimated = estimate_size(a, duration)
+            size = None if v_size is None or a_size is None else v_size + a_size
+            result.append(FormatCandidate(
+                f"{v['format_id']}+{a['format_id']}", v.get('height') or 0, v.get('fps') or 0,
+                v.get('ext') or 'mp4', v.get('vcodec'), a.get('acodec'), size,
+                v_estimated or a_estimated, v_rate,
+                _rate(a, 'abr') * codec_efficiency(a.get('acodec'), AUDIO_CODEC_EFFICIENCY)))
+    return result
+
+
+def rank(info: Dict[str, Any], objective: Optional[FormatObjective] = None) -> List[FormatCandidate]:
+    """
+    Candidatos de mejor a peor según el objetivo. Primero los que cumplen
+    las restricciones; después el resto, de más cercano a más lejano.
+    """
+    objective = objective or FormatObjective()
+    return sorted(candidates(info), key=lambda c: (objective.violation(c), objective.key(c)))
+
+
+def select(info: Dict[str, Any], objective: Optional[FormatObjective] = None,
+           strict: bool = False) -> Optional[FormatCandidate]:
+    """
+    Mejor candidato para el objetivo.
+
+    Args:
+        strict: Si True, None cuando ninguno cumple las restricciones
+            (si no, el más cercano)
+    """
+    objective = objective or FormatObjective()
+    ranked = rank(info, objective)
+    if not ranked or (strict and not objective.accepts(ranked[0])):
+        return None
+    return ranked[0]
+
+
+def audio_candidates(info: Dict[str, Any]) -> List[FormatCandidate]:
+    """Formatos de solo audio de un video (sin ordenar)."""
+    duration = info.get('duration')
+    result = []
+    for a in _audio_only(info):
+        size, estimated = estimate_size(a, duration)
+        result.append(FormatCandidate(
+            str(a['format_id']), 0, 0, a.get('ext') or 'm4a', None, a.get('acodec'), size,
+            estimated, 0.0,
+            _rate(a, 'abr') * codec_efficiency(a.get('acodec'), AUDIO_CODEC_EFFICIENCY)))
+    return result
+
+
+def select_audio(info: Dict[str, Any], codec: Optional[str] = None,
+                 tolerance: float = 0.1) -> Optional[FormatCandidate]:
+    """
+    Formato de solo audio con más calidad por byte.
+
+    Args:
+        codec: Prefijo de acodec preferido ('mp4a', 'opus'...): si hay
+            formatos con ese códec se elige entre ellos (no habrá que recodificar)
+        tolerance: Fracción del mejor bitrate efectivo que se considera empate
+            (a igualdad, el de menos bytes)
+    """
+    found = audio_candidates(info)
+    if codec:
+        matching = [c for c in found if (c.acodec or '').split('.')[0].lower() == codec]
+        found = matching or found
+    if not found:
+        return None
+    top = max(c.audio_rate for c in found)
+    near = [c for c in found if c.audio_rate >= (1 - tolerance) * top]
+    return min(near, key=lambda c: (c.size if c.size is not None else float('inf'), -c.audio_rate))
@@ -0,0 +1,265 @@
+"""
+Política Adaptativa de Fragmentos y Bloques para yt-dlp
+Archivo: yt_fragments.py
+
+Con las opciones por defecto yt-dlp baja los fragmentos DASH/HLS de uno en
+uno y las descargas HTTP en bloques de tamaño fijo. FragmentPolicy elige
+por host, y aprende de cada descarga:
+
+1. concurrent_fragment_downloads: escalada (hill climbing) sobre el
+   throughput medido con 1, 2, 4... conexiones. Se queda con el menor número
+   que rinde casi lo mismo que el mejor, así que en hosts que no usan
+   fragmentos (YouTube sirve 'https' en bloques) converge al mínimo y no
+   acapara conexiones
+2. http_chunk_size: bytes que el host entrega en `chunk_seconds` segundos
+   (entre `min_chunk` y `max_chunk`; YouTube limita los bloques > 10 MiB)
+3. buffersize: bloque inicial de lectura (yt-dlp lo redimensiona después);
+   empezar en 1 KiB cuesta miles de lecturas en enlaces rápidos
+
+yt-dlp lee estas opciones al empezar cada formato, así que la política se
+ajusta entre descargas, no en mitad de una.
+
+ConnectionBudget reparte un total de conexiones entre los trabajos de
+DownloadManager: cada trabajo pide las que sugiere la política y recibe las
+que quedan libres (al menos una).
+
+Uso:
+    policy = FragmentPolicy(max_fragments=16)
+    downloader = YouTubeDownloader(fragment_policy=policy)
+    DownloadManager(downloader, workers=8, connections=32)
+"""
+
+import math
+import time
+import threading
+from urllib.parse import urlparse
+from typing import Any, Dict, NamedTuple, Optional
+
+MIB = 1024 * 1024
+
+DEFAULT_MIN_FRAGMENTS = 1
+DEFAULT_MAX_FRAGMENTS = 16
+DEFAULT_INITIAL_FRAGMENTS = 4
+DEFAULT_MIN_CHUNK = 1 * MIB
+DEFAULT_MAX_CHUNK = 10 * MIB
+# Descargas más pequeñas o cortas no dicen nada del enlace
+MIN_SAMPLE_BYTES = 2 * MIB
+MIN_SAMPLE_SECONDS = 0.5
+
+# Prefijos de host que son el mismo servicio (www.youtube.com == youtube.com)
+_HOST_PREFIXES = ("www.", "m.", "music.")
+
+
+def host_key(url: str) -> str:
+    """Host normalizado de una URL (clave de límites y de la política)."""
+    host = (urlparse(url).hostname or "").lower()
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+class FragmentPlan(NamedTuple):
+    """Opciones de red para una descarga."""
+    fragments: int
+    http_chunk_size: int
+    buffersize: int
+
+    def ydl_opts(self) -> Dict[str, Any]:
+        return {
+            'concurrent_fragment_downloads': self.fragments,
+            'http_chunk_size': self.http_chunk_size,
+            'buffersize': self.buffersize,
+        }
+
+
+class _HostStats:
+    """Throughput medido en un host (con el lock de la política)."""
+
+    __slots__ = ("rates", "rate", "next", "samples")
+
+    def __init__(self, initial: int):
+        self.rates: Dict[int, float] = {}   # fragmentos -> bytes/s (EWMA)
+        self.rate: Optional[float] = None   # bytes/s por descarga, cualquier concurrencia
+        self.next = initial
+        self.samples = 0
+
+
+class FragmentPolicy:
+    """
+    Concurrencia de fragmentos, tamaño de bloque HTTP y buffer por host.
+    Thread-safe; suggest() y plan() no modifican estado (solo record()).
+    """
+
+    def __init__(self, min_fragments: int = DEFAULT_MIN_FRAGMENTS,
+                 max_fragments: int = DEFAULT_MAX_FRAGMENTS,
+                 initial_fragments: int = DEFAULT_INITIAL_FRAGMENTS,
+                 min_chunk: int = DEFAULT_MIN_CHUNK, max_chunk: int = DEFAULT_MAX_CHUNK,
+                 chunk_seconds: float = 4.0, tolerance: float = 0.1,
+                 smoothing: float = 0.3, reprobe_every: int = 16):
+        """
+        Args:
+            min_fragments, max_fragments: Límites de concurrent_fragment_downloads
+            initial_fragments: Concurrencia para un host sin medidas
+            min_chunk, max_chunk: Límites de http_chunk_size (bytes)
+            chunk_seconds: Duración objetivo de cada petición por bloques
+            tolerance: Fracción del mejor throughput que se considera empate
+                (a igualdad se prefiere menos conexiones)
+            smoothing: Peso de la medida nueva en la media exponencial
+            reprobe_every: Cada cuántas medidas se vuelven a explorar los vecinos
+                (el enlace cambia)
+        """
+        if not 1 <= min_fragments <= max_fragments:
+            raise ValueError(f"Límites de fragmentos inválidos: {min_fragments}..{max_fragments}")
+        if not 0 < min_chunk <= max_chunk:
+            raise ValueError(f"Límites de bloque inválidos: {min_chunk}..{max_chunk}")
+        self.min_fragments = min_fragments
+        self.max_fragments = max_fragments
+        self.initial_fragments = min(max(initial_fragments, min_fragments), max_fragments)
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.chunk_seconds = chunk_seconds
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.reprobe_every = reprobe_every
+        self._hosts: Dict[str, _HostStats] = {}
+        self._lock = threading.Lock()
+
+    def suggest(self, key: str) -> int:
+        """Conexiones que la política quiere para la próxima descarga del host."""
+        stats = self._hosts.get(key)
+        return self.initial_fragments if stats is None else stats.next
+
+    def plan(self, key: str, max_connections: Optional[int] = None) -> FragmentPlan:
+        """
+        Args:
+            max_connections: Conexiones concedidas (p. ej. por ConnectionBudget)
+        """
+        stats = self._hosts.get(key)
+        fragments = self.suggest(key)
+        if max_connections is not None:
+            fragments = max(1, min(fragments, max_connections))
+        rate = stats.rate if stats is not None else None
+        if rate is None:
+            return FragmentPlan(fragments, self.max_chunk, 64 * 1024)
+        chunk = min(max(int(rate * self.chunk_seconds) // MIB * MIB, self.min_chunk), self.max_chunk)
+        # ~10 ms de tráfico, en potencia de 2 entre 16 KiB y 1 MiB
+        buffersize = 2 ** min(max(round(math.log2(max(rate / 100, 1))), 14), 20)
+        return FragmentPlan(fragments, chunk, buffersize)
+
+    def record(self, key: str, fragments: int, nbytes: int, seconds: float) -> bool:
+        """
+        Anota el throughput de una descarga hecha con `fragments` conexiones
+        y decide la concurrencia de la siguiente.
+
+        Returns:
+            bool: False si la muestra es demasiado pequeña para contar
+        """
+        if nbytes < MIN_SAMPLE_BYTES or seconds < MIN_SAMPLE_SECONDS:
+            return False
+        rate = nbytes / seconds
+        alpha = self.smoothing
+        with self._lock:
+            stats = self._hosts.get(key)
+            if stats is None:
+                stats = self._hosts[key] = _HostStats(self.initial_fragments)
+            old = stats.rates.get(fragments)
+            stats.rates[fragments] = rate if old is None else (1 - alpha) * old + alpha * rate
+            stats.rate = rate if stats.rate is None else (1 - alpha) * stats.rate + alpha * rate
+            stats.samples += 1
+
+            top = max(stats.rates.values())
+            best = min(f for f, r in stats.rates.items() if r >= (1 - self.tolerance) * top)
+            up = min(best * 2, self.max_fragments)
+            down = max(best // 2, self.min_fragments)
+            if self.reprobe_every and stats.samples % self.reprobe_every == 0:
+                for neighbour in (up, down):
+                    if neighbour != best:
+                        stats.rates.pop(neighbour, None)
+            # Explorar primero hacia arriba (más throughput), luego hacia abajo
+            # (mismo throughput con menos conexiones)
+            if up not in stats.rates:
+                stats.next = up
+            elif down not in stats.rates:
+                stats.next = down
+            else:
+                stats.next = best
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Medidas por host (para métricas)."""
+        with self._lock:
+            return {key: {'fragments': s.next, 'bytes_per_sec': round(s.rate or 0.0, 1),
+                          'samples': s.samples,
+                          'rates': {f: round(r, 1) for f, r in sorted(s.rates.items())}}
+                    for key, s in self._hosts.items()}
+
+
+class ThroughputMeter:
+    """
+    Hook de progreso que mide bytes y segundos de transferencia de un trabajo
+    (sin contar la extracción ni la fusión).
+    """
+
+    __slots__ = ("bytes", "_first", "_last", "_files", "_clock")
+
+    def __init__(self, clock=time.monotonic):
+        self.bytes = 0
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._files: Dict[str, int] = {}
+        self._clock = clock
+
+    @property
+    def seconds(self) -> float:
+        return 0.0 if self._first is None else self._last - self._first
+
+    def __call__(self, d: Dict[str, Any]) -> None:
+        downloaded = d.get('downloaded_bytes')
+        if downloaded is None:
+            return
+        now = self._clock()
+        name = d.get('filename') or d.get('tmpfilename') or ''
+        if self._first is None:
+            self._first = now
+        self._last = now
+        previous = self._files.get(name)
+        # El primer callback de un archivo puede incluir lo ya bajado (.part);
+        # con fragmentos concurrentes el contador no es monótono
+        if previous is None or downloaded > previous:
+            self._files[name] = downloaded
+            if previous is not None:
+                self.bytes += downloaded - previous
+
+
+class ConnectionBudget:
+    """Total de conexiones repartido entre descargas simultáneas."""
+
+    def __init__(self, total: int):
+        if total < 1:
+            raise ValueError(f"total debe ser >= 1, recibido: {total}")
+        self.total = total
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, want: int, cancelled: Optional[threading.Event] = None) -> int:
+        """
+        Reserva hasta `want` conexiones; espera solo si no queda ninguna.
+
+        Returns:
+            int: Conexiones concedidas (0 si se canceló esperando)
+        """
+        want = max(1, min(want, self.total))
+        with self._cond:
+            while self.in_use >= self.total:
+                if cancelled is not None and cancelled.is_set():
+                    return 0
+                self._cond.wait(0.5)
+            granted = min(want, self.total - self.in_use)
+            self.in_use += granted
+            return granted
+
+    def release(self, granted: int) -> None:
+        with self._cond:
+            self.in_use -= granted
+            self._cond.notify_all()
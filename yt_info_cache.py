@@ -0,0 +1,166 @@
+"""
+Caché de Info Extraída para YouTubeDownloader
+Archivo: yt_info_cache.py
+
+Listar formatos y descargar resolvían la misma página dos veces (dos
+extract_info). Con la caché, la info extraída al listar formatos se
+reutiliza en la descarga mediante YoutubeDL.process_ie_result, igual que
+hace yt-dlp con --load-info-json: una sola extracción por video.
+
+NIVELES:
+========
+1. Memoria: LRU (OrderedDict) de hasta `max_entries` videos
+2. Disco (opcional): SQLite con la info en JSON comprimido con zlib
+
+CLAVE:
+======
+"<extractor>:<id>" (p. ej. "Youtube:dQw4w9WgXcQ"), obtenida de la URL sin
+red; así youtu.be/X, watch?v=X&t=10 y shorts/X comparten entrada. Si no se
+reconoce el extractor se usa la URL tal cual.
+
+TTL:
+====
+Las URLs de los formatos caducan (en YouTube, unas 6 horas), así que cada
+entrada vence a los `ttl` segundos en ambos niveles. Si aun así una
+descarga falla con la info cacheada, YouTubeDownloader invalida la
+entrada y extrae de nuevo.
+"""
+
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 2 * 3600
+
+
+@lru_cache(maxsize=4096)
+def video_key(url: str) -> str:
+    """Clave estable de caché para una URL (sin acceso a red)."""
+    from yt_dlp.extractor.youtube import YoutubeIE
+
+    candidates = [YoutubeIE]
+    if not YoutubeIE.suitable(url):
+        from yt_dlp.extractor import gen_extractor_classes
+        candidates = gen_extractor_classes()
+    for ie in candidates:
+        if ie.suitable(url) and ie.ie_key() != "Generic":
+            video_id = ie.get_temp_id(url)
+            if video_id:
+                return f"{ie.ie_key()}:{video_id}"
+            break
+    return url
+
+
+class InfoCache:
+    """
+    LRU en memoria + almacén SQLite opcional, ambos con TTL.
+    Thread-safe (un lock para cada nivel).
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None,
+                 ttl: float = DEFAULT_TTL, clock=time.time):
+        """
+        Args:
+            max_entries: Videos en memoria
+            path: Archivo SQLite (None = solo memoria)
+            ttl: Segundos de validez de cada entrada
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries debe ser >= 1, recibido: {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._clock = clock
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS info ("
+                             "key TEXT PRIMARY KEY, expires REAL NOT NULL, data BLOB NOT NULL)")
+            self._db.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Info cacheada de la URL, o None si no existe o venció."""
+        key = video_key(url)
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        stored = self._load(key, now)
+        with self._lock:
+            if stored is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, *stored)
+        return stored[1]
+
+    def put(self, url: str, info: Dict[str, Any]) -> None:
+        """Guarda la info (ya saneada con YoutubeDL.sanitize_info) de la URL."""
+        key = video_key(url)
+        expires = self._clock() + self.ttl
+        with self._lock:
+            self._remember(key, expires, info)
+        if self._db is not None:
+            data = zlib.compress(json.dumps(info, separators=(",", ":")).encode("utf-8"))
+            with self._db_lock:
+                self._db.execute("INSERT OR REPLACE INTO info VALUES (?, ?, ?)", (key, expires, data))
+                self._db.commit()
+
+    def invalidate(self, url: str) -> None:
+        key = video_key(url)
+        with self._lock:
+            self._memory.pop(key, None)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM info WHERE key = ?", (key,))
+                self._db.commit()
+
+    def purge_expired(self) -> int:
+        """Borra del disco las entradas vencidas. Returns: filas borradas."""
+        if self._db is None:
+            return 0
+        with self._db_lock:
+            deleted = self._db.execute("DELETE FROM info WHERE expires <= ?", (self._clock(),)).rowcount
+            self._db.commit()
+        return deleted
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, expires: float, info: Dict[str, Any]) -> None:
+        """Inserta en el LRU (con self._lock tomado)."""
+        self._memory[key] = (expires, info)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """(vencimiento, info) desde disco, si existe y no venció."""
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute("SELECT expires, data FROM info WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        return row[0], json.loads(zlib.decompress(row[1]))
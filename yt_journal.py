@@ -0,0 +1,193 @@
+"""
+Diario Persistente de Trabajos de Descarga
+Archivo: yt_journal.py
+
+Si un lote de DownloadManager se interrumpe (Ctrl+C, cierre, caída), al
+relanzarlo se repetía todo. El diario guarda en SQLite (WAL) el estado de
+cada trabajo para que el reinicio continúe donde se quedó:
+
+1. Trabajos completados: se saltan sin extraer ni descargar nada, siempre
+   que el archivo final siga existiendo con el tamaño registrado
+2. Trabajos a medias: yt-dlp continúa los .part con continuedl (petición
+   Range desde el tamaño en disco; los fragmentos DASH/HLS ya bajados se
+   retoman desde su .ytdl), así que no se vuelve a pedir lo ya recibido
+3. Trabajos fallidos: se reintentan con espera exponencial (DownloadManager)
+
+CONSISTENCIA:
+=============
+- Cada cambio de estado es una transacción confirmada: con WAL y
+  synchronous=NORMAL sobrevive a que el proceso muera (no a un corte de
+  luz en mitad del checkpoint)
+- El progreso (bytes por archivo) se escribe como mucho cada
+  `flush_interval` segundos por trabajo: el callback de progreso de yt-dlp
+  se llama cientos de veces por segundo
+- Los bytes por archivo guardados sirven de base al reanudar, para que el
+  throughput y el límite de ancho de banda solo cuenten bytes nuevos
+
+La clave de cada trabajo es la de yt_info_cache.video_key ("Youtube:<id>"),
+así que dos URLs del mismo video comparten entrada.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from yt_info_cache import video_key
+
+# Estados en el diario (mismos nombres que en yt_manager)
+JOURNAL_QUEUED = "queued"
+JOURNAL_RUNNING = "running"
+JOURNAL_DONE = "done"
+JOURNAL_FAILED = "failed"
+# Estados que se retoman al reiniciar ('running' = interrumpido a medias)
+JOURNAL_PENDING_STATES = (JOURNAL_QUEUED, JOURNAL_RUNNING, JOURNAL_FAILED)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    format_choice TEXT,
+    status TEXT NOT NULL,
+    bytes_done INTEGER NOT NULL DEFAULT 0,
+    parts TEXT NOT NULL DEFAULT '{}',
+    filepath TEXT,
+    filesize INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL NOT NULL
+)
+"""
+_COLUMNS = "url, format_choice, status, bytes_done, parts, filepath, filesize, attempts, error"
+
+
+class JournalEntry(NamedTuple):
+    """Fila del diario."""
+    url: str
+    format_choice: Optional[str]
+    status: str
+    bytes_done: int
+    parts: Dict[str, int]       # bytes recibidos por archivo (video, audio...)
+    filepath: Optional[str]
+    filesize: Optional[int]
+    attempts: int
+    error: Optional[str]
+
+
+class JobJournal:
+    """Diario de trabajos en SQLite. Thread-safe (una conexión con lock)."""
+
+    def __init__(self, path: str, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 clock=time.monotonic):
+        """
+        Args:
+            path: Archivo SQLite
+            flush_interval: Segundos mínimos entre escrituras de progreso de un trabajo
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_flush: Dict[str, float] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    # --- Consultas ---
+
+    def lookup(self, url: str) -> Optional[JournalEntry]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE key = ?",
+                                   (video_key(url),)).fetchone()
+        return None if row is None else self._entry(row)
+
+    def completed(self, url: str) -> Optional[str]:
+        """
+        Archivo final si el trabajo terminó y sigue intacto en disco, o None.
+        Si el archivo se borró o cambió de tamaño, el trabajo vuelve a pendiente.
+        """
+        entry = self.lookup(url)
+        if entry is None or entry.status != JOURNAL_DONE:
+            return None
+        path = entry.filepath
+        if path and os.path.isfile(path) and os.path.getsize(path) == entry.filesize:
+            return path
+        self._update(url, status=JOURNAL_QUEUED, filepath=None, filesize=None)
+        return None
+
+    def pending(self) -> List[JournalEntry]:
+        """Trabajos por retomar (en cola, interrumpidos o fallidos), en orden de alta."""
+        marks = ", ".join("?" * len(JOURNAL_PENDING_STATES))
+        with self._lock:
+            rows = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE status IN ({marks}) "
+                                    f"ORDER BY rowid", JOURNAL_PENDING_STATES).fetchall()
+        return [self._entry(row) for row in rows]
+
+    # --- Transiciones ---
+
+    def queue(self, url: str, format_choice: Optional[str] = None) -> None:
+        """Da de alta el trabajo (conserva bytes e intentos si ya existía)."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (key, url, format_choice, status, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET url = excluded.url, "
+                "format_choice = excluded.format_choice, status = excluded.status, "
+                "updated = excluded.updated",
+                (video_key(url), url, format_choice, JOURNAL_QUEUED, time.time()))
+            self._db.commit()
+
+    def start(self, url: str) -> None:
+        """Marca el trabajo en curso y cuenta un intento."""
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ?, attempts = attempts + 1, error = NULL, "
+                             "updated = ? WHERE key = ?",
+                             (JOURNAL_RUNNING, time.time(), video_key(url)))
+            self._db.commit()
+
+    def progress(self, url: str, parts: Dict[str, int], force: bool = False) -> bool:
+        """
+        Guarda los bytes por archivo (como mucho cada flush_interval segundos).
+
+        Returns:
+            bool: True si se escribió
+        """
+        key = video_key(url)
+        now = self._clock()
+        if not force and now - self._last_flush.get(key, float("-inf")) < self.flush_interval:
+            return False
+        self._last_flush[key] = now
+        self._update(url, bytes_done=sum(parts.values()), parts=json.dumps(parts))
+        return True
+
+    def finish(self, url: str, filepath: Optional[str]) -> None:
+        """Marca el trabajo completado con su archivo final y tamaño (para verificarlo al reanudar)."""
+        size = os.path.getsize(filepath) if filepath and os.path.isfile(filepath) else None
+        self._last_flush.pop(video_key(url), None)
+        self._update(url, status=JOURNAL_DONE, filepath=filepath, filesize=size, error=None)
+
+    def fail(self, url: str, error: str) -> None:
+        self._last_flush.pop(video_key(url), None)
+        self._update(url, status=JOURNAL_FAILED, error=error)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _update(self, url: str, **fields) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {assignments}, updated = ? WHERE key = ?",
+                             (*fields.values(), time.time(), video_key(url)))
+            self._db.commit()
+
+    @staticmethod
+    def _entry(row: tuple) -> JournalEntry:
+        values = list(row)
+        values[4] = json.loads(values[4])
+        return JournalEntry(*values)
@@ -0,0 +1,765 @@
+"""
+Gestor de Descargas Concurrentes sobre YouTubeDownloader
+Archivo: yt_manager.py
+
+Combina:
+1. Cola de trabajos con prioridad (heap; mayor prioridad primero, FIFO a igualdad)
+2. Pool de workers configurable (hilos: la descarga es E/S)
+3. Límite de descargas simultáneas por host
+4. Límite global de ancho de banda (token bucket compartido por todos los
+   trabajos; se aplica desde el hook de progreso de yt-dlp)
+5. Cancelación de trabajos en cola o en curso
+6. Throughput agregado (bytes/s de todo el gestor) y por trabajo
+7. Diario persistente opcional (yt_journal.py): al reiniciar se saltan los
+   trabajos completados y los interrumpidos continúan sus .part
+8. Reintentos con espera exponencial de los trabajos fallidos
+9. Presupuesto global de conexiones: cada trabajo pide los fragmentos
+   simultáneos que sugiere la FragmentPolicy del downloader (yt_fragments.py)
+   y recibe los que quedan libres
+10. Alimentación perezosa desde listas y canales (feed + iter_playlist) con
+    contrapresión: la cola nunca pasa de `max_pending` trabajos
+11. Progreso agregado opcional (yt_progress.py): un solo hilo dibuja el
+    estado de todas las descargas a ritmo fijo
+12. Archivo de descargas e índice de contenido (yt_archive.py, en el
+    YouTubeDownloader): los videos ya archivados terminan como skipped
+13. Fusiones fuera de los workers (yt_postprocess.py, en el
+    YouTubeDownloader): un trabajo que espera a ffmpeg pasa a
+    'postprocessing' y libera su worker y su hueco de host
+14. Selección de formato por video (yt_formats.py): con --min-height,
+    --max-size o --prefer cada trabajo elige su formato por bytes estimados
+    y calidad
+15. Modo audio (--audio-only): solo el mejor audio por byte, sin video ni
+    fusión; con --audio-format la conversión va al pool de postprocesado
+
+El tiempo total de una lista larga depende del ancho de banda disponible
+y no de la suma de las descargas individuales: mientras un trabajo espera
+al servidor (extracción, arranque de la conexión) los demás siguen bajando.
+
+Uso:
+    with DownloadManager(workers=8, per_host=4, bandwidth=20 * 1024**2) as manager:
+        jobs = manager.submit_many(urls)
+        manager.join()
+        print(manager.metrics())
+
+    # Reanudable: relanzar el mismo comando continúa el lote
+    with DownloadManager(journal=JobJournal("lote.db"), retries=3) as manager:
+        manager.submit_many(urls)      # o manager.resume() para lo pendiente
+
+    python3 yt_manager.py urls.txt --workers 8 --per-host 4 --bandwidth 20M
+    python3 yt_manager.py urls.txt --journal lote.db --retries 3
+    python3 yt_manager.py urls.txt --workers 8 --connections 32
+    python3 yt_manager.py --playlist https://www.youtube.com/@canal/videos --journal canal.db
+    python3 yt_manager.py urls.txt --workers 8 --progress
+    python3 yt_manager.py --playlist https://www.youtube.com/@canal --archive archivo.db --dedupe
+    python3 yt_manager.py urls.txt --workers 8 --postprocess-workers 2
+    python3 yt_manager.py urls.txt --min-height 720 --prefer size
+    python3 yt_manager.py urls.txt --max-size 50M
+    python3 yt_manager.py --playlist https://www.youtube.com/playlist?list=... --audio-only --audio-format mp3
+    python3 yt_manager.py --journal lote.db      # retoma lo pendiente del diario
+"""
+
+import sys
+import time
+import heapq
+import random
+import argparse
+import threading
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional
+
+from yt_dlp.utils import DownloadCancelled
+
+from yt_archive import DownloadArchive
+from yt_formats import PREFER_QUALITY, PREFER_SIZE, FormatObjective
+from yt_fragments import ConnectionBudget, host_key
+from yt_info_cache import InfoCache
+from yt_journal import JOURNAL_DONE, JobJournal
+from yt_postprocess import AUDIO_FORMATS, PostProcessPool
+from yt_progress import ProgressAggregator
+from yt_videos import YouTubeDownloader, format_filesize
+
+# Estados de un trabajo
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_POSTPROCESSING = "postprocessing"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINAL_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+DEFAULT_WORKERS = 4
+DEFAULT_PER_HOST = 2
+DEFAULT_BACKOFF = 2.0
+DEFAULT_BACKOFF_MAX = 300.0
+DEFAULT_MAX_PENDING = 64
+
+
+def parse_rate(text: str) -> float:
+    """'500K', '20M', '1.5G' o bytes -> bytes por segundo."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    factor = units.get(text[-1:], 1)
+    value = float(text[:-1] if text[-1:] in units else text)
+    if value <= 0:
+        raise ValueError(f"El ancho de banda debe ser > 0, recibido: {text}")
+    return value * factor
+
+
+class BandwidthLimiter:
+    """
+    Token bucket global de bytes/s. consume() descuenta los bytes ya recibidos
+    y, si el saldo queda negativo, el hilo que descarga duerme lo necesario
+    (el saldo negativo encola en orden a los demás hilos).
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock=time.monotonic):
+        """
+        Args:
+            rate: Bytes por segundo
+            burst: Capacidad del bucket (por defecto, 1 segundo de tráfico)
+        """
+        if rate <= 0:
+            raise ValueError(f"rate debe ser > 0, recibido: {rate}")
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self._clock = clock
+        self._tokens = self.burst
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int, cancelled: Optional[threading.Event] = None) -> float:
+        """
+        Returns:
+            float: Segundos que el llamador ha esperado
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= nbytes
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            if cancelled is not None:
+                cancelled.wait(wait)
+            else:
+                time.sleep(wait)
+        return wait
+
+
+class DownloadJob:
+    """Trabajo de descarga (estado mutable, actualizado por su worker)."""
+
+    __slots__ = ("id", "url", "priority", "format_choice", "host", "status", "bytes_done",
+                 "error", "info", "submitted", "started", "finished", "attempts", "skipped",
+                 "_cancel", "_done", "_file_bytes", "_filepath")
+
+    def __init__(self, job_id: int, url: str, priority: int, format_choice: Optional[str]):
+        self.id = job_id
+        self.url = url
+        self.priority = priority
+        self.format_choice = format_choice
+        self.host = host_key(url)
+        self.status = JOB_QUEUED
+        self.bytes_done = 0
+        self.error: Optional[str] = None
+        self.info: Optional[Dict[str, Any]] = None
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.attempts = 0
+        # True si el diario ya lo tenía completado (no se descargó nada)
+        self.skipped = False
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        # Bytes ya contados por archivo (video y audio se descargan por separado)
+        self._file_bytes: Dict[str, int] = {}
+        self._filepath: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def filepath(self) -> Optional[str]:
+        """Archivo final (tras la fusión), si terminó bien."""
+        if self._filepath is not None:
+            return self._filepath
+        downloads = (self.info or {}).get('requested_downloads') or []
+        return downloads[0].get('filepath') if downloads else None
+
+    def throughput(self) -> float:
+        """Bytes/s de este trabajo (desde que empezó)."""
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que el trabajo termine (en cualquier estado final)."""
+        return self._done.wait(timeout)
+
+    def __repr__(self) -> str:
+        return f"DownloadJob(id={self.id}, status={self.status}, url={self.url!r})"
+
+
+class DownloadManager:
+    """
+    Cola de descargas con prioridad, workers, límite por host y ancho de banda global.
+
+    Con `journal`, cada trabajo queda anotado: submit() salta los ya
+    completados y siembra los bytes por archivo de los interrumpidos. Cancelar
+    no se anota, así que un lote cortado con Ctrl+C se retoma igual.
+    """
+
+    def __init__(self, downloader: Optional[YouTubeDownloader] = None,
+                 workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 bandwidth: Optional[float] = None, journal: Optional[JobJournal] = None,
+                 retries: int = 0, backoff: float = DEFAULT_BACKOFF,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX, connections: Optional[int] = None,
+                 progress: Optional[ProgressAggregator] = None):
+        """
+        Args:
+            downloader: YouTubeDownloader a usar (None = uno silencioso en 'downloads')
+            workers: Descargas simultáneas en total
+            per_host: Descargas simultáneas por host
+            bandwidth: Bytes/s para todo el gestor (None = sin límite)
+            journal: Diario persistente de trabajos (None = sin reanudación)
+            retries: Reintentos por trabajo fallido
+            backoff: Espera antes del primer reintento; se duplica en cada uno
+            backoff_max: Tope de la espera entre reintentos
+            connections: Conexiones simultáneas para todo el gestor (None = sin límite)
+            progress: Agregador de progreso al que se conectan todos los trabajos
+        """
+        if workers < 1 or per_host < 1:
+            raise ValueError(f"workers y per_host deben ser >= 1, recibido: {workers}, {per_host}")
+        if retries < 0:
+            raise ValueError(f"retries debe ser >= 0, recibido: {retries}")
+        self.downloader = downloader or YouTubeDownloader(verbose=False)
+        self.per_host = per_host
+        self.limiter = BandwidthLimiter(bandwidth) if bandwidth else None
+        self.budget = ConnectionBudget(connections) if connections else None
+        self.journal = journal
+        self.progress = progress
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        # Reintentos esperando su turno: (listo_en, seq, job)
+        self._delayed: List[tuple] = []
+        self._seq = count()
+        self._ids = count(1)
+        self._jobs: List[DownloadJob] = []
+        self._host_active: Dict[str, int] = {}
+        self._running = 0
+        # Trabajos descargados esperando su fusión en el pool de postprocesado
+        self._postprocessing = 0
+        self._closed = False
+        self._feeders: List[threading.Thread] = []
+        # close_feeds(): los alimentadores dejan de encolar (no cierra el gestor)
+        self._feeds_closed = False
+        # Errores de los iterables de feed() (p. ej. una lista que no existe)
+        self.feed_errors: List[str] = []
+        self._first_start: Optional[float] = None
+        self._last_finish: Optional[float] = None
+
+        self._workers = [threading.Thread(target=self._worker, name=f"yt-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    # --- API ---
+
+    def submit(self, url: str, priority: int = 0, format_choice: Optional[str] = None) -> DownloadJob:
+        """
+        Encola una URL (mayor `priority` se descarga antes).
+        Si el diario la tiene completada y el archivo sigue intacto, el
+        trabajo se devuelve ya terminado (skipped=True).
+        """
+        if self._closed:
+            raise RuntimeError("DownloadManager cerrado")
+        done_path = None
+        parts: Dict[str, int] = {}
+        if self.journal is not None:
+            entry = self.journal.lookup(url)
+            if entry is not None:
+                parts = entry.parts
+                if entry.status == JOURNAL_DONE:
+                    done_path = self.journal.completed(url)
+            if done_path is None:
+                self.journal.queue(url, format_choice)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("DownloadManager cerrado")
+            job = DownloadJob(next(self._ids), url, priority, format_choice)
+            self._jobs.append(job)
+            if done_path is not None:
+                job.skipped = True
+                job._filepath = done_path
+                self._finish(job, JOB_DONE)
+                return job
+            job._file_bytes.update(parts)
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            self._cond.notify()
+        return job
+
+    def submit_many(self, urls: Iterable[str], priority: int = 0) -> List[DownloadJob]:
+        return [self.submit(url, priority) for url in urls]
+
+    def feed(self, entries: Iterable[Any], priority: int = 0,
+             max_pending: int = DEFAULT_MAX_PENDING) -> threading.Thread:
+        """
+        Encola en segundo plano las URLs de un iterable perezoso (p. ej.
+        YouTubeDownloader.iter_playlist). Como mucho `max_pending` trabajos
+        esperan en cola, así que el iterable solo avanza al ritmo de las
+        descargas y la memoria no depende del tamaño de la lista.
+
+        Args:
+            entries: URLs o dicts con clave 'url'
+
+        Returns:
+            threading.Thread: Hilo alimentador (join() también lo espera)
+        """
+        if max_pending < 1:
+            raise ValueError(f"max_pending debe ser >= 1, recibido: {max_pending}")
+        thread = threading.Thread(target=self._feed, args=(entries, priority, max_pending),
+                                  name=f"yt-feeder-{len(self._feeders)}", daemon=True)
+        with self._cond:
+            if self._closed or self._feeds_closed:
+                raise RuntimeError("DownloadManager cerrado")
+            self._feeders.append(thread)
+        thread.start()
+        return thread
+
+    @property
+    def feeding(self) -> bool:
+        """True mientras algún iterable de feed() siga produciendo URLs."""
+        return bool(self._feeders)
+
+    def resume(self, priority: int = 0) -> List[DownloadJob]:
+        """Encola los trabajos pendientes del diario (en cola, interrumpidos o fallidos)."""
+        if self.journal is None:
+            raise RuntimeError("resume() necesita un JobJournal")
+        return [self.submit(entry.url, priority, entry.format_choice)
+                for entry in self.journal.pending()]
+
+    def cancel(self, job: DownloadJob) -> bool:
+        """
+        Cancela un trabajo: si está en cola no llega a empezar; si está en curso
+        se aborta en el siguiente callback de progreso.
+
+        Returns:
+            bool: False si ya había terminado
+        """
+        with self._cond:
+            if job.status in JOB_FINAL_STATES:
+                return False
+            job._cancel.set()
+            if job.status == JOB_POSTPROCESSING:
+                # Solo si la fusión aún no empezó (ffmpeg en marcha no se interrumpe)
+                job.info['postprocess'].cancel()
+            elif job.status == JOB_QUEUED:
+                # Fuera de las colas, para que join() no espere por él
+                for queue in (self._heap, self._delayed):
+                    queue[:] = [entry for entry in queue if entry[2] is not job]
+                    heapq.heapify(queue)
+                self._finish(job, JOB_CANCELLED)
+            return True
+
+    def close_feeds(self) -> None:
+        """
+        Detiene los alimentadores de feed(): no encolan ninguna URL más
+        (un iterable bloqueado en la red termina al devolver su siguiente
+        entrada). Después feed() ya no acepta iterables.
+        """
+        with self._cond:
+            self._feeds_closed = True
+            self._cond.notify_all()
+
+    def cancel_all(self) -> int:
+        """Detiene los alimentadores y cancela todos los trabajos no terminados."""
+        self.close_feeds()
+        return sum(self.cancel(job) for job in list(self._jobs))
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que la cola se vacíe y no quede ninguna descarga ni fusión en curso."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while (self._feeders or self._heap or self._delayed or self._running
+                   or self._postprocessing):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """
+        Cierra el gestor; los workers terminan al vaciarse la cola. Con
+        wait=True vuelve cuando todos los trabajos están terminados, fusiones
+        incluidas (después ya se puede cerrar el diario). cancel_pending
+        detiene también los alimentadores (cancel_all) sin esperar a que
+        terminen sus iterables.
+        """
+        if cancel_pending:
+            self.cancel_all()
+        elif wait:
+            self.join()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+            with self._cond:
+                # Fusiones ya en marcha al cancelar: no se interrumpen
+                while self._postprocessing:
+                    self._cond.wait()
+
+    def __enter__(self) -> "DownloadManager":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown(wait=True, cancel_pending=exc_type is not None)
+
+    def jobs(self) -> List[DownloadJob]:
+        return list(self._jobs)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Contadores por estado y throughput agregado."""
+        jobs = list(self._jobs)
+        states = {state: 0 for state in (JOB_QUEUED, JOB_RUNNING, JOB_POSTPROCESSING)
+                  + JOB_FINAL_STATES}
+        for job in jobs:
+            states[job.status] += 1
+        total = sum(job.bytes_done for job in jobs)
+        elapsed = 0.0
+        if self._first_start is not None:
+            idle = (not self._running and not self._postprocessing and not self._heap
+                    and self._last_finish is not None)
+            end = self._last_finish if idle else time.monotonic()
+            elapsed = max(end - self._first_start, 0.0)
+        return {
+            'jobs': len(jobs),
+            **states,
+            'skipped': sum(job.skipped for job in jobs),
+            'retries': sum(max(job.attempts - 1, 0) for job in jobs),
+            'bytes': total,
+            'connections': self.budget.in_use if self.budget is not None else None,
+            'elapsed': round(elapsed, 3),
+            'bytes_per_sec': round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    # --- Workers ---
+
+    def _next_job(self) -> Optional[DownloadJob]:
+        """
+        El trabajo de mayor prioridad cuyo host tiene hueco (o None al cerrar).
+        Los que se saltan por límite de host vuelven al heap en su posición.
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, seq, ready = heapq.heappop(self._delayed)
+                    heapq.heappush(self._heap, (-ready.priority, seq, ready))
+                skipped = []
+                job = None
+                while self._heap:
+                    entry = heapq.heappop(self._heap)
+                    candidate = entry[2]
+                    if candidate.status != JOB_QUEUED:
+                        continue   # cancelado en cola
+                    if self._host_active.get(candidate.host, 0) < self.per_host:
+                        job = candidate
+                        break
+                    skipped.append(entry)
+                for entry in skipped:
+                    heapq.heappush(self._heap, entry)
+
+                if job is not None:
+                    self._host_active[job.host] = self._host_active.get(job.host, 0) + 1
+                    self._running += 1
+                    job.status = JOB_RUNNING
+                    job.started = time.monotonic()
+                    if self._first_start is None:
+                        self._first_start = job.started
+                    if self._feeders:
+                        self._cond.notify_all()   # hueco en la cola para feed()
+                    return job
+                if self._closed and not self._heap and not self._delayed:
+                    return None
+                self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def _finish(self, job: DownloadJob, status: str, error: Optional[str] = None) -> None:
+        """Marca el estado final (con self._cond tomado)."""
+        job.status = status
+        job.error = error
+        job.finished = time.monotonic()
+        if self.progress is not None:
+            self.progress.finish(job.id, status)
+        job._done.set()
+        self._cond.notify_all()
+
+    def _progress_hook(self, job: DownloadJob):
+        limiter = self.limiter
+        journal = self.journal
+        file_bytes = job._file_bytes
+        cancel = job._cancel
+
+        def hook(d: Dict[str, Any]) -> None:
+            if cancel.is_set():
+                raise DownloadCancelled(f"Trabajo {job.id} cancelado")
+            downloaded = d.get('downloaded_bytes')
+            if downloaded is None:
+                return
+            name = d.get('filename') or d.get('tmpfilename') or ''
+            delta = downloaded - file_bytes.get(name, 0)
+            if delta <= 0:
+                return
+            file_bytes[name] = downloaded
+            job.bytes_done += delta
+            if journal is not None:
+                journal.progress(job.url, file_bytes)
+            if limiter is not None:
+                limiter.consume(delta, cancel)
+
+        return hook
+
+    def retry_delay(self, attempts: int) -> float:
+        """Espera antes del reintento tras `attempts` intentos (exponencial con jitter)."""
+        return min(self.backoff * 2 ** (attempts - 1), self.backoff_max) * random.uniform(0.5, 1.0)
+
+    def _run(self, job: DownloadJob) -> None:
+        journal = self.journal
+        job.attempts += 1
+        if journal is not None:
+            journal.start(job.url)
+        granted = None
+        if self.budget is not None:
+            want = self.downloader.fragment_policy.suggest(job.host)
+            granted = self.budget.acquire(want, job._cancel)
+        try:
+            if granted == 0:
+                raise DownloadCancelled(f"Trabajo {job.id} cancelado")
+            hooks = [self._progress_hook(job)]
+            if self.progress is not None:
+                hooks.append(self.progress.track(job.id, job.url))
+            job.info = self.downloader.download(job.url, job.format_choice, progress_hooks=hooks,
+                                                max_connections=granted)
+            job.skipped = bool(job.info.get('archived'))
+            status, error = JOB_DONE, None
+        except Exception as e:
+            status = JOB_CANCELLED if job.cancelled else JOB_FAILED
+            error = None if job.cancelled else str(e)
+        finally:
+            if granted:
+                self.budget.release(granted)
+
+        merge = job.info.get('postprocess') if status == JOB_DONE else None
+        if merge is None:
+            # Antes de soltar el hueco: join() no debe ver la cola vacía
+            # mientras el trabajo pasa a reintento
+            self._settle(job, status, error)
+        with self._cond:
+            self._host_active[job.host] -= 1
+            self._running -= 1
+            if merge is not None:
+                # El worker queda libre; el trabajo termina cuando acabe ffmpeg
+                job.status = JOB_POSTPROCESSING
+                self._postprocessing += 1
+            self._cond.notify_all()
+        if merge is not None:
+            merge.add_done_callback(lambda future: self._merged(job, future))
+
+    def _merged(self, job: DownloadJob, future) -> None:
+        """Callback de la fusión en el pool de postprocesado."""
+        if future.cancelled():
+            status, error = JOB_CANCELLED, None
+        elif future.exception() is not None:
+            status, error = JOB_FAILED, str(future.exception())
+        else:
+            status, error = JOB_DONE, None
+        self._settle(job, status, error)
+        with self._cond:
+            self._postprocessing -= 1
+            self._cond.notify_all()
+
+    def _settle(self, job: DownloadJob, status: str, error: Optional[str]) -> None:
+        """Anota el resultado en el diario y termina o reprograma el trabajo."""
+        if self.journal is not None:
+            if status == JOB_DONE:
+                self.journal.finish(job.url, job.filepath)
+            else:
+                self.journal.progress(job.url, job._file_bytes, force=True)
+                if status == JOB_FAILED:
+                    self.journal.fail(job.url, error)
+
+        with self._cond:
+            self._last_finish = time.monotonic()
+            if status == JOB_FAILED and job.attempts <= self.retries and not job.cancelled:
+                # Vuelve a la cola tras la espera; continuedl retoma los .part
+                job.status = JOB_QUEUED
+                job.error = error
+                ready_at = time.monotonic() + self.retry_delay(job.attempts)
+                heapq.heappush(self._delayed, (ready_at, next(self._seq), job))
+                self._cond.notify_all()
+                return
+            self._finish(job, status, error)
+
+    def _feed(self, entries: Iterable[Any], priority: int, max_pending: int) -> None:
+        try:
+            for entry in entries:
+                url = entry if isinstance(entry, str) else entry['url']
+                with self._cond:
+                    while (len(self._heap) >= max_pending and not self._closed
+                           and not self._feeds_closed):
+                        self._cond.wait()
+                    if self._closed or self._feeds_closed:
+                        return
+                job = self.submit(url, priority)
+                # close_feeds() entre la comprobación y submit(): cancel_all()
+                # pudo tomar su lista de trabajos antes de que este se añadiera
+                if self._feeds_closed:
+                    self.cancel(job)
+                    return
+        except Exception as e:
+            if not (self._closed or self._feeds_closed):
+                self.feed_errors.append(str(e))
+        finally:
+            with self._cond:
+                self._feeders.remove(threading.current_thread())
+                self._cond.notify_all()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._run(job)
+
+
+def read_urls(path: str) -> List[str]:
+    """URLs de un archivo (una por línea; '#' comenta)."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Descarga concurrente de una lista de videos")
+    parser.add_argument("urls", nargs="?", help="Archivo con una URL por línea "
+                                                "(sin él, se retoma lo pendiente de --journal)")
+    parser.add_argument("--playlist", action="append", default=[],
+                        help="Lista o canal a descargar (se enumera sobre la marcha)")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de videos por --playlist")
+    parser.add_argument("--archive", default=None,
+                        help="Archivo de descargas SQLite (salta los videos ya descargados)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Con --archive: enlazar (hardlink) los archivos de contenido repetido")
+    parser.add_argument("--progress", action="store_true",
+                        help="Mostrar el progreso agregado de las descargas en curso")
+    parser.add_argument("--output", default="downloads")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    parser.add_argument("--bandwidth", type=parse_rate, default=None, help="Ej.: 500K, 20M")
+    parser.add_argument("--journal", default=None, help="Diario SQLite para reanudar el lote")
+    parser.add_argument("--retries", type=int, default=0, help="Reintentos por trabajo fallido")
+    parser.add_argument("--connections", type=int, default=None,
+                        help="Conexiones simultáneas en total (fragmentos de todos los trabajos)")
+    parser.add_argument("--postprocess-workers", type=int, default=None,
+                        help="Procesos ffmpeg simultáneos para las fusiones "
+                             "(por defecto, uno por CPU; 0 = fusionar en cada worker)")
+    parser.add_argument("--min-height", type=int, default=None, help="Resolución mínima (p. ej. 720)")
+    parser.add_argument("--max-height", type=int, default=None, help="Resolución máxima")
+    parser.add_argument("--max-size", type=parse_rate, default=None,
+                        help="Tamaño máximo por video, estimado por bitrate si falta (p. ej. 50M)")
+    parser.add_argument("--prefer", choices=(PREFER_QUALITY, PREFER_SIZE), default=None,
+                        help="Con las restricciones: mejor calidad o menos bytes")
+    parser.add_argument("--audio-only", action="store_true",
+                        help="Solo audio (el mejor formato de audio por byte, sin video)")
+    parser.add_argument("--audio-format", choices=sorted(AUDIO_FORMATS), default=None,
+                        help="Con --audio-only: convertir a este formato")
+    args = parser.parse_args(argv)
+    if args.urls is None and args.journal is None and not args.playlist:
+        parser.error("indica un archivo de URLs, --playlist o --journal")
+    if args.audio_format and not args.audio_only:
+        parser.error("--audio-format requiere --audio-only")
+
+    journal = info_cache = None
+    if args.journal:
+        journal = JobJournal(args.journal)
+        # La info en el mismo archivo: al reanudar se eligen los mismos
+        # formatos, así que los .part existentes se continúan
+        info_cache = InfoCache(path=args.journal)
+    archive = DownloadArchive(args.archive, dedupe=args.dedupe) if args.archive else None
+    postprocess = None if args.postprocess_workers == 0 else PostProcessPool(args.postprocess_workers)
+    objective = None
+    if args.min_height or args.max_height or args.max_size or args.prefer:
+        objective = FormatObjective(args.min_height, args.max_height,
+                                    int(args.max_size) if args.max_size else None,
+                                    args.prefer or PREFER_QUALITY)
+    downloader = YouTubeDownloader(args.output, verbose=False, info_cache=info_cache, archive=archive,
+                                   postprocess=postprocess, format_objective=objective,
+                                   audio_only=args.audio_only, audio_format=args.audio_format)
+    progress = ProgressAggregator().start() if args.progress else None
+    emit = progress.write if progress is not None else print
+    manager = DownloadManager(downloader, args.workers, args.per_host, args.bandwidth,
+                              journal=journal, retries=args.retries, connections=args.connections,
+                              progress=progress)
+    interrupted = False
+    try:
+        if args.urls is not None:
+            urls = read_urls(args.urls)
+            emit(f"\n📋 {len(urls)} URLs, {args.workers} workers, {args.per_host} por host")
+            manager.submit_many(urls)
+        elif not args.playlist:
+            jobs = manager.resume()
+            emit(f"\n📋 {len(jobs)} trabajos pendientes en {args.journal}")
+        for url in args.playlist:
+            emit(f"\n📋 Enumerando {url}")
+            manager.feed(downloader.iter_playlist(url, limit=args.limit))
+
+        # Los trabajos de --playlist van apareciendo mientras se enumera
+        printed = 0
+        while True:
+            jobs = manager.jobs()
+            if printed == len(jobs):
+                if not manager.feeding:
+                    break
+                time.sleep(0.1)
+                continue
+            job = jobs[printed]
+            job.wait()
+            printed += 1
+            mark = "⏭️" if job.skipped else {"done": "✅", "failed": "❌", "cancelled": "⏹️"}[job.status]
+            emit(f"{mark} [{job.id}] {job.url} {format_filesize(job.bytes_done)} {job.error or ''}")
+        for error in manager.feed_errors:
+            emit(f"❌ {error}")
+    except KeyboardInterrupt:
+        print("\n⏹️  Cancelando...")
+        interrupted = True
+    finally:
+        # Al interrumpir no se espera a los alimentadores de --playlist
+        manager.shutdown(cancel_pending=interrupted)
+        if postprocess is not None:
+            postprocess.shutdown()
+        if progress is not None:
+            progress.stop()
+        if archive is not None:
+            archive.close()
+        if journal is not None:
+            journal.close()
+            info_cache.close()
+
+    m = manager.metrics()
+    print(f"\n📊 {m['done']} completadas ({m['skipped']} ya estaban), {m['failed']} con error, "
+          f"{m['cancelled']} canceladas | "
+          f"{format_filesize(m['bytes'])} en {m['elapsed']:.1f}s "
+          f"({format_filesize(m['bytes_per_sec'])}/s)")
+    return 0 if m['failed'] == 0 and not manager.feed_errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
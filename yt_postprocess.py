@@ -0,0 +1,208 @@
+"""
+Pool de Postprocesado (ffmpeg) para YouTubeDownloader
+Archivo: yt_postprocess.py
+
+Con 'bestvideo+bestaudio' yt-dlp fusiona video y audio con ffmpeg en el
+mismo hilo que descarga: mientras ffmpeg ocupa CPU, ese worker no usa la
+red. PostProcessPool separa las etapas:
+
+    workers de descarga (red)  ->  cola acotada  ->  pool de ffmpeg (CPU)
+
+1. YouTubeDownloader baja video y audio como formatos separados
+   (format "137,140": yt-dlp no fusiona) y entrega las partes al pool
+2. El pool ejecuta como mucho `workers` procesos ffmpeg a la vez (por
+   defecto, uno por CPU): fusión, remux e incrustación de miniatura en una
+   sola pasada con '-c copy'
+3. En modo audio, la conversión al formato pedido (mp3, m4a, opus) también
+   se hace en el pool; si el códec ya es el pedido solo se cambia de
+   contenedor, sin recodificar
+4. La cola entre etapas es acotada: si el pool va atrasado, submit()
+   bloquea al worker de descarga en lugar de acumular partes en disco
+
+El trabajo de CPU ocurre en los procesos ffmpeg; los hilos del pool solo
+los lanzan y esperan (sin GIL de por medio), así que no hace falta un
+ProcessPoolExecutor para tener un ffmpeg por núcleo.
+
+Uso:
+    pool = PostProcessPool()
+    downloader = YouTubeDownloader(postprocess=pool)
+    future = pool.merge("v.f137.mp4", "v.f140.m4a", "v.mp4")
+    future.result()   # ruta final
+"""
+
+import os
+import time
+import shutil
+import threading
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+class PostProcessError(RuntimeError):
+    """ffmpeg terminó con error."""
+
+
+class AudioFormat(NamedTuple):
+    """Formato de salida del modo audio."""
+    ext: str
+    codec: str      # prefijo de acodec de yt-dlp que se copia sin recodificar
+    encoder: str    # codificador de ffmpeg si hay que recodificar
+
+
+# Mismos nombres que preferredcodec de FFmpegExtractAudio (yt-dlp)
+AUDIO_FORMATS = {
+    'mp3': AudioFormat('mp3', 'mp3', 'libmp3lame'),
+    'm4a': AudioFormat('m4a', 'mp4a', 'aac'),
+    'opus': AudioFormat('opus', 'opus', 'libopus'),
+}
+
+
+def run_ffmpeg(ffmpeg: str, args: List[str]) -> None:
+    result = subprocess.run([ffmpeg, "-y", "-hide_banner", "-loglevel", "error", *args],
+                            stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise PostProcessError(f"ffmpeg ({result.returncode}): {result.stderr.strip()[-500:]}")
+
+
+def _temp_path(output: str) -> str:
+    """Ruta temporal con la misma extensión (ffmpeg elige el contenedor por ella)."""
+    path = Path(output)
+    return str(path.with_name(f"{path.stem}.temp{path.suffix}"))
+
+
+def _container_args(output: str) -> List[str]:
+    # moov al principio: el archivo se puede reproducir mientras se copia o sirve
+    return ["-movflags", "+faststart"] if Path(output).suffix in (".mp4", ".m4a", ".mov") else []
+
+
+def merge_streams(ffmpeg: str, video: str, audio: str, output: str,
+                  thumbnail: Optional[str] = None, keep_parts: bool = False) -> str:
+    """Fusiona video y audio (y miniatura) sin recodificar. Returns: output."""
+    args = ["-i", video, "-i", audio]
+    maps = ["-map", "0:v:0", "-map", "1:a:0"]
+    codecs = ["-c", "copy"]
+    if thumbnail:
+        args += ["-i", thumbnail]
+        maps += ["-map", "2:v:0"]
+        codecs += ["-c:v:1", "mjpeg", "-disposition:v:1", "attached_pic"]
+    tmp = _temp_path(output)
+    run_ffmpeg(ffmpeg, [*args, *maps, *codecs, *_container_args(output), tmp])
+    os.replace(tmp, output)
+    if not keep_parts:
+        for part in (video, audio, thumbnail):
+            if part and os.path.exists(part):
+                os.remove(part)
+    return output
+
+
+def remux(ffmpeg: str, source: str, output: str, keep_source: bool = False) -> str:
+    """Cambia de contenedor sin recodificar. Returns: output."""
+    tmp = _temp_path(output)
+    run_ffmpeg(ffmpeg, ["-i", source, "-map", "0", "-c", "copy", *_container_args(output), tmp])
+    os.replace(tmp, output)
+    if not keep_source and os.path.abspath(source) != os.path.abspath(output):
+        os.remove(source)
+    return output
+
+
+def extract_audio(ffmpeg: str, source: str, output: str, audio_format: str,
+                  acodec: Optional[str] = None, keep_source: bool = False) -> str:
+    """
+    Convierte el audio de `source` a `audio_format` (ver AUDIO_FORMATS).
+    Si `acodec` ya es el del formato, copia el flujo sin recodificar.
+    Returns: output.
+    """
+    target = AUDIO_FORMATS[audio_format]
+    copy = (acodec or '').split('.')[0].lower() == target.codec
+    tmp = _temp_path(output)
+    run_ffmpeg(ffmpeg, ["-i", source, "-vn", "-map", "0:a:0",
+                        "-c:a", "copy" if copy else target.encoder, *_container_args(output), tmp])
+    os.replace(tmp, output)
+    if not keep_source and os.path.abspath(source) != os.path.abspath(output):
+        os.remove(source)
+    return output
+
+
+class PostProcessPool:
+    """Pool acotado de tareas ffmpeg, compartido por todas las descargas."""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 ffmpeg: Optional[str] = None):
+        """
+        Args:
+            workers: Procesos ffmpeg simultáneos (por defecto, uno por CPU)
+            max_pending: Tareas en espera antes de que submit() bloquee
+                (por defecto, 2 por worker)
+            ffmpeg: Ejecutable (por defecto, el del PATH)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = self.workers * 2 if max_pending is None else max_pending
+        self.ffmpeg = ffmpeg or shutil.which("ffmpeg")
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="yt-postprocess")
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'done': 0, 'failed': 0, 'busy_seconds': 0.0, 'wait_seconds': 0.0}
+
+    @property
+    def available(self) -> bool:
+        """False sin ffmpeg (YouTubeDownloader vuelve a la fusión de yt-dlp)."""
+        return self.ffmpeg is not None
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Encola una tarea; bloquea mientras la cola esté llena."""
+        start = time.monotonic()
+        self._slots.acquire()
+        waited = time.monotonic() - start
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['wait_seconds'] += waited
+        try:
+            future = self._executor.submit(self._run, fn, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def merge(self, video: str, audio: str, output: str, thumbnail: Optional[str] = None,
+              keep_parts: bool = False) -> Future:
+        return self.submit(merge_streams, self.ffmpeg, video, audio, output, thumbnail, keep_parts)
+
+    def remux(self, source: str, output: str, keep_source: bool = False) -> Future:
+        return self.submit(remux, self.ffmpeg, source, output, keep_source)
+
+    def extract_audio(self, source: str, output: str, audio_format: str,
+                      acodec: Optional[str] = None, keep_source: bool = False) -> Future:
+        return self.submit(extract_audio, self.ffmpeg, source, output, audio_format, acodec, keep_source)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Tareas enviadas/terminadas, ocupación y tiempo que la descarga esperó a la cola."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = stats['submitted'] - stats['done'] - stats['failed']
+        stats['busy_seconds'] = round(stats['busy_seconds'], 3)
+        stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "PostProcessPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+    def _run(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        start = time.monotonic()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._stats['done' if ok else 'failed'] += 1
+                self._stats['busy_seconds'] += time.monotonic() - start
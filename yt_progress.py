@@ -0,0 +1,277 @@
+"""
+Progreso Agregado de Descargas
+Archivo: yt_progress.py
+
+yt-dlp llama al hook de progreso cientos de veces por segundo por descarga.
+Imprimir en cada llamada (print con '\\r') cuesta una escritura de terminal
+por callback y, con dos descargas a la vez, las líneas se pisan.
+
+ProgressAggregator separa las dos cosas:
+1. El hook de cada trabajo solo asigna atributos de su JobProgress (un
+   escritor por trabajo: sin locks en el hilo que descarga)
+2. Un único hilo renderizador redibuja un bloque de varias líneas a ritmo
+   fijo (`interval`) y las mismas cifras se leen con metrics()
+
+En una terminal el bloque se redibuja en su sitio (códigos ANSI); si la
+salida no es una terminal se escribe una línea de resumen por intervalo.
+Las líneas que el programa quiera imprimir mientras tanto deben pasar por
+write(), que las coloca encima del bloque.
+
+Uso:
+    with ProgressAggregator() as progress:
+        hook = progress.track(1, "Mi video")
+        downloader.download(url, progress_hooks=[hook])
+        progress.finish(1, "done")
+"""
+
+import sys
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+DEFAULT_INTERVAL = 0.25
+DEFAULT_MAX_LINES = 8
+
+# Estados de JobProgress (los finales los fija finish(), p. ej. "done")
+PROGRESS_WAITING = "waiting"
+PROGRESS_DOWNLOADING = "downloading"
+PROGRESS_PROCESSING = "processing"
+
+
+def format_filesize(size):
+    """Convierte bytes a formato legible"""
+    if not size:
+        return "Desconocido"
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
+
+
+def format_rate(speed: Optional[float]) -> str:
+    return f"{format_filesize(speed)}/s" if speed else "-"
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class JobProgress:
+    """
+    Contadores de un trabajo. Solo los escribe el hook de su descarga;
+    el renderizador los lee sin lock (una lectura puede mezclar dos
+    callbacks seguidos, lo que en una barra de progreso no importa).
+    """
+
+    __slots__ = ("key", "label", "status", "done_bytes", "file_bytes", "file_total",
+                 "speed", "eta", "started", "updated")
+
+    def __init__(self, key: Any, label: str):
+        self.key = key
+        self.label = label
+        self.status = PROGRESS_WAITING
+        self.done_bytes = 0          # archivos ya terminados (video antes del audio)
+        self.file_bytes = 0          # archivo en curso
+        self.file_total: Optional[int] = None
+        self.speed: Optional[float] = None
+        self.eta: Optional[float] = None
+        self.started = time.monotonic()
+        self.updated = self.started
+
+    @property
+    def downloaded(self) -> int:
+        return self.done_bytes + self.file_bytes
+
+    @property
+    def total(self) -> Optional[int]:
+        return None if self.file_total is None else self.done_bytes + self.file_total
+
+    @property
+    def percent(self) -> Optional[float]:
+        total = self.total
+        return 100.0 * self.downloaded / total if total else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'key': self.key,
+            'label': self.label,
+            'status': self.status,
+            'downloaded': self.downloaded,
+            'total': self.total,
+            'speed': self.speed,
+            'eta': self.eta,
+        }
+
+
+class ProgressAggregator:
+    """Progreso de muchas descargas con un solo hilo de dibujo."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, stream: Optional[TextIO] = None,
+                 max_lines: int = DEFAULT_MAX_LINES, render: bool = True):
+        """
+        Args:
+            interval: Segundos entre redibujados
+            stream: Salida del bloque (por defecto, sys.stderr)
+            max_lines: Trabajos activos mostrados (el resto se resume)
+            render: False = solo métricas, sin hilo de dibujo
+        """
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.max_lines = max_lines
+        self.render = render
+        self._ansi = bool(getattr(self.stream, "isatty", lambda: False)())
+        self._jobs: Dict[Any, JobProgress] = {}
+        self._finished: Dict[str, int] = {}
+        self._finished_bytes = 0
+        self._lock = threading.Lock()        # registro de trabajos
+        self._draw_lock = threading.Lock()   # salida
+        self._drawn = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = time.monotonic()
+
+    # --- Registro (fuera del camino caliente) ---
+
+    def track(self, key: Any, label: str = "") -> Callable[[Dict[str, Any]], None]:
+        """
+        Registra un trabajo y devuelve su hook de progreso para yt-dlp.
+
+        Args:
+            label: Texto a mostrar hasta que llega el título del video
+                (por defecto, la clave)
+        """
+        progress = JobProgress(key, label or str(key))
+        with self._lock:
+            self._jobs[key] = progress
+        clock = time.monotonic
+        titled = False
+
+        def hook(d: Dict[str, Any]) -> None:
+            nonlocal titled
+            if not titled:
+                titled = True
+                progress.label = (d.get('info_dict') or {}).get('title') or progress.label
+            status = d['status']
+            if status == 'downloading':
+                progress.status = PROGRESS_DOWNLOADING
+                progress.file_bytes = d.get('downloaded_bytes') or 0
+                progress.file_total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                progress.speed = d.get('speed')
+                progress.eta = d.get('eta')
+                progress.updated = clock()
+            elif status == 'finished':
+                progress.done_bytes += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+                progress.file_bytes = 0
+                progress.file_total = None
+                progress.speed = None
+                progress.eta = None
+                progress.status = PROGRESS_PROCESSING
+
+        return hook
+
+    def finish(self, key: Any, status: str) -> None:
+        """Saca el trabajo del bloque y lo cuenta en `status` (p. ej. 'done')."""
+        with self._lock:
+            progress = self._jobs.pop(key, None)
+            self._finished[status] = self._finished.get(status, 0) + 1
+            if progress is not None:
+                self._finished_bytes += progress.downloaded
+
+    # --- Métricas ---
+
+    def metrics(self) -> Dict[str, Any]:
+        """Mismas cifras que el bloque: activos, bytes, velocidad y detalle por trabajo."""
+        with self._lock:
+            active = list(self._jobs.values())
+            finished = dict(self._finished)
+            finished_bytes = self._finished_bytes
+        jobs = [p.snapshot() for p in active]
+        return {
+            'active': sum(p['status'] == PROGRESS_DOWNLOADING for p in jobs),
+            'waiting': sum(p['status'] != PROGRESS_DOWNLOADING for p in jobs),
+            'finished': finished,
+            'bytes': finished_bytes + sum(p['downloaded'] for p in jobs),
+            'speed': sum(p['speed'] or 0.0 for p in jobs),
+            'elapsed': round(time.monotonic() - self._started, 3),
+            'jobs': jobs,
+        }
+
+    # --- Dibujo ---
+
+    def start(self) -> "ProgressAggregator":
+        if self.render and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="yt-progress", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el renderizador dejando el último estado dibujado."""
+        self._stop.set()
+        if self._thread is None:
+            return
+        self._thread.join()
+        self._thread = None
+        self.draw()
+        with self._draw_lock:
+            self._drawn = 0   # el bloque final queda en pantalla
+
+    def __enter__(self) -> "ProgressAggregator":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def write(self, line: str) -> None:
+        """Imprime una línea sin romper el bloque de progreso."""
+        with self._draw_lock:
+            self._clear()
+            self.stream.write(line + "\n")
+            self.stream.flush()
+        if self._thread is not None:
+            self.draw()
+
+    def draw(self) -> None:
+        lines = self.lines()
+        with self._draw_lock:
+            if self._ansi:
+                self._clear()
+                self.stream.write("".join(line + "\n" for line in lines))
+                self._drawn = len(lines)
+            else:
+                self.stream.write(lines[0] + "\n")
+            self.stream.flush()
+
+    def lines(self) -> List[str]:
+        m = self.metrics()
+        done = sum(m['finished'].values())
+        header = (f"⬇️  {m['active']} activas, {m['waiting']} en espera, {done} terminadas | "
+                  f"{format_filesize(m['bytes'])} | {format_rate(m['speed'])}")
+        lines = [header]
+        jobs = sorted(m['jobs'], key=lambda p: -(p['speed'] or 0.0))
+        for p in jobs[:self.max_lines]:
+            label = p['label'] if len(p['label']) <= 40 else p['label'][:39] + "…"
+            if p['status'] == PROGRESS_DOWNLOADING:
+                percent = f"{100.0 * p['downloaded'] / p['total']:5.1f}%" if p['total'] else "  ?  "
+                lines.append(f"  {label:<40} {percent} {format_filesize(p['downloaded']):>10} "
+                             f"{format_rate(p['speed']):>12} ETA {format_eta(p['eta'])}")
+            else:
+                state = "procesando" if p['status'] == PROGRESS_PROCESSING else "esperando"
+                lines.append(f"  {label:<40} {state}")
+        if len(jobs) > self.max_lines:
+            lines.append(f"  … y {len(jobs) - self.max_lines} más")
+        return lines
+
+    def _clear(self) -> None:
+        """Borra el bloque dibujado (con _draw_lock tomado)."""
+        if self._ansi and self._drawn:
+            self.stream.write(f"\x1b[{self._drawn}F\x1b[J")
+            self._drawn = 0
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.draw()
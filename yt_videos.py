@@ -1,123 +1,468 @@
 """
 Descargador Simple de Videos de YouTube
 Ejecución directa desde terminal
+
+Para listas grandes de URLs ver yt_manager.py (cola concurrente).
+
+La info de cada video se extrae una sola vez: get_available_formats la
+guarda en una InfoCache (yt_info_cache.py) y download_video la reutiliza
+con YoutubeDL.process_ie_result en lugar de resolver la página de nuevo.
+
+Fragmentos concurrentes, tamaño de bloque HTTP y buffer los decide una
+FragmentPolicy (yt_fragments.py) que aprende el throughput de cada host.
+
+El progreso lo dibuja un ProgressAggregator (yt_progress.py) a ritmo fijo
+en lugar de imprimir en cada callback de yt-dlp.
+
+Con un DownloadArchive (yt_archive.py) los videos ya descargados no se
+vuelven a pedir, y con dedupe=True el contenido repetido se enlaza.
+
+Con un PostProcessPool (yt_postprocess.py) video y audio se bajan como
+partes separadas y la fusión con ffmpeg se hace en el pool, sin ocupar el
+hilo que descarga.
+
+Con un FormatObjective (yt_formats.py) el formato se elige por video entre
+todos los completos y pares video+audio, según bytes estimados y calidad
+(p. ej. "menos bytes con >= 720p" o "mejor calidad en <= 50 MB").
+
+Modo audio (audio_only=True): se baja solo el formato de audio con más
+calidad por byte, sin bytes de video ni fusión; si se pide audio_format
+(mp3, m4a, opus) la conversión se hace en el PostProcessPool.
+
+Listas y canales se recorren con iter_playlist: extracción plana y perezosa
+(una página de resultados cada vez), sin resolver todos los videos antes de
+empezar a descargar.
 """
 
+import os
+import copy
+import itertools
+
 import yt_dlp
+from yt_dlp.utils import DownloadError, make_archive_id
 from pathlib import Path
 
+from yt_formats import rank, select, select_audio
+from yt_fragments import FragmentPolicy, ThroughputMeter, host_key
+from yt_info_cache import InfoCache
+from yt_postprocess import AUDIO_FORMATS
+from yt_progress import ProgressAggregator, format_filesize
+
 
 class YouTubeDownloader:
     """Descargador de videos de YouTube con selección de calidad"""
 
-    def __init__(self, download_path="downloads"):
+    def __init__(self, download_path="downloads", verbose=True, info_cache=None,
+                 fragment_policy=None, archive=None, postprocess=None, embed_thumbnail=False,
+                 format_objective=None, audio_only=False, audio_format=None):
+        """
+        Args:
+            download_path: Carpeta de destino
+            verbose: Si False, no imprime nada (uso desde DownloadManager)
+            info_cache: InfoCache compartida (None = una LRU en memoria propia)
+            fragment_policy: FragmentPolicy compartida (None = una propia)
+            archive: DownloadArchive para saltar videos ya descargados (None = sin archivo)
+            postprocess: PostProcessPool para fusionar fuera del hilo de descarga
+                (None = yt-dlp fusiona en línea)
+            embed_thumbnail: Con postprocess, incrustar la miniatura al fusionar
+            format_objective: FormatObjective para elegir el formato de cada video
+                cuando no se indica uno (None = mejor calidad de yt-dlp)
+            audio_only: Descargar solo el audio
+            audio_format: Con audio_only, convertir a 'mp3', 'm4a' u 'opus'
+                (None = el formato original)
+        """
+        if audio_format is not None and audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"audio_format debe ser uno de {sorted(AUDIO_FORMATS)}, "
+                             f"recibido: {audio_format}")
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.verbose = verbose
+        self.info_cache = info_cache if info_cache is not None else InfoCache()
+        self.fragment_policy = fragment_policy if fragment_policy is not None else FragmentPolicy()
+        self.archive = archive
+        self.postprocess = postprocess
+        self.embed_thumbnail = embed_thumbnail
+        self.format_objective = format_objective
+        self.audio_only = audio_only
+        self.audio_format = audio_format if audio_only else None
+
+    def extract_info(self, url, refresh=False):
+        """
+        Info del video (sin descargar), desde la caché si está disponible
 
-    def progress_hook(self, d):
-        """Muestra el progreso de descarga"""
-        if d['status'] == 'downloading':
-            percent = d.get('_percent_str', 'N/A')
-            speed = d.get('_speed_str', 'N/A')
-            print(f'\rDescargando: {percent} | Velocidad: {speed}', end='')
-        elif d['status'] == 'finished':
-            print('\n✓ Descarga completada. Procesando...')
+        Args:
+            refresh: Si True, ignora la caché y vuelve a extraer
+        """
+        if not refresh:
+            info = self.info_cache.get(url)
+            if info is not None:
+                return info
+
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        self.info_cache.put(url, info)
+        return info
 
     def get_available_formats(self, url):
         """
         Obtiene los 3 mejores formatos disponibles
 
+        Incluye los pares video+audio ("137+140") además de los formatos
+        completos, ordenados con el objetivo del descargador (por defecto,
+        calidad). 'filesize' es estimado por bitrate si 'estimated' es True.
+
         Returns:
             list: Lista de diccionarios con información de formatos
         """
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-        }
-
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-
-                # Filtrar formatos que tienen video y audio
-                formats = []
-                for f in info.get('formats', []):
-                    if f.get('vcodec') != 'none' and f.get('acodec') != 'none':
-                        height = f.get('height', 0)
-                        if height:
-                            formats.append({
-                                'format_id': f.get('format_id'),
-                                'height': height,
-                                'ext': f.get('ext', 'mp4'),
-                                'filesize': f.get('filesize', 0),
-                                'fps': f.get('fps', 0)
-                            })
-
-                # Ordenar por altura (resolución) de mayor a menor
-                formats.sort(key=lambda x: x['height'], reverse=True)
-
-                # Eliminar duplicados de misma resolución, mantener el primero (mejor)
-                seen_heights = set()
-                unique_formats = []
-                for fmt in formats:
-                    if fmt['height'] not in seen_heights:
-                        seen_heights.add(fmt['height'])
-                        unique_formats.append(fmt)
-
-                # Retornar los 3 mejores formatos
-                return unique_formats[:3]
+            info = self.extract_info(url)
+
+            # Mejor candidato de cada resolución, en el orden del objetivo
+            seen_heights = set()
+            unique_formats = []
+            for c in rank(info, self.format_objective):
+                if c.height and c.height not in seen_heights:
+                    seen_heights.add(c.height)
+                    unique_formats.append({
+                        'format_id': c.format_id,
+                        'height': c.height,
+                        'ext': c.ext,
+                        'filesize': c.size,
+                        'estimated': c.estimated,
+                        'fps': c.fps,
+                        'vcodec': c.vcodec,
+                    })
+
+            # Retornar los 3 mejores formatos
+            return unique_formats[:3]
 
         except Exception as e:
             print(f"❌ Error al obtener formatos: {e}")
             return []
 
-    def download_video(self, url, format_choice=None):
+    def iter_playlist(self, url, start=1, limit=None, max_depth=3):
         """
-        Descarga un video de YouTube
+        Recorre una lista de reproducción o canal sin resolver sus videos
+
+        Usa extract_flat con lazy_playlist: yt-dlp pide cada página de
+        resultados (continuaciones en YouTube) solo cuando se consume la
+        anterior, así que la memoria no crece con el tamaño del canal y la
+        primera entrada llega tras la primera página. Las sublistas (p. ej.
+        las pestañas Videos/Shorts de un canal) se recorren en orden. Con
+        archivo, los videos ya descargados no se devuelven.
 
         Args:
-            url: URL del video
-            format_choice: ID del formato seleccionado, o None para mejor calidad
+            url: URL de lista, canal o video (un video da una sola entrada)
+            start: Primera entrada (1 = la primera)
+            limit: Máximo de entradas (None = todas)
+            max_depth: Niveles de sublistas que se expanden
+
+        Yields:
+            dict: {'url', 'id', 'title', 'duration'} de cada video
+        """
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            entries = self._flat_entries(ydl, url, None, max_depth)
+            yield from itertools.islice(entries, start - 1, None if limit is None else start - 1 + limit)
+
+    def _flat_entries(self, ydl, url, ie_key, depth):
+        """Entradas planas de una URL (generador; expande sublistas hasta `depth`)."""
+        result = ydl.extract_info(url, download=False, process=False, ie_key=ie_key)
+        result_type = result.get('_type', 'video')
+        if result_type in ('url', 'url_transparent') and depth > 0:
+            yield from self._flat_entries(ydl, result['url'], result.get('ie_key'), depth - 1)
+            return
+        if result_type not in ('playlist', 'multi_video'):
+            entry = self._flat_entry(ydl, result, url)
+            if entry is not None:
+                yield entry
+            return
+        yield from self._playlist_entries(ydl, result, depth)
+
+    def _playlist_entries(self, ydl, playlist, depth):
+        """Entradas de una lista ya extraída (las sublistas anidadas, recursivamente)."""
+        parent = playlist.get('extractor_key') or playlist.get('ie_key')
+        for entry in playlist.get('entries') or ():
+            if entry is None:
+                continue
+            entry_url = entry.get('url') or entry.get('webpage_url')
+            if depth > 0 and entry.get('_type') == 'playlist':
+                yield from self._playlist_entries(ydl, entry, depth - 1)
+                continue
+            if depth > 0 and entry.get('_type') == 'url' and entry_url:
+                entry_ie = entry.get('ie_key')
+                single = ydl.get_info_extractor(entry_ie).is_single_video(entry_url) if entry_ie else None
+                if single is False or (entry_ie is not None and entry_ie == parent):
+                    yield from self._flat_entries(ydl, entry_url, entry_ie, depth - 1)
+                    continue
+            flat = self._flat_entry(ydl, entry, entry_url)
+            if flat is not None:
+                yield flat
+
+    def _flat_entry(self, ydl, entry, url):
+        """
+        Entrada de un video, o None si ya está archivado. Si el extractor lo
+        resolvió entero (formatos incluidos), su info se guarda en la caché y
+        la descarga no repite la extracción.
+        """
+        extractor = entry.get('ie_key') or entry.get('extractor_key')
+        if self.archive is not None and extractor and entry.get('id') \
+                and make_archive_id(extractor, entry['id']) in self.archive:
+            return None
+        if entry.get('formats'):
+            self.info_cache.put(url, ydl.sanitize_info(entry))
+        return self._entry(entry, url)
+
+    @staticmethod
+    def _entry(entry, url):
+        return {
+            'url': entry.get('webpage_url') or url or entry.get('url'),
+            'id': entry.get('id'),
+            'title': entry.get('title'),
+            'duration': entry.get('duration'),
+        }
+
+    def download_options(self, format_choice=None, progress_hooks=None, extra_opts=None, plan=None):
         """
+        Opciones de YoutubeDL para una descarga
 
+        Args:
+            format_choice: ID del formato seleccionado o par "video+audio",
+                o None para mejor calidad
+            progress_hooks: Hooks de progreso (p. ej. de ProgressAggregator.track)
+            extra_opts: Opciones adicionales que sobrescriben las anteriores
+            plan: FragmentPlan con fragmentos, bloque HTTP y buffer
+        """
         ydl_opts = {
             'outtmpl': str(self.download_path / '%(title)s.%(ext)s'),
-            'progress_hooks': [self.progress_hook],
+            'progress_hooks': list(progress_hooks or ()),
+            # La barra de yt-dlp escribe en cada callback; la sustituye ProgressAggregator
+            'noprogress': True,
             'merge_output_format': 'mp4',
+            # Continuar .part existentes (reanudación tras una interrupción)
+            'continuedl': True,
         }
-
-        if format_choice:
+        if not self.verbose:
+            ydl_opts.update({'quiet': True, 'no_warnings': True})
+
+        if self.audio_only:
+            ydl_opts['format'] = f'{format_choice}/bestaudio/best' if format_choice else 'bestaudio/best'
+            if self.audio_format and not self._pooled():
+                # Sin pool, la conversión la hace yt-dlp en el hilo de descarga
+                ydl_opts['postprocessors'] = [{'key': 'FFmpegExtractAudio',
+                                               'preferredcodec': self.audio_format}]
+        elif format_choice and '+' in format_choice:
+            # Par video+audio ya elegido (yt_formats)
+            ydl_opts['format'] = f'{format_choice}/best'
+        elif format_choice:
             # Descargar formato específico + mejor audio disponible
             ydl_opts['format'] = f'{format_choice}+bestaudio/best'
         else:
             # Mejor calidad disponible
             ydl_opts['format'] = 'bestvideo+bestaudio/best'
 
-        try:
-            print(f"\n📂 Guardando en: {self.download_path.absolute()}\n")
+        if plan is not None:
+            ydl_opts.update(plan.ydl_opts())
+        if self.archive is not None:
+            # yt-dlp consulta el DownloadArchive igual que un archivo de texto
+            ydl_opts['download_archive'] = self.archive
+        ydl_opts.update(extra_opts or {})
+        return ydl_opts
+
+    def download(self, url, format_choice=None, progress_hooks=None, extra_opts=None, info=None,
+                 max_connections=None):
+        """
+        Descarga un video y devuelve su info (lanza excepción si falla)
+
+        La info ya extraída (argumento `info` o la caché) se procesa con
+        YoutubeDL.process_ie_result sin volver a resolver la página. Si la
+        descarga falla con esa info (p. ej. URLs de formato caducadas), se
+        invalida y se reintenta una vez con una extracción nueva.
+
+        Con archivo, un video ya archivado no se extrae ni se descarga: se
+        devuelve {'archived': True, ...} con el archivo registrado.
+
+        Con postprocess, si el formato elegido necesita fusión, la función
+        vuelve en cuanto bajan las partes: info['postprocess'] es el Future
+        de la fusión y el archivo final existe cuando este termina.
+
+        Args:
+            max_connections: Tope de fragmentos simultáneos (p. ej. concedido por
+                el ConnectionBudget de DownloadManager)
+
+        Returns:
+            dict: Info de yt-dlp; info['requested_downloads'][0]['filepath'] es el archivo final
+        """
+        if self.archive is not None and self.archive.contains_url(url):
+            return self._archived(url)
+        if info is None:
+            info = self.info_cache.get(url)
+        if format_choice is None and (self.audio_only or self.format_objective is not None):
+            # La extracción que haría la descarga, hecha antes para elegir formato
+            info = info or self.extract_info(url)
+            if self.audio_only:
+                target = AUDIO_FORMATS.get(self.audio_format)
+                chosen = select_audio(info, target.codec if target else None)
+            else:
+                chosen = select(info, self.format_objective)
+            format_choice = chosen.format_id if chosen is not None else None
+        key = host_key(url)
+        plan = self.fragment_policy.plan(key, max_connections)
+        meter = ThroughputMeter()
+        ydl_opts = self.download_options(format_choice, progress_hooks, extra_opts, plan)
+        ydl_opts['progress_hooks'].append(meter)
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            result = None
+            if info is not None:
+                try:
+                    result = self._process(ydl, info, ydl_opts)
+                except DownloadError:
+                    self.info_cache.invalidate(url)
+            if result is None:
+                info = ydl.extract_info(url, download=False)
+                if info is None:
+                    # yt-dlp lo encontró en el archivo (p. ej. por un ID antiguo)
+                    return self._archived(url)
+                info = ydl.sanitize_info(info)
+                self.info_cache.put(url, info)
+                result = self._process(ydl, info, ydl_opts)
+        self.fragment_policy.record(key, ydl_opts['concurrent_fragment_downloads'],
+                                    meter.bytes, meter.seconds)
+        if self.archive is not None:
+            downloads = (result or {}).get('requested_downloads')
+            if not downloads:
+                return self._archived(url)
+            future = result.get('postprocess')
+            if future is None:
+                self._record(result, downloads[0].get('filepath'))
+            else:
+                def record(merged):
+                    if not merged.cancelled() and merged.exception() is None:
+                        self._record(result, merged.result())
+                future.add_done_callback(record)
+        return result
+
+    def _process(self, ydl, info, ydl_opts):
+        """Descarga una info ya extraída (las fusiones, en el pool si hay uno)."""
+        if self._pooled() and not self.audio_only:
+            resolved = ydl.process_ie_result(copy.deepcopy(info), download=False)
+            if resolved and resolved.get('requested_formats'):
+                return self._download_parts(ydl, info, resolved, ydl_opts)
+        result = ydl.sanitize_info(ydl.process_ie_result(copy.deepcopy(info), download=True))
+        if self.audio_format and self._pooled() and result.get('requested_downloads'):
+            self._convert_audio(result)
+        return result
+
+    def _pooled(self):
+        return self.postprocess is not None and self.postprocess.available
+
+    def _convert_audio(self, result):
+        """Encola la conversión del audio descargado al formato pedido."""
+        download = result['requested_downloads'][0]
+        source = download['filepath']
+        target = AUDIO_FORMATS[self.audio_format]
+        acodec = download.get('acodec') or result.get('acodec')
+        output = str(Path(source).with_suffix(f'.{target.ext}'))
+        if output == source and (acodec or '').split('.')[0].lower() == target.codec:
+            return
+        download['filepath'] = output
+        result['postprocess'] = self.postprocess.extract_audio(source, output, self.audio_format, acodec)
+
+    def _download_parts(self, ydl, info, resolved, ydl_opts):
+        """
+        Baja video y audio como formatos separados ("137,140": yt-dlp no
+        fusiona) con los mismos nombres que usaría yt-dlp (titulo.f137.mp4) y
+        encola la fusión en el pool.
+        """
+        final = ydl.prepare_filename(resolved)
+        result = ydl.sanitize_info(resolved)
+        result['requested_downloads'] = [{'filepath': final}]
+        if os.path.exists(final):
+            return result
+
+        parts_opts = dict(ydl_opts)
+        parts_opts['format'] = ",".join(f['format_id'] for f in resolved['requested_formats'])
+        parts_opts['outtmpl'] = str(self.download_path / '%(title)s.f%(format_id)s.%(ext)s')
+        # Cada parte se anotaría como el video entero y la segunda se saltaría
+        parts_opts.pop('download_archive', None)
+        if self.embed_thumbnail:
+            parts_opts['writethumbnail'] = True
+        with yt_dlp.YoutubeDL(parts_opts) as parts_ydl:
+            parts = parts_ydl.process_ie_result(copy.deepcopy(info), download=True)
+
+        downloads = parts.get('requested_downloads') or []
+        video = next((d['filepath'] for d in downloads if d.get('vcodec') != 'none'), None)
+        audio = next((d['filepath'] for d in downloads if d['filepath'] != video), None)
+        if video is None or audio is None:
+            raise DownloadError(f"Formato {parts_opts['format']}: se esperaban video y audio por "
+                                f"separado, yt-dlp devolvió {len(downloads)} archivo(s)")
+        thumbnail = next((t['filepath'] for d in downloads for t in reversed(d.get('thumbnails') or [])
+                          if t.get('filepath')), None)
+        result['postprocess'] = self.postprocess.merge(video, audio, final, thumbnail)
+        return result
+
+    def _record(self, result, filepath):
+        linked = self.archive.record(result, filepath)
+        if linked is not None:
+            result['deduplicated_from'] = linked
+
+    def _archived(self, url):
+        path = self.archive.filepath(url)
+        return {
+            'webpage_url': url,
+            'archived': True,
+            'requested_downloads': [{'filepath': path}] if path else [],
+        }
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+    def download_with_info(self, info, format_choice=None, progress_hooks=None, extra_opts=None):
+        """
+        Descarga a partir de una info ya extraída (p. ej. de extract_info)
+        """
+        url = info.get('webpage_url') or info.get('original_url') or info['url']
+        return self.download(url, format_choice, progress_hooks, extra_opts, info=info)
 
-            print("\n✅ ¡Descarga exitosa!")
+    def download_video(self, url, format_choice=None):
+        """
+        Descarga un video de YouTube
+
+        Args:
+            url: URL del video
+            format_choice: ID del formato seleccionado, o None para mejor calidad
+        """
+        try:
+            if self.verbose:
+                print(f"\n📂 Guardando en: {self.download_path.absolute()}\n")
+
+            with ProgressAggregator(render=self.verbose) as progress:
+                result = self.download(url, format_choice, progress_hooks=[progress.track(url)])
+                if result.get('postprocess') is not None:
+                    result['postprocess'].result()
+                progress.finish(url, "done")
+
+            if result.get('archived'):
+                if self.verbose:
+                    print("\n⏭️  Ya estaba descargado (archivo de descargas)")
+                return True
+            if self.verbose:
+                print("\n✅ ¡Descarga exitosa!")
             return True
 
         except Exception as e:
-            print(f"\n❌ Error: {e}")
+            if self.verbose:
+                print(f"\n❌ Error: {e}")
             return False
 
 
-def format_filesize(size):
-    """Convierte bytes a formato legible"""
-    if not size:
-        return "Desconocido"
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024.0:
-            return f"{size:.1f} {unit}"
-        size /= 1024.0
-    return f"{size:.1f} TB"
-
-
 def main():
     """Función principal"""
     downloader = YouTubeDownloader()
@@ -147,6 +492,8 @@ def main():
         resolution = f"{fmt['height']}p"
         fps = f"{fmt['fps']}fps" if fmt['fps'] else ""
         size = format_filesize(fmt['filesize'])
+        if fmt['estimated'] and fmt['filesize']:
+            size = f"~{size}"
 
         print(
             f"{i}. {resolution:>6} {fps:>6} | Tamaño: {size:>12} | Formato: {fmt['ext']}")